@@ -0,0 +1,154 @@
+import asyncio
+import time
+from typing import Callable, List, Optional, Tuple
+
+from products import Product
+from store import Store
+
+
+class AsyncStore:
+    """
+    An asyncio facade over a Store.
+
+    Every call is put on a bounded queue and a single writer task applies the
+    queued calls in micro-batches. Only the writer touches the store, so no
+    locks are needed, and the per-call cost of waking the writer is shared by
+    the whole batch. When the queue is full, callers wait in ``await`` until
+    the writer catches up (back-pressure).
+
+    Orders go through Store.order(), so promotions, savings and all-or-nothing
+    validation behave exactly as they do synchronously.
+
+    Attributes:
+        store (Store): The wrapped store.
+        max_batch (int): The most queued calls applied per writer wake-up.
+    """
+
+    def __init__(self, store: Store, max_queue: int = 1024, max_batch: int = 64):
+        """
+        Initializes the facade. Call start() (or use ``async with``) before use.
+
+        Args:
+            store (Store): The store to wrap.
+            max_queue (int): Queue capacity; callers wait when it is full.
+            max_batch (int): The most queued calls applied per batch.
+        """
+        if max_queue <= 0 or max_batch <= 0:
+            raise ValueError("Queue size and batch size must be greater than zero")
+        self.store = store
+        self.max_batch = max_batch
+        self._max_queue = max_queue
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._started_at = 0.0
+        self._completed = 0
+        self._failed = 0
+        self._batches = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+    async def start(self) -> None:
+        """Starts the writer task on the running event loop."""
+        if self._writer is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self._max_queue)
+        self._started_at = time.perf_counter()
+        self._writer = asyncio.create_task(self._run_writer())
+
+    async def close(self) -> None:
+        """Applies everything already queued, then stops the writer task."""
+        if self._writer is None:
+            return
+        await self._queue.join()
+        self._writer.cancel()
+        try:
+            await self._writer
+        except asyncio.CancelledError:
+            pass
+        self._writer = None
+
+    async def __aenter__(self) -> "AsyncStore":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.close()
+
+    async def _submit(self, call: Callable, *args):
+        """Queues a store call and waits for the writer to apply it."""
+        if self._writer is None:
+            raise RuntimeError("AsyncStore is not running; call start() first")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((call, args, future, time.perf_counter()))
+        return await future
+
+    async def _run_writer(self) -> None:
+        """Takes queued calls in batches and applies them one after another."""
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self.max_batch and not queue.empty():
+                batch.append(queue.get_nowait())
+            self._batches += 1
+            for call, args, future, enqueued_at in batch:
+                try:
+                    result = call(*args)
+                except Exception as error:
+                    self._failed += 1
+                    if not future.done():
+                        future.set_exception(error)
+                else:
+                    self._completed += 1
+                    if not future.done():
+                        future.set_result(result)
+                latency = time.perf_counter() - enqueued_at
+                self._latency_total += latency
+                self._latency_max = max(self._latency_max, latency)
+                queue.task_done()
+            # Let callers woken by this batch run before the next one starts.
+            await asyncio.sleep(0)
+
+    async def order(self, shopping_list: List[Tuple[Product, int]]) -> Tuple[float, float]:
+        """Processes an order, returning the total price and total savings."""
+        return await self._submit(self.store.order, list(shopping_list))
+
+    async def get_all_products(self) -> List[Product]:
+        """Retrieves all active products in the store."""
+        return await self._submit(self.store.get_all_products)
+
+    async def get_total_quantity(self) -> int:
+        """Returns the total quantity of all products in the store."""
+        return await self._submit(self.store.get_total_quantity)
+
+    async def add_product(self, product: Product) -> None:
+        """Adds a product to the store."""
+        await self._submit(self.store.add_product, product)
+
+    async def remove_product(self, product: Product) -> None:
+        """Removes a product from the store."""
+        await self._submit(self.store.remove_product, product)
+
+    @property
+    def queue_depth(self) -> int:
+        """Returns the number of calls waiting for the writer."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def stats(self) -> dict:
+        """
+        Returns throughput and latency counters.
+
+        Latency is measured from enqueueing a call to the writer finishing it, so
+        it includes time spent waiting in the queue.
+        """
+        processed = self._completed + self._failed
+        elapsed = time.perf_counter() - self._started_at if self._started_at else 0.0
+        return {
+            "completed": self._completed,
+            "failed": self._failed,
+            "batches": self._batches,
+            "mean_batch_size": processed / self._batches if self._batches else 0.0,
+            "mean_latency_ms": 1000 * self._latency_total / processed if processed else 0.0,
+            "max_latency_ms": 1000 * self._latency_max,
+            "throughput_per_sec": processed / elapsed if elapsed else 0.0,
+            "queue_depth": self.queue_depth,
+        }
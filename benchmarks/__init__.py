@@ -0,0 +1 @@
+"""Benchmarks and stress harnesses. Run each module from the repository root with ``python -m benchmarks.<name>``."""
@@ -0,0 +1,61 @@
+"""
+Overhead benchmark for the instrumentation layer.
+
+Replays the same orders with instrumentation disabled, enabled, and enabled
+with the sampling profiler running, and prints orders/sec for each.
+
+    python -m benchmarks.bench_instrumentation --orders 20000
+"""
+import argparse
+import random
+import time
+
+import instrumentation
+from products import Product
+from promotions import PercentDiscount, SecondHalfPrice, ThirdOneFree
+from store import Store
+
+
+def build_run(orders: int, seed: int):
+    rng = random.Random(seed)
+    promotions = [None, PercentDiscount("30% off!", percent=30),
+                  SecondHalfPrice("Second Half price!"), ThirdOneFree("Third One Free!")]
+    products = []
+    for index in range(2_000):
+        product = Product(f"SKU-{index}", price=5 + index % 700, quantity=10**9)
+        if promotions[index % 4] is not None:
+            product.set_promotion(promotions[index % 4])
+        products.append(product)
+    carts = [[(rng.choice(products), rng.randint(1, 5)) for _ in range(rng.randint(1, 8))]
+             for _ in range(orders)]
+    return Store(products), carts
+
+
+def replay(store: Store, carts) -> float:
+    start = time.perf_counter()
+    for cart in carts:
+        store.order(cart)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    results = {}
+    for label in ("disabled", "enabled", "profiling"):
+        if label != "disabled":
+            instrumentation.enable()
+        if label == "profiling":
+            instrumentation.start_profiler()
+        results[label] = min(replay(*build_run(args.orders, seed=3)) for _ in range(args.repeat))
+        instrumentation.stop_profiler()
+        instrumentation.disable()
+        print(f"{label:<10} orders/sec={args.orders / results[label]:>10,.0f}  "
+              f"overhead={results[label] / results['disabled'] - 1:+.1%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+Memory and attribute-access benchmark for the product classes.
+
+For each catalog size, builds the catalog with the slot-based Product
+hierarchy, with a dict-based replica of the pre-slots Product layout and
+with ColumnarStore, then reports traced bytes per product and the time for
+reading name/price/quantity across the catalog.
+
+    python -m benchmarks.bench_memory --sizes 10000 100000 1000000
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from columnar_store import ColumnarStore
+from products import Product, LimitedProduct
+from promotions import ThirdOneFree
+
+
+class DictProduct:
+    """Replica of the original, dict-backed Product layout, used as the baseline."""
+
+    def __init__(self, name, price, quantity):
+        self._name = name
+        self._price = float(price)
+        self._quantity = int(quantity)
+        self.active = True
+        self.promotion = None
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def price(self):
+        return self._price
+
+    @property
+    def quantity(self):
+        return self._quantity
+
+
+def build_slotted(size):
+    promotion = ThirdOneFree("Third One Free!")
+    products = []
+    for index in range(size):
+        if index % 10 == 0:
+            product = LimitedProduct(f"SKU-{index:07d}", 10 + index % 500, 100, maximum=2)
+        else:
+            product = Product(f"SKU-{index:07d}", 10 + index % 500, 100)
+        if index % 3 == 0:
+            product.set_promotion(promotion)
+        products.append(product)
+    return products
+
+
+def build_dict(size):
+    promotion = ThirdOneFree("Third One Free!")
+    products = []
+    for index in range(size):
+        product = DictProduct(f"SKU-{index:07d}", 10 + index % 500, 100)
+        if index % 3 == 0:
+            product.promotion = promotion
+        products.append(product)
+    return products
+
+
+def build_columnar(size):
+    promotion = ThirdOneFree("Third One Free!")
+    store = ColumnarStore()
+    for index in range(size):
+        store.append_row(f"SKU-{index:07d}", 10 + index % 500, 100,
+                         promotion=promotion if index % 3 == 0 else None)
+    return store
+
+
+def measure(builder, size):
+    """Returns (bytes per product, the built object) for one builder."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    built = builder(size)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / size, built
+
+
+def access_time(products):
+    """Returns nanoseconds per product to read name, price and quantity."""
+    start = time.perf_counter()
+    for product in products:
+        product.name
+        product.price
+        product.quantity
+    return 1e9 * (time.perf_counter() - start) / len(products)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'size':>9} {'layout':<10} {'bytes/product':>14} {'access ns':>10}")
+    for size in args.sizes:
+        for label, builder in (("dict", build_dict), ("slots", build_slotted), ("columnar", build_columnar)):
+            per_product, built = measure(builder, size)
+            products = built.get_all_products() if label == "columnar" else built
+            print(f"{size:>9} {label:<10} {per_product:>14.1f} {access_time(products):>10.1f}")
+            del built, products
+
+
+if __name__ == '__main__':
+    main()
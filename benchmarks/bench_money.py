@@ -0,0 +1,208 @@
+"""
+Money-representation benchmark for line pricing and order totals.
+
+Times the promotion classes' line pricing (apply_promotion_cents(), or
+apply_promotion() in a tree from before prices moved to cents), then
+Store.quote() and Store.order() end to end on a seeded workload, and compares
+every running total with the exact total computed in decimal.Decimal under
+the rounding rules of money.py. The timed code is whatever the checkout
+ships; nothing is copied into this file except the Decimal reference.
+
+Pass --baseline-tree to run the same workload against another checkout,
+e.g. the float implementation before prices moved to cents:
+
+    git worktree add /tmp/float-tree <commit before the cents switch>
+    python -m benchmarks.bench_money --baseline-tree /tmp/float-tree
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from decimal import Decimal, ROUND_HALF_UP
+
+CENT = Decimal("0.01")
+# The promotion given to product index % 4, as a decimal_line() kind.
+_KINDS = (None, 0, 1, 2)
+# Orders timed together by run_store_workload().
+_CHUNK = 250
+
+
+def decimal_line(kind, price: Decimal, quantity: int) -> Decimal:
+    """Prices a line in decimal.Decimal under the rounding rules of money.py; kind indexes _KINDS."""
+    if kind is None:
+        total = price * quantity
+    elif kind == 0:
+        total = price * quantity * Decimal("0.7")
+    elif kind == 1:
+        total = (quantity // 2 + quantity % 2) * price + (quantity // 2) * price / 2
+    else:
+        total = (quantity - quantity // 3) * price
+    return total.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def make_workload(catalog_size: int, orders: int, lines: int, seed: int):
+    """
+    Returns seeded (prices, carts, lines): a cart is a list of (product index, quantity),
+    and lines are (product index, quantity) pairs on promoted products.
+    """
+    rng = random.Random(seed)
+    prices = [round(rng.uniform(0.5, 900), 2) for _ in range(catalog_size)]
+    carts = [[(rng.randrange(catalog_size), rng.randint(1, 5)) for _ in range(rng.randint(1, 8))]
+             for _ in range(orders)]
+    promoted = [index for index in range(catalog_size) if _KINDS[index % 4] is not None]
+    line_list = [(rng.choice(promoted), rng.randint(1, 9)) for _ in range(lines)]
+    return prices, carts, line_list
+
+
+def _best_chunks(best, items, run) -> None:
+    """Times run() over each chunk of items, keeping the best time per chunk in best."""
+    perf_counter = time.perf_counter
+    for number, start in enumerate(range(0, len(items), _CHUNK)):
+        began = perf_counter()
+        run(items[start:start + _CHUNK])
+        best[number] = min(best[number], perf_counter() - began)
+
+
+def run_workload(catalog_size: int, orders: int, lines: int, seed: int, repeat: int) -> dict:
+    """
+    Times line pricing with the promotion classes, then Store.quote() and Store.order(),
+    with whatever store, products and promotions modules are importable, so it runs
+    unchanged on older checkouts.
+
+    Lines are priced with apply_promotion_cents(), or with apply_promotion() where a
+    checkout predates it.
+
+    Returns:
+        dict: The line, quote and order times in seconds, each the sum of the best time
+        of every chunk over the repeats, and the order totals of the last repeat.
+    """
+    from products import Product
+    from promotions import PercentDiscount, SecondHalfPrice, ThirdOneFree
+    from store import Store
+
+    prices, carts, line_list = make_workload(catalog_size, orders, lines, seed)
+    # The best time per chunk, summed: one slow moment costs one chunk, not a whole run.
+    best = {name: [float("inf")] * len(range(0, count, _CHUNK))
+            for name, count in (("lines", len(line_list)), ("quote", len(carts)), ("order", len(carts)))}
+    totals = []
+
+    def price_lines(chunk):
+        for price_line, product, quantity in chunk:
+            price_line(product, quantity)
+
+    def quote(chunk):
+        for shopping_list in chunk:
+            store.quote(shopping_list)
+
+    def order(chunk):
+        for shopping_list in chunk:
+            totals.append(store.order(shopping_list)[0])
+
+    for _ in range(repeat):
+        promotions = [None, PercentDiscount("30% off!", percent=30),
+                      SecondHalfPrice("Second Half price!"), ThirdOneFree("Third One Free!")]
+        products = []
+        for index, price in enumerate(prices):
+            product = Product(f"SKU-{index}", price=price, quantity=10**9)
+            if promotions[index % 4] is not None:
+                product.set_promotion(promotions[index % 4])
+            products.append(product)
+        store = Store(products)
+        calls = []
+        for index, quantity in line_list:
+            promotion = products[index].promotion
+            price_line = getattr(promotion, "apply_promotion_cents", None) or promotion.apply_promotion
+            calls.append((price_line, products[index], quantity))
+        shopping_lists = [[(products[index], quantity) for index, quantity in cart] for cart in carts]
+        totals.clear()
+        _best_chunks(best["lines"], calls, price_lines)
+        _best_chunks(best["quote"], shopping_lists, quote)
+        _best_chunks(best["order"], shopping_lists, order)
+    return dict({name: sum(times) for name, times in best.items()}, totals=totals)
+
+
+def run_in_tree(tree: str, args) -> dict:
+    """Runs run_workload() in a fresh interpreter against the checkout at tree."""
+    command = [sys.executable, os.path.abspath(__file__), "--workload-only",
+               "--catalog-size", str(args.catalog_size), "--orders", str(args.orders),
+               "--lines", str(args.lines), "--seed", str(args.seed), "--repeat", str(args.repeat)]
+    environment = dict(os.environ, PYTHONPATH=os.path.abspath(tree))
+    output = subprocess.run(command, env=environment, cwd=tree, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+def exact_totals(catalog_size: int, orders: int, seed: int) -> Decimal:
+    """Returns the exact sum of the workload's order totals, priced in decimal.Decimal."""
+    prices, carts, _ = make_workload(catalog_size, orders, 0, seed)
+    exact_prices = [Decimal(repr(price)) for price in prices]
+    total = Decimal(0)
+    for cart in carts:
+        merged = {}
+        for index, quantity in cart:
+            merged[index] = merged.get(index, 0) + quantity
+        for index, quantity in merged.items():
+            total += decimal_line(_KINDS[index % 4], exact_prices[index], quantity)
+    return total
+
+
+def report(label: str, result: dict, args, exact: Decimal, cents: bool) -> None:
+    totals = result["totals"]
+    if cents:
+        # Order totals are whole cents; the caller keeps the running total in cents too.
+        running = Decimal(sum(round(total * 100) for total in totals)) / 100
+    else:
+        running = 0.0
+        for total in totals:
+            running += total
+        running = Decimal(repr(running))
+    print(f"{label:<9} lines/sec={args.lines / result['lines']:>11,.0f}  "
+          f"quote orders/sec={args.orders / result['quote']:>9,.0f}  "
+          f"order orders/sec={args.orders / result['order']:>9,.0f}  "
+          f"running total drift=${abs(running - exact)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=200_000)
+    parser.add_argument("--orders", type=int, default=20_000)
+    parser.add_argument("--catalog-size", type=int, default=2_000)
+    parser.add_argument("--seed", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per interpreter")
+    parser.add_argument("--rounds", type=int, default=3, help="Interpreters per checkout, taking turns")
+    parser.add_argument("--baseline-tree", help="Also run the workload against this checkout")
+    parser.add_argument("--workload-only", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.workload_only:
+        print(json.dumps(run_workload(args.catalog_size, args.orders, args.lines, args.seed, args.repeat)))
+        return
+
+    exact = exact_totals(args.catalog_size, args.orders, args.seed)
+    print(f"exact total over {args.orders:,} orders: ${exact:,}")
+    # Every checkout runs in a fresh interpreter, so none gets a warmer process, and the
+    # checkouts take turns, so a slow spell on the machine does not land on one of them.
+    trees = {"cents": os.path.dirname(os.path.dirname(os.path.abspath(__file__)))}
+    if args.baseline_tree:
+        trees["baseline"] = args.baseline_tree
+    results = {}
+    for _ in range(args.rounds):
+        for label, tree in trees.items():
+            result = run_in_tree(tree, args)
+            best = results.setdefault(label, result)
+            for name in ("lines", "quote", "order"):
+                best[name] = min(best[name], result[name])
+    current = results["cents"]
+    report("cents", current, args, exact, cents=True)
+    if args.baseline_tree:
+        baseline = results["baseline"]
+        report("baseline", baseline, args, exact, cents=False)
+        print("cents/baseline time: " + ", ".join(f"{name} {current[name] / baseline[name]:.2f}x"
+                                                  for name in ("lines", "quote", "order")))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Snapshot load and log replay benchmark.
+
+For each catalog size, writes a snapshot and reports the time to load it into
+a ColumnarStore and into an object Store, plus the rate at which logged orders
+are replayed on restart.
+
+    python -m benchmarks.bench_persistence --sizes 10000 100000 1000000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from columnar_store import ColumnarStore, KIND_LIMITED, KIND_PRODUCT
+from persistence import PersistentStore, load_snapshot, save_snapshot
+from promotions import SecondHalfPrice, ThirdOneFree
+
+
+def build_catalog(size: int) -> ColumnarStore:
+    """Creates a columnar catalog with a mix of limited and promoted products."""
+    promotions = [None, SecondHalfPrice("Second Half price!"), ThirdOneFree("Third One Free!")]
+    store = ColumnarStore()
+    for index in range(size):
+        kind = KIND_LIMITED if index % 10 == 0 else KIND_PRODUCT
+        store.append_row(f"SKU-{index:07d}", 10 + index % 500, 1000, kind,
+                         maximum=5, promotion=promotions[index % 3])
+    return store
+
+
+def timed(action):
+    start = time.perf_counter()
+    result = action()
+    return time.perf_counter() - start, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--orders", type=int, default=20_000)
+    args = parser.parse_args()
+
+    print(f"{'size':>9} {'file MB':>8} {'columnar ms':>12} {'objects ms':>11} {'replay orders/s':>16}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, PersistentStore.SNAPSHOT_FILE)
+            save_snapshot(build_catalog(size), path)
+            columnar_seconds, _ = timed(lambda: load_snapshot(path, columnar=True))
+            object_seconds, store = timed(lambda: load_snapshot(path))
+
+            rng = random.Random(size)
+            with PersistentStore(store, directory, 0, group_size=256, fsync=False) as persistent:
+                for _ in range(args.orders):
+                    persistent.order([(store[rng.randrange(size)], 1) for _ in range(3)])
+            replay_seconds, _ = timed(lambda: PersistentStore.open(directory).close())
+            replay_rate = args.orders / max(replay_seconds - object_seconds, 1e-9)
+
+            print(f"{size:>9} {os.path.getsize(path) / 1e6:>8.1f} {1000 * columnar_seconds:>12.1f} "
+                  f"{1000 * object_seconds:>11.1f} {replay_rate:>16,.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Repeat-pricing benchmark for the quote cache.
+
+Simulates a front-end that reprices each cart several times before checkout,
+with small edits between repricings (a quantity bumped, a line added) and an
+occasional price change. The same trace is replayed against a store with the
+cache disabled and with it enabled.
+
+    python -m benchmarks.bench_quote_cache --carts 2000 --repricings 8
+"""
+import argparse
+import random
+import time
+
+from products import Product
+from promotions import PercentDiscount, SecondHalfPrice, ThirdOneFree
+from store import Store
+
+
+def build_products(size: int):
+    promotions = [None, PercentDiscount("30% off!", percent=30),
+                  SecondHalfPrice("Second Half price!"), ThirdOneFree("Third One Free!")]
+    products = []
+    for index in range(size):
+        product = Product(f"SKU-{index}", price=5 + index % 700, quantity=10**6)
+        if promotions[index % 4] is not None:
+            product.set_promotion(promotions[index % 4])
+        products.append(product)
+    return products
+
+
+def build_trace(products, carts: int, repricings: int, seed: int):
+    """Returns a list of ("quote", cart) and ("price", product, price) events."""
+    rng = random.Random(seed)
+    hot = products[:max(1, len(products) // 20)]
+    events = []
+    for _ in range(carts):
+        cart = [(rng.choice(hot if rng.random() < 0.8 else products), rng.randint(1, 4))
+                for _ in range(rng.randint(3, 12))]
+        for _ in range(repricings):
+            events.append(("quote", list(cart)))
+            edit = rng.random()
+            if edit < 0.3:
+                position = rng.randrange(len(cart))
+                cart[position] = (cart[position][0], cart[position][1] + 1)
+            elif edit < 0.5:
+                cart.append((rng.choice(hot), 1))
+        if rng.random() < 0.05:
+            product = rng.choice(hot)
+            events.append(("price", product, product.price + 1))
+    return events
+
+
+def replay(store: Store, events) -> float:
+    start = time.perf_counter()
+    for event in events:
+        if event[0] == "quote":
+            store.quote(event[1])
+        else:
+            event[1].price = event[2]
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--catalog-size", type=int, default=20_000)
+    parser.add_argument("--carts", type=int, default=2_000)
+    parser.add_argument("--repricings", type=int, default=8)
+    parser.add_argument("--cache-size", type=int, default=4096)
+    args = parser.parse_args()
+
+    results = {}
+    for label, cache_size in (("uncached", 0), ("cached", args.cache_size)):
+        products = build_products(args.catalog_size)
+        store = Store(products, quote_cache_size=cache_size)
+        events = build_trace(products, args.carts, args.repricings, seed=3)
+        quotes = sum(1 for event in events if event[0] == "quote")
+        results[label] = replay(store, events)
+        print(f"{label:<9} quotes/sec={quotes / results[label]:>10,.0f}  {store.quote_cache_stats()}")
+    print(f"speedup: {results['uncached'] / results['cached']:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
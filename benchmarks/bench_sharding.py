@@ -0,0 +1,62 @@
+"""
+Orders-per-second benchmark for ShardedStore.
+
+Builds one catalog, then for each worker count sends the same order trace in
+batches through ShardedStore.order_many() and reports throughput. A share of
+the carts (``--multi-line``) holds several SKUs, which usually span shards and
+go through two-phase commit; the rest are single-SKU carts that shards work
+on in parallel.
+
+    python -m benchmarks.bench_sharding --workers 1 2 4 --orders 50000
+"""
+import argparse
+import random
+import time
+
+from products import Product
+from promotions import SecondHalfPrice
+from sharded_store import ShardedStore
+
+
+def build_products(size: int):
+    promotion = SecondHalfPrice("Second Half price!")
+    products = []
+    for index in range(size):
+        product = Product(f"SKU-{index}", price=10 + index % 100, quantity=10**9)
+        if index % 2:
+            product.set_promotion(promotion)
+        products.append(product)
+    return products
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--orders", type=int, default=50_000)
+    parser.add_argument("--catalog-size", type=int, default=10_000)
+    parser.add_argument("--batch", type=int, default=2_000)
+    parser.add_argument("--multi-line", type=float, default=0.1,
+                        help="share of carts with several SKUs")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    names = [f"SKU-{index}" for index in range(args.catalog_size)]
+    trace = []
+    for _ in range(args.orders):
+        lines = rng.randint(2, 4) if rng.random() < args.multi_line else 1
+        trace.append([(rng.choice(names), rng.randint(1, 3)) for _ in range(lines)])
+
+    baseline = None
+    for workers in args.workers:
+        with ShardedStore(build_products(args.catalog_size), workers=workers) as sharded:
+            start = time.perf_counter()
+            for offset in range(0, len(trace), args.batch):
+                sharded.order_many(trace[offset:offset + args.batch])
+            elapsed = time.perf_counter() - start
+        rate = args.orders / elapsed
+        baseline = baseline or rate
+        print(f"workers={workers:<3} orders/sec={rate:>10,.0f} speedup={rate / baseline:4.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Startup benchmark: how long until a Store-based program can serve its first request.
+
+For each catalog size, times three ways of getting the catalog into a Store
+in-process: constructing the products and promotions in Python (what
+main.py does for its demo catalog), loading a snapshot, and loading a
+catalog image. It then starts ``main.py --catalog <image>`` in a fresh
+interpreter and times how long it takes to print its first menu prompt.
+
+    python -m benchmarks.bench_startup --sizes 1000 100000 1000000
+"""
+import argparse
+import gc
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.generators import generate_catalog
+from persistence import load_image, load_snapshot, save_image, save_snapshot
+from products import LimitedProduct, NonStockedProduct, Product
+from store import Store
+
+MAIN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+PROMPT = b"Please choose a number: "
+
+
+def catalog_rows(products):
+    """Flattens a catalog into the plain values a program would construct it from."""
+    return [(type(product), product.name, product.price, product.quantity,
+             getattr(product, "maximum", 0), product.promotion) for product in products]
+
+
+def build_store(rows) -> Store:
+    """Constructs the products and promotion links in Python, as main.default_products() does."""
+    products = []
+    for kind, name, price, quantity, maximum, promotion in rows:
+        if kind is NonStockedProduct:
+            product = NonStockedProduct(name, price)
+        elif kind is LimitedProduct:
+            product = LimitedProduct(name, price, quantity, maximum)
+        else:
+            product = Product(name, price, quantity)
+        if promotion is not None:
+            product.set_promotion(promotion)
+        products.append(product)
+    return Store(products)
+
+
+def best_of(repeat: int, action) -> float:
+    """Returns the fastest of several timed runs, freeing each result before the next."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = action()
+        timings.append(time.perf_counter() - start)
+        del result
+        gc.collect()
+    return min(timings)
+
+
+def time_to_first_menu(image_path: str) -> float:
+    """Starts main.py on a catalog image and returns the seconds until its first prompt."""
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, MAIN, "--catalog", image_path],
+                               stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    output = b""
+    while not output.endswith(PROMPT):
+        chunk = os.read(process.stdout.fileno(), 4096)
+        if not chunk:
+            raise RuntimeError("main.py exited before showing its menu")
+        output += chunk
+    elapsed = time.perf_counter() - start
+    process.communicate(b"4\n")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'products':>10} {'construct':>10} {'snapshot':>10} {'image':>10} {'first menu':>11}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            rows = catalog_rows(generate_catalog(size, seed=size))
+            store = build_store(rows)
+            snapshot_path = os.path.join(directory, f"catalog-{size}.snap")
+            image_path = os.path.join(directory, f"catalog-{size}.img")
+            save_snapshot(store, snapshot_path)
+            save_image(store, image_path)
+            del store
+            gc.collect()
+
+            construct = best_of(args.repeat, lambda: build_store(rows))
+            snapshot = best_of(args.repeat, lambda: load_snapshot(snapshot_path))
+            image = best_of(args.repeat, lambda: load_image(image_path))
+            first_menu = min(time_to_first_menu(image_path) for _ in range(args.repeat))
+            print(f"{size:>10,} {construct:>9.3f}s {snapshot:>9.3f}s {image:>9.3f}s {first_menu:>10.3f}s")
+
+
+if __name__ == '__main__':
+    main()
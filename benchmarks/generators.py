@@ -0,0 +1,113 @@
+"""
+Seeded generators for synthetic catalogs and order traces.
+
+The same arguments always produce the same catalog and trace, so benchmark
+runs on different commits measure the same work.
+"""
+import bisect
+import itertools
+import random
+from typing import List, Optional, Sequence, Tuple
+
+from products import Product, NonStockedProduct, LimitedProduct
+from promotions import PercentDiscount, SecondHalfPrice, ThirdOneFree
+
+
+def standard_promotions() -> list:
+    """Returns the promotions attached by generate_catalog()."""
+    return [PercentDiscount("30% off!", percent=30),
+            PercentDiscount("12.5% off!", percent=12.5),
+            SecondHalfPrice("Second Half price!"),
+            ThirdOneFree("Third One Free!")]
+
+
+def generate_catalog(size: int, seed: int = 0, mix: Tuple[float, float, float] = (0.8, 0.1, 0.1),
+                     promotion_rate: float = 0.4, stock: Tuple[int, int] = (50, 5_000),
+                     promotions: Optional[Sequence] = None) -> List[Product]:
+    """
+    Creates a catalog of uniquely named products.
+
+    Args:
+        size (int): The number of products.
+        seed (int): The random seed.
+        mix (Tuple[float, float, float]): Relative weights of Product, NonStockedProduct
+            and LimitedProduct.
+        promotion_rate (float): The share of products that get a promotion.
+        stock (Tuple[int, int]): The range of initial stock for stocked products.
+        promotions (Optional[Sequence[Promotion]]): The promotions to draw from;
+            standard_promotions() by default.
+
+    Returns:
+        List[Product]: Products named SKU-0000000, SKU-0000001, ...
+    """
+    if size < 0 or not 0 <= promotion_rate <= 1:
+        raise ValueError("Size cannot be negative and the promotion rate must be between 0 and 1")
+    rng = random.Random(seed)
+    promotions = list(promotions) if promotions is not None else standard_promotions()
+    kinds = rng.choices((Product, NonStockedProduct, LimitedProduct), weights=mix, k=size)
+    catalog = []
+    for index, kind in enumerate(kinds):
+        name = f"SKU-{index:07d}"
+        # Log-normal prices cluster around $20-$100 with a long tail of expensive items.
+        price = round(min(rng.lognormvariate(3.5, 1.2), 5_000.0), 2)
+        if kind is NonStockedProduct:
+            product = NonStockedProduct(name, price)
+        elif kind is LimitedProduct:
+            product = LimitedProduct(name, price, rng.randint(*stock), maximum=rng.randint(1, 3))
+        else:
+            product = Product(name, price, rng.randint(*stock))
+        if promotions and rng.random() < promotion_rate:
+            product.set_promotion(rng.choice(promotions))
+        catalog.append(product)
+    return catalog
+
+
+def zipf_weights(count: int, skew: float) -> List[float]:
+    """Returns cumulative Zipf weights 1/rank**skew for ranks 1..count; skew 0 is uniform."""
+    return list(itertools.accumulate(1 / rank ** skew for rank in range(1, count + 1)))
+
+
+def generate_orders(products: Sequence[Product], count: int, seed: int = 0, skew: float = 1.1,
+                    mean_cart_size: float = 3.0, max_cart_size: int = 20,
+                    max_quantity: int = 3) -> List[List[Tuple[Product, int]]]:
+    """
+    Creates an order trace with hot SKUs and a realistic spread of cart sizes.
+
+    Product popularity follows a Zipf distribution over a seeded shuffle of the
+    catalog, so a few SKUs appear in most carts. Cart sizes follow a geometric
+    distribution with the given mean, capped at max_cart_size. Limited products
+    are always ordered one at a time.
+
+    Args:
+        products (Sequence[Product]): The catalog to draw from.
+        count (int): The number of orders.
+        seed (int): The random seed.
+        skew (float): The Zipf exponent; 0 is uniform, higher is more concentrated.
+        mean_cart_size (float): The mean number of lines per cart (at least 1).
+        max_cart_size (int): The most lines per cart.
+        max_quantity (int): The largest quantity per line.
+
+    Returns:
+        List[List[Tuple[Product, int]]]: The carts, as shopping lists.
+    """
+    if not products or count < 0 or mean_cart_size < 1 or max_cart_size < 1 or max_quantity < 1:
+        raise ValueError("Need products, a non-negative count and cart sizes and quantities of at least 1")
+    rng = random.Random(seed)
+    ranked = list(products)
+    rng.shuffle(ranked)
+    cumulative = zipf_weights(len(ranked), skew)
+    total = cumulative[-1]
+    # P(size = k) = (1 - p)**(k - 1) * p has mean 1/p.
+    stop = 1 / mean_cart_size
+    orders = []
+    for _ in range(count):
+        size = 1
+        while size < max_cart_size and rng.random() >= stop:
+            size += 1
+        cart = []
+        for _ in range(size):
+            product = ranked[bisect.bisect_left(cumulative, rng.random() * total)]
+            quantity = 1 if isinstance(product, LimitedProduct) else rng.randint(1, max_quantity)
+            cart.append((product, quantity))
+        orders.append(cart)
+    return orders
@@ -0,0 +1,136 @@
+"""
+Load generator for the order service: sustained requests/sec with many clients.
+
+Builds a synthetic catalog image with ample stock, starts ``order_service.py``
+on it in a separate process, then runs client threads that each keep one
+connection open and send pipelined bursts of orders and quotes for the given
+duration. Reports the request rate and per-burst latency percentiles for
+each pipeline depth, so the effect of pipelining is visible side by side.
+
+    python -m benchmarks.load_order_service --products 10000 --clients 32 --depth 1 16 64
+"""
+import argparse
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.generators import generate_catalog
+from order_client import OrderClient
+from persistence import save_image
+from products import NonStockedProduct
+from store import Store
+
+SERVICE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "order_service.py")
+
+
+def start_service(image_path: str, unix_path: str = None):
+    """Starts the service on a catalog image and returns (process, address)."""
+    command = [sys.executable, SERVICE, "--catalog", image_path]
+    command += ["--unix", unix_path] if unix_path else ["--port", "0"]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if not line:
+        raise RuntimeError("order_service.py exited before it started serving")
+    address = line.rsplit(" on ", 1)[1].strip()
+    if unix_path:
+        return process, address
+    host, port = address.rsplit(":", 1)
+    return process, (host, int(port))
+
+
+def percentile(ordered, q: float) -> float:
+    """Returns a percentile (nearest rank) of sorted values."""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+
+def run_load(address, names, clients: int, depth: int, duration: float, quote_share: float, seed: int):
+    """Runs the client threads and returns (requests, failures, elapsed, sorted burst latencies)."""
+    counts, latencies, errors = [], [], []
+    lock = threading.Lock()
+    ready = threading.Barrier(clients + 1)
+
+    def worker(number: int) -> None:
+        rng = random.Random(seed * 1000 + number)
+        requests = failed = 0
+        timings = []
+        try:
+            with OrderClient(address) as client:
+                ready.wait()
+                deadline = time.perf_counter() + duration
+                while time.perf_counter() < deadline:
+                    burst = [{"op": "quote" if rng.random() < quote_share else "order",
+                              "lines": [[rng.choice(names), 1] for _ in range(rng.randint(1, 3))]}
+                             for _ in range(depth)]
+                    began = time.perf_counter()
+                    responses = client.pipeline(burst)
+                    timings.append(time.perf_counter() - began)
+                    requests += len(responses)
+                    failed += sum(not response["ok"] for response in responses)
+        except Exception as error:
+            errors.append(error)
+            if not ready.broken:
+                ready.abort()
+        with lock:
+            counts.append((requests, failed))
+            latencies.extend(timings)
+
+    threads = [threading.Thread(target=worker, args=(number,)) for number in range(clients)]
+    for thread in threads:
+        thread.start()
+    try:
+        ready.wait()
+    except threading.BrokenBarrierError:
+        pass
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    if errors:
+        raise RuntimeError(f"A client failed: {errors[0]!r}")
+    return sum(count[0] for count in counts), sum(count[1] for count in counts), elapsed, sorted(latencies)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--depth", type=int, nargs="+", default=[1, 16, 64],
+                        help="Requests each client sends before reading the responses")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per pipeline depth")
+    parser.add_argument("--quote-share", type=float, default=0.5, help="Share of requests that are quotes")
+    parser.add_argument("--unix", action="store_true", help="Use a Unix socket instead of localhost TCP")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # Enough stock that orders keep succeeding for the whole run.
+    products = generate_catalog(args.products, seed=args.seed, stock=(10_000_000, 20_000_000))
+    names = [product.name for product in products
+             if isinstance(product, NonStockedProduct) or getattr(product, "maximum", 0) == 0]
+    with tempfile.TemporaryDirectory() as directory:
+        image_path = os.path.join(directory, "catalog.img")
+        save_image(Store(products), image_path)
+        unix_path = os.path.join(directory, "orders.sock") if args.unix else None
+        process, address = start_service(image_path, unix_path)
+        try:
+            print(f"{args.products:,} products, {args.clients} clients, {args.duration:g}s per run, "
+                  f"{'unix socket' if args.unix else 'localhost tcp'}")
+            print(f"{'depth':>6} {'requests':>10} {'failed':>8} {'req/s':>10} {'p50 burst':>10} {'p99 burst':>10}")
+            for depth in args.depth:
+                requests, failed, elapsed, latencies = run_load(address, names, args.clients, depth,
+                                                                args.duration, args.quote_share, args.seed)
+                print(f"{depth:>6} {requests:>10,} {failed:>8,} {requests / elapsed:>10,.0f} "
+                      f"{percentile(latencies, 0.5) * 1000:>8.2f}ms {percentile(latencies, 0.99) * 1000:>8.2f}ms")
+        finally:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == '__main__':
+    main()
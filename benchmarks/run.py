@@ -0,0 +1,233 @@
+"""
+Reproducible benchmark suite for Store and the promotions.
+
+Builds seeded catalogs and order traces (see benchmarks/generators.py),
+times the core Store operations and listing pages, and writes the results
+as JSON. Given a baseline file from an earlier run, it prints the change
+per benchmark and exits with status 1 if any benchmark got slower than the
+threshold allows.
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --baseline results.json --threshold 0.10
+    python -m benchmarks.run --quick --only order,str
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from benchmarks.generators import generate_catalog, generate_orders
+from store import Store
+from store_view import StoreView
+
+# Sizes for a full run and for --quick.
+SIZES = {
+    "full": {"catalog": 20_000, "orders": 20_000, "calls": 200},
+    "quick": {"catalog": 2_000, "orders": 2_000, "calls": 20},
+}
+
+
+def bench_order(config: dict) -> Tuple[Callable[[], None], int]:
+    """Replays a skewed order trace against a fresh store."""
+    catalog = generate_catalog(config["catalog"], seed=config["seed"])
+    trace = generate_orders(catalog, config["orders"], seed=config["seed"], skew=config["skew"])
+    store = Store(catalog)
+
+    def run():
+        for cart in trace:
+            try:
+                store.order(cart)
+            except ValueError:
+                pass
+    return run, len(trace)
+
+
+def bench_get_all_products(config: dict) -> Tuple[Callable[[], None], int]:
+    """Lists the active products repeatedly."""
+    store = Store(generate_catalog(config["catalog"], seed=config["seed"]))
+
+    def run():
+        for _ in range(config["calls"]):
+            store.get_all_products()
+    return run, config["calls"]
+
+
+def bench_get_total_quantity(config: dict) -> Tuple[Callable[[], None], int]:
+    """Reads the total stock repeatedly."""
+    store = Store(generate_catalog(config["catalog"], seed=config["seed"]))
+    calls = config["calls"] * 1000
+
+    def run():
+        for _ in range(calls):
+            store.get_total_quantity()
+    return run, calls
+
+
+def bench_str(config: dict) -> Tuple[Callable[[], None], int]:
+    """Renders the whole store as text."""
+    store = Store(generate_catalog(config["catalog"], seed=config["seed"]))
+    calls = max(1, config["calls"] // 20)
+
+    def run():
+        for _ in range(calls):
+            str(store)
+    return run, calls
+
+
+def bench_page(config: dict) -> Tuple[Callable[[], None], int]:
+    """Renders pages of the listing while orders change a few products in between."""
+    catalog = generate_catalog(config["catalog"], seed=config["seed"])
+    trace = generate_orders(catalog, config["calls"], seed=config["seed"], skew=config["skew"])
+    store = Store(catalog)
+    pages = max(1, len(catalog) // 20)
+
+    def run():
+        for index, cart in enumerate(trace):
+            try:
+                store.order(cart)
+            except ValueError:
+                pass
+            store.page(index % pages + 1, size=20)
+    return run, len(trace)
+
+
+def bench_add(config: dict) -> Tuple[Callable[[], None], int]:
+    """Merges two stores of half the catalog each."""
+    catalog = generate_catalog(config["catalog"], seed=config["seed"])
+    half = len(catalog) // 2
+    first, second = Store(catalog[:half]), Store(catalog[half:])
+    calls = max(1, config["calls"] // 20)
+
+    def run():
+        for _ in range(calls):
+            first + second
+    return run, calls
+
+
+def bench_view(config: dict) -> Tuple[Callable[[], None], int]:
+    """Federates two stores of half the catalog each with a StoreView and reads it."""
+    catalog = generate_catalog(config["catalog"], seed=config["seed"])
+    half = len(catalog) // 2
+    first, second = Store(catalog[:half]), Store(catalog[half:])
+    calls = max(1, config["calls"] // 20)
+
+    def run():
+        for _ in range(calls):
+            view = StoreView(first, second)
+            len(view)
+            view.get_total_quantity()
+    return run, calls
+
+
+BENCHMARKS: Dict[str, Callable[[dict], Tuple[Callable[[], None], int]]] = {
+    "order": bench_order,
+    "get_all_products": bench_get_all_products,
+    "get_total_quantity": bench_get_total_quantity,
+    "str": bench_str,
+    "page": bench_page,
+    "add": bench_add,
+    "view": bench_view,
+}
+
+
+def run_benchmark(setup: Callable[[dict], Tuple[Callable[[], None], int]], config: dict,
+                  repeat: int) -> dict:
+    """
+    Times one benchmark; each repetition gets a fresh setup that is not timed.
+
+    Returns:
+        dict: Operations per run, best and median seconds per run, and operations per
+        second at the best run.
+    """
+    timings = []
+    for _ in range(repeat):
+        run, operations = setup(config)
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    return {
+        "operations": operations,
+        "best_seconds": best,
+        "median_seconds": statistics.median(timings),
+        "ops_per_sec": operations / best if best else float("inf"),
+    }
+
+
+def run_suite(names: List[str], config: dict, repeat: int) -> dict:
+    """Runs the named benchmarks and returns the JSON-ready report."""
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        raise ValueError(f"Unknown benchmarks: {', '.join(unknown)}")
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "config": config,
+            "repeat": repeat,
+        },
+        "results": {name: run_benchmark(BENCHMARKS[name], config, repeat) for name in names},
+    }
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> List[Tuple[str, float, bool]]:
+    """
+    Compares a report against a baseline by best time per operation.
+
+    Returns:
+        List[Tuple[str, float, bool]]: (benchmark, relative change in time, whether it
+        regressed by more than threshold) for benchmarks present in both.
+    """
+    rows = []
+    for name, result in report["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            continue
+        before = previous["best_seconds"] / previous["operations"]
+        after = result["best_seconds"] / result["operations"]
+        change = after / before - 1 if before else 0.0
+        rows.append((name, change, change > threshold))
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", help="Comma-separated benchmarks to run: " + ", ".join(BENCHMARKS))
+    parser.add_argument("--quick", action="store_true", help="Use small sizes, e.g. for CI smoke runs")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent of SKU popularity")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Write the JSON report here")
+    parser.add_argument("--baseline", help="A JSON report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Fail if a benchmark is this much slower than the baseline")
+    args = parser.parse_args(argv)
+
+    config = dict(SIZES["quick" if args.quick else "full"], seed=args.seed, skew=args.skew)
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    report = run_suite(names, config, args.repeat)
+    for name, result in report["results"].items():
+        print(f"{name:<20} {result['ops_per_sec']:>14,.0f} ops/sec  (best {result['best_seconds'] * 1000:.1f} ms)")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump(report, output, indent=2)
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline, encoding="utf-8") as baseline_file:
+        baseline = json.load(baseline_file)
+    if baseline.get("meta", {}).get("config") != config:
+        print("warning: baseline was recorded with a different configuration", file=sys.stderr)
+    regressed = False
+    for name, change, is_regression in compare(report, baseline, args.threshold):
+        regressed = regressed or is_regression
+        print(f"{name:<20} {change:+7.1%} {'REGRESSION' if is_regression else ''}")
+    return 1 if regressed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""
+Stress harness for ConcurrentOrderEngine.
+
+Hammers a small, heavily contended catalog from a growing number of threads,
+reports orders per second for each thread count and checks that no product
+was oversold.
+
+The primary figures are for plain, CPU-bound orders. Under the GIL these do
+not get faster with more threads (expect a speedup at or below 1x): the
+engine's striped locks make concurrent orders safe, not parallel. Pass
+``--work-ms`` to also run a second round in which every order first sleeps
+that long outside the product locks. The sleep simulates I/O such as a
+payment call, which releases the GIL, and that round shows how much of such
+waiting extra threads can overlap. It is not a measure of the engine's own
+throughput.
+
+    python -m benchmarks.stress_order_engine --orders 20000 --threads 1 2 4 8
+    python -m benchmarks.stress_order_engine --threads 1 2 4 8 --work-ms 1
+"""
+import argparse
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from order_engine import ConcurrentOrderEngine
+from products import Product, LimitedProduct
+from store import Store
+
+
+def build_catalog(size: int, stock: int) -> Store:
+    """Creates a store with size products, every tenth one purchase-limited."""
+    products = []
+    for index in range(size):
+        if index % 10 == 0:
+            products.append(LimitedProduct(f"SKU-{index}", price=10 + index, quantity=stock, maximum=2))
+        else:
+            products.append(Product(f"SKU-{index}", price=10 + index, quantity=stock))
+    return Store(products)
+
+
+def run(threads: int, orders: int, catalog_size: int, stock: int, work_ms: float, seed: int) -> dict:
+    """Runs one stress round and returns throughput and oversell figures."""
+    store = build_catalog(catalog_size, stock)
+    products = list(store.product_list)
+    rng = random.Random(seed)
+    carts = [[(rng.choice(products), rng.randint(1, 2)) for _ in range(rng.randint(1, 5))]
+             for _ in range(orders)]
+    succeeded = failed = units_ordered = 0
+    counter_lock = threading.Lock()
+
+    def place(engine, cart):
+        nonlocal succeeded, failed, units_ordered
+        if work_ms:
+            time.sleep(work_ms / 1000)
+        try:
+            engine.order(cart)
+            outcome = True
+        except ValueError:
+            outcome = False
+        with counter_lock:
+            if outcome:
+                succeeded += 1
+                units_ordered += sum(quantity for _, quantity in cart)
+            else:
+                failed += 1
+
+    start = time.perf_counter()
+    engine = ConcurrentOrderEngine(store)
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        for future in [pool.submit(place, engine, cart) for cart in carts]:
+            future.result()
+    engine.shutdown()
+    elapsed = time.perf_counter() - start
+
+    sold = catalog_size * stock - store.get_total_quantity()
+    # Every unit that left the shelves must belong to an accepted order, and no
+    # shelf may go below zero; a lost update or oversell breaks one of the two.
+    oversold = [product.name for product in products if product.quantity < 0]
+    if sold != units_ordered:
+        oversold.append(f"{sold} units left stock but {units_ordered} were ordered")
+    return {
+        "threads": threads,
+        "orders_per_sec": orders / elapsed,
+        "succeeded": succeeded,
+        "failed": failed,
+        "units_sold": sold,
+        "oversold": oversold,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=20000)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--catalog-size", type=int, default=50)
+    parser.add_argument("--stock", type=int, default=500)
+    parser.add_argument("--work-ms", type=float, default=0.0,
+                        help="Also run a round with this much simulated I/O (a sleep) per order")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rounds = [(0.0, "CPU-bound orders (engine throughput)")]
+    if args.work_ms:
+        rounds.append((args.work_ms, f"orders with {args.work_ms:g} ms of simulated I/O each "
+                                     f"(a sleep outside the GIL, not engine work)"))
+    for work_ms, title in rounds:
+        print(title)
+        baseline = None
+        for threads in args.threads:
+            result = run(threads, args.orders, args.catalog_size, args.stock, work_ms, args.seed)
+            baseline = baseline or result["orders_per_sec"]
+            print(f"  threads={threads:<3} orders/sec={result['orders_per_sec']:>10,.0f} "
+                  f"speedup={result['orders_per_sec'] / baseline:4.2f}x "
+                  f"ok={result['succeeded']} rejected={result['failed']} "
+                  f"sold={result['units_sold']} oversold={len(result['oversold'])}")
+            if result["oversold"]:
+                raise SystemExit(f"Oversold products: {result['oversold']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,305 @@
+"""
+Secondary indexes over a Store's catalog: price order, name prefixes and promotions.
+
+A CatalogIndex is created by Store.index on first use and then kept current
+by the store: products added or removed, price changes and set_promotion()
+calls each update it in place. Activation is read live from the store, so
+activating or deactivating a product costs the index nothing.
+
+    index = best_buy.index
+    index.search(max_price=499.99, promotion=True)       # active, under $500, promoted
+    index.with_prefix("mac", limit=10)                   # autocomplete
+    index.cheapest(5)
+"""
+import bisect
+import heapq
+from itertools import count, islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from money import to_cents
+from products import Product
+
+# The name trie is a burst trie: a leaf holds up to _BURST_SIZE names in a bucket
+# and splits into an inner node, keyed by the next character, when it outgrows it.
+# Besides its children, an inner node holds the products whose name ends there.
+_BUCKET = None
+_HERE = ""
+_BURST_SIZE = 32
+
+
+class CatalogIndex:
+    """
+    A sorted price index, a name prefix trie and a promotion map for one store.
+
+    Price order is the order of Product.__lt__ (price in cents), with ties in
+    catalog order, so the cheapest products are exactly sorted(products)[:k].
+    Names are matched case-insensitively. Queries return active products by
+    default; pass active=False for inactive ones or active=None for all.
+    """
+
+    def __init__(self, store, products: Iterable[Product] = ()):
+        """
+        Builds the indexes.
+
+        Args:
+            store (Store): The store whose active set the queries read.
+            products (Iterable[Product]): The products to index, in catalog order.
+        """
+        self._store = store
+        self._sequence = count()
+        self._products: Dict[int, Product] = {}
+        self._price_keys: Dict[int, Tuple[int, int, int]] = {}
+        # (price in cents, catalog sequence, id of the product), sorted
+        self._by_price: List[Tuple[int, int, int]] = []
+        self._trie: dict = {_BUCKET: {}}
+        self._promotion_of: Dict[int, object] = {}
+        self._by_promotion: Dict[int, Dict[int, Product]] = {}
+        for product in products:
+            key = id(product)
+            self._products[key] = product
+            self._price_keys[key] = (product.price_cents, next(self._sequence), key)
+            self._add_name(product)
+            self._add_promotion(product)
+        self._by_price = sorted(self._price_keys.values())
+
+    def add(self, product: Product) -> None:
+        """Indexes a product newly added to the store."""
+        key = id(product)
+        if key in self._products:
+            return
+        self._products[key] = product
+        price_key = self._price_keys[key] = (product.price_cents, next(self._sequence), key)
+        bisect.insort(self._by_price, price_key)
+        self._add_name(product)
+        self._add_promotion(product)
+
+    def remove(self, product: Product) -> None:
+        """Drops a product removed from the store."""
+        key = id(product)
+        if self._products.pop(key, None) is None:
+            return
+        self._remove_price(key)
+        del self._price_keys[key]
+        self._remove_name(product)
+        self._remove_promotion(key)
+
+    def on_product_changed(self, product: Product, attribute: str) -> None:
+        """Re-indexes a product after its price or promotion changed."""
+        key = id(product)
+        if key not in self._products:
+            return
+        if attribute == "price":
+            self._remove_price(key)
+            _, sequence, _ = self._price_keys[key]
+            price_key = self._price_keys[key] = (product.price_cents, sequence, key)
+            bisect.insort(self._by_price, price_key)
+        elif attribute == "promotion":
+            self._remove_promotion(key)
+            self._add_promotion(product)
+
+    def _remove_price(self, key: int) -> None:
+        """Removes a product's entry from the price-sorted list in O(log n) comparisons."""
+        price_key = self._price_keys[key]
+        position = bisect.bisect_left(self._by_price, price_key)
+        del self._by_price[position]
+
+    def _add_name(self, product: Product) -> None:
+        name = product.name.casefold()
+        node, depth = self._trie, 0
+        while _BUCKET not in node:
+            if depth == len(name):
+                node.setdefault(_HERE, {})[id(product)] = product
+                return
+            child = node.get(name[depth])
+            if child is None:
+                child = node[name[depth]] = {_BUCKET: {}}
+            node, depth = child, depth + 1
+        bucket = node[_BUCKET]
+        bucket[id(product)] = (name, product)
+        if len(bucket) > _BURST_SIZE:
+            self._burst(node, depth)
+
+    def _burst(self, node: dict, depth: int) -> None:
+        """Turns a full leaf into an inner node whose children are leaves one character deeper."""
+        for key, (name, product) in node.pop(_BUCKET).items():
+            if depth == len(name):
+                node.setdefault(_HERE, {})[key] = product
+            else:
+                node.setdefault(name[depth], {_BUCKET: {}})[_BUCKET][key] = (name, product)
+        for character, child in list(node.items()):
+            if character and len(child[_BUCKET]) > _BURST_SIZE:
+                self._burst(child, depth + 1)
+
+    def _remove_name(self, product: Product) -> None:
+        """Removes a product from the trie and prunes branches left empty."""
+        name = product.name.casefold()
+        path = [self._trie]
+        while _BUCKET not in path[-1] and len(path) <= len(name):
+            path.append(path[-1][name[len(path) - 1]])
+        node = path[-1]
+        if _BUCKET in node:
+            del node[_BUCKET][id(product)]
+            empty = not node[_BUCKET]
+        else:
+            del node[_HERE][id(product)]
+            if not node[_HERE]:
+                del node[_HERE]
+            empty = not node
+        depth = len(path) - 1
+        while empty and depth > 0:
+            parent = path[depth - 1]
+            del parent[name[depth - 1]]
+            depth -= 1
+            empty = not parent
+
+    def _add_promotion(self, product: Product) -> None:
+        promotion = product.promotion
+        if promotion is not None:
+            self._promotion_of[id(product)] = promotion
+            self._by_promotion.setdefault(id(promotion), {})[id(product)] = product
+
+    def _remove_promotion(self, key: int) -> None:
+        promotion = self._promotion_of.pop(key, None)
+        if promotion is not None:
+            members = self._by_promotion[id(promotion)]
+            del members[key]
+            if not members:
+                del self._by_promotion[id(promotion)]
+
+    def _matches_active(self, product: Product, active: Optional[bool]) -> bool:
+        return active is None or self._store.is_available(product) == active
+
+    def _in_price_order(self, keys: Iterable[Tuple[int, int, int]], active: Optional[bool]) -> Iterator[Product]:
+        products = self._products
+        for _, _, key in keys:
+            product = products[key]
+            if self._matches_active(product, active):
+                yield product
+
+    def cheapest(self, count: int, active: Optional[bool] = True) -> List[Product]:
+        """Returns up to count products, cheapest first, without sorting the catalog."""
+        return list(islice(self._in_price_order(self._by_price, active), count))
+
+    def most_expensive(self, count: int, active: Optional[bool] = True) -> List[Product]:
+        """Returns up to count products, most expensive first, without sorting the catalog."""
+        return list(islice(self._in_price_order(reversed(self._by_price), active), count))
+
+    @staticmethod
+    def _bound(value: Union[float, Product, None]) -> Optional[int]:
+        """Converts a price bound, in dollars or as a product, to cents."""
+        if value is None:
+            return None
+        return value.price_cents if isinstance(value, Product) else to_cents(value)
+
+    def price_range(self, low: Union[float, Product, None] = None, high: Union[float, Product, None] = None,
+                    active: Optional[bool] = True) -> Iterator[Product]:
+        """
+        Yields the products priced from low to high, inclusive, cheapest first.
+
+        Args:
+            low, high (Union[float, Product, None]): Dollar amounts or products whose price is
+                the bound; None leaves that end open.
+            active (Optional[bool]): As for the other queries.
+        """
+        low, high = self._bound(low), self._bound(high)
+        start = 0 if low is None else bisect.bisect_left(self._by_price, (low,))
+        stop = len(self._by_price) if high is None else bisect.bisect_left(self._by_price, (high + 1,))
+        by_price = self._by_price
+        return self._in_price_order((by_price[position] for position in range(start, stop)), active)
+
+    def _iter_prefix(self, prefix: str) -> Iterator[Product]:
+        """Yields the products whose names start with prefix, in case-folded name order."""
+        prefix = prefix.casefold()
+        node, depth = self._trie, 0
+        while _BUCKET not in node and depth < len(prefix):
+            node = node.get(prefix[depth])
+            if node is None:
+                return
+            depth += 1
+        price_keys = self._price_keys
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            bucket = node.get(_BUCKET)
+            if bucket is not None:
+                matches = sorted((name, price_keys[key][1], key) for key, (name, _) in bucket.items()
+                                 if name.startswith(prefix))
+                yield from (bucket[key][1] for _, _, key in matches)
+                continue
+            entries = node.get(_HERE)
+            if entries:
+                yield from entries.values()
+            stack.extend(node[character] for character in sorted(filter(None, node), reverse=True))
+
+    def with_prefix(self, prefix: str, limit: Optional[int] = None,
+                    active: Optional[bool] = True) -> List[Product]:
+        """
+        Returns products whose names start with prefix (ignoring case), in name order.
+
+        Only the trie branch under the prefix is visited, and the walk stops
+        after limit matches.
+        """
+        matches = (product for product in self._iter_prefix(prefix) if self._matches_active(product, active))
+        return list(islice(matches, limit))
+
+    def with_promotion(self, promotion, active: Optional[bool] = True) -> List[Product]:
+        """Returns the products that have the given promotion, in catalog order."""
+        members = self._by_promotion.get(id(promotion), {})
+        ordered = sorted(members, key=lambda key: self._price_keys[key][1])
+        return [members[key] for key in ordered if self._matches_active(members[key], active)]
+
+    def promotions(self) -> List[object]:
+        """Returns every promotion used by at least one indexed product."""
+        return [next(iter(members.values())).promotion for members in self._by_promotion.values()]
+
+    def search(self, prefix: Optional[str] = None, min_price: Union[float, Product, None] = None,
+               max_price: Union[float, Product, None] = None, promotion=None,
+               active: Optional[bool] = True, limit: Optional[int] = None) -> List[Product]:
+        """
+        Finds products matching every given filter, cheapest first.
+
+        The most selective index drives the search: a specific promotion's
+        members, else the name prefix, else the price range. Candidates from
+        the first two are then sorted by price, which touches only the
+        candidates, never the whole catalog.
+
+        Args:
+            prefix (Optional[str]): A name prefix, ignoring case.
+            min_price, max_price (Union[float, Product, None]): Inclusive price bounds.
+            promotion: None for no promotion filter, True for products with any promotion,
+                False for products without one, or a Promotion to match exactly.
+            active (Optional[bool]): True for active products only, False for inactive
+                ones only, None for all.
+            limit (Optional[int]): The most products to return.
+
+        Returns:
+            List[Product]: The matches in price order (ties in catalog order).
+        """
+        low, high = self._bound(min_price), self._bound(max_price)
+
+        def wanted(product: Product) -> bool:
+            price = product.price_cents
+            return ((low is None or price >= low) and (high is None or price <= high)
+                    and (promotion is None
+                         or (promotion is True and product.promotion is not None)
+                         or (promotion is False and product.promotion is None)
+                         or (not isinstance(promotion, bool) and product.promotion is promotion))
+                    and (prefix is None or product.name.casefold().startswith(prefix.casefold()))
+                    and self._matches_active(product, active))
+
+        if promotion is not None and not isinstance(promotion, bool):
+            candidates = self._by_promotion.get(id(promotion), {}).values()
+        elif prefix is not None:
+            candidates = self._iter_prefix(prefix)
+        else:
+            matches = (product for product in self.price_range(min_price, max_price, active=None)
+                       if wanted(product))
+            return list(islice(matches, limit))
+        price_keys = self._price_keys
+        keys = (price_keys[id(product)] for product in candidates if wanted(product))
+        keys = sorted(keys) if limit is None else heapq.nsmallest(limit, keys)
+        return [self._products[key] for _, _, key in keys]
+
+    def __len__(self) -> int:
+        """Returns the number of indexed products."""
+        return len(self._products)
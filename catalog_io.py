@@ -0,0 +1,282 @@
+import csv
+import json
+import math
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from products import Product, NonStockedProduct, LimitedProduct
+
+FIELDS = ("name", "price", "quantity", "kind", "maximum", "promotion", "active")
+KINDS = ("product", "non_stocked", "limited")
+
+
+class RowError(NamedTuple):
+    """A row that could not be imported."""
+    line: int
+    message: str
+
+
+class ImportSummary:
+    """
+    Counts from one import run.
+
+    Attributes:
+        added (int): Products added to the store.
+        updated (int): Existing products updated in place (upsert mode).
+        rejected (int): Rows that failed validation.
+    """
+
+    def __init__(self) -> None:
+        self.added = 0
+        self.updated = 0
+        self.rejected = 0
+
+    def __repr__(self) -> str:
+        return f"ImportSummary(added={self.added}, updated={self.updated}, rejected={self.rejected})"
+
+
+def read_csv_rows(path: str) -> Iterator[Tuple[int, dict]]:
+    """Yields (line number, row) pairs from a CSV file with a header row."""
+    with open(path, newline="", encoding="utf-8") as csv_file:
+        reader = csv.DictReader(csv_file)
+        for row in reader:
+            yield reader.line_num, row
+
+
+def read_jsonl_rows(path: str) -> Iterator[Tuple[int, dict]]:
+    """Yields (line number, row) pairs from a JSON Lines file, skipping blank lines."""
+    with open(path, encoding="utf-8") as jsonl_file:
+        for line_number, line in enumerate(jsonl_file, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as error:
+                row = {"__error__": f"Invalid JSON: {error.msg}"}
+            yield line_number, row if isinstance(row, dict) else {"__error__": "Row is not an object"}
+
+
+def read_rows(path: str) -> Iterator[Tuple[int, dict]]:
+    """Picks the reader from the file extension (.csv or .jsonl)."""
+    if path.endswith(".csv"):
+        return read_csv_rows(path)
+    if path.endswith((".jsonl", ".ndjson")):
+        return read_jsonl_rows(path)
+    raise ValueError(f"Unsupported catalog format: {path}")
+
+
+def _optional(row: dict, field: str):
+    """Returns a field's value, treating empty CSV cells as missing."""
+    value = row.get(field)
+    return None if value is None or value == "" else value
+
+
+def _integer(value) -> int:
+    """Converts a CSV cell or JSON number to an int, refusing fractions rather than truncating them."""
+    if isinstance(value, bool):
+        raise ValueError(f"{value!r} is not a whole number")
+    if isinstance(value, float):
+        if not value.is_integer():
+            raise ValueError(f"{value!r} is not a whole number")
+        return int(value)
+    return int(value)
+
+
+_FLAGS = {"true": True, "1": True, "yes": True, "false": False, "0": False, "no": False}
+
+
+def _flag(value) -> bool:
+    """Converts a CSV cell or JSON boolean to a bool."""
+    if isinstance(value, bool):
+        return value
+    flag = _FLAGS.get(str(value).strip().lower())
+    if flag is None:
+        raise ValueError(f"Active must be true or false, not {value!r}")
+    return flag
+
+
+def parse_row(row: dict, promotions: Dict[str, object]) -> dict:
+    """
+    Validates a raw row and converts it to typed fields.
+
+    Returns:
+        dict: name, price, quantity, kind, maximum, promotion (a Promotion or None) and
+        active (None when the row does not say).
+
+    Raises:
+        ValueError: If the row is invalid.
+    """
+    if "__error__" in row:
+        raise ValueError(row["__error__"])
+    name = _optional(row, "name")
+    if not isinstance(name, str) or not name.strip():
+        raise ValueError("Name cannot be empty")
+    kind = _optional(row, "kind") or "product"
+    if kind not in KINDS:
+        raise ValueError(f"Unknown kind {kind!r}; expected one of {', '.join(KINDS)}")
+    try:
+        price = float(_optional(row, "price"))
+        quantity = _integer(_optional(row, "quantity") or 0)
+        maximum = _optional(row, "maximum")
+        maximum = None if maximum is None else _integer(maximum)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError("Price must be a number; quantity and maximum must be whole numbers") from None
+    if not math.isfinite(price):
+        raise ValueError("Price must be a finite number")
+    if price < 0 or quantity < 0:
+        raise ValueError("Price or quantity cannot be negative")
+    if kind == "limited" and (maximum is None or maximum <= 0):
+        raise ValueError("Limited products need a positive maximum")
+    promotion_name = _optional(row, "promotion")
+    promotion = None
+    if promotion_name is not None:
+        promotion = promotions.get(promotion_name)
+        if promotion is None:
+            raise ValueError(f"Unknown promotion {promotion_name!r}")
+    active = _optional(row, "active")
+    active = None if active is None else _flag(active)
+    return {"name": name, "price": price, "quantity": quantity, "kind": kind,
+            "maximum": maximum, "promotion": promotion, "active": active}
+
+
+def build_product(fields: dict) -> Product:
+    """Creates the product a parsed row describes."""
+    if fields["kind"] == "non_stocked":
+        product = NonStockedProduct(fields["name"], fields["price"])
+    elif fields["kind"] == "limited":
+        product = LimitedProduct(fields["name"], fields["price"], fields["quantity"], fields["maximum"])
+    else:
+        product = Product(fields["name"], fields["price"], fields["quantity"])
+    if fields["promotion"] is not None:
+        product.set_promotion(fields["promotion"])
+    if fields.get("active") is False:
+        product.deactivate()
+    return product
+
+
+def _kind_of(product: Product) -> str:
+    """Returns the catalog kind of a product."""
+    if isinstance(product, NonStockedProduct):
+        return "non_stocked"
+    if isinstance(product, LimitedProduct):
+        return "limited"
+    return "product"
+
+
+def update_product(product: Product, fields: dict) -> None:
+    """
+    Updates an existing product in place from a parsed row.
+
+    Raises:
+        ValueError: If the row's kind differs from the product's kind.
+    """
+    if _kind_of(product) != fields["kind"]:
+        raise ValueError(f"Product {product.name} is {_kind_of(product)}, row says {fields['kind']}")
+    product.price = fields["price"]
+    if fields["kind"] != "non_stocked":
+        product.quantity = fields["quantity"]
+        if fields["quantity"] > 0 and fields.get("active") is None:
+            product.activate()
+    if fields["kind"] == "limited":
+        product.maximum = fields["maximum"]
+    if product.promotion is not fields["promotion"]:
+        product.set_promotion(fields["promotion"])
+    if fields.get("active") is not None:
+        product.active = fields["active"]
+
+
+def import_catalog(store, path: str, promotions: Optional[Dict[str, object]] = None,
+                   upsert: bool = False, chunk_size: int = 1000,
+                   on_errors: Optional[Callable[[List[RowError]], None]] = None) -> ImportSummary:
+    """
+    Streams a CSV or JSON Lines catalog into a store.
+
+    Rows are read, validated and applied one chunk at a time, so memory use
+    does not grow with the file. Invalid rows are skipped; their errors are
+    handed to ``on_errors`` after each chunk and then dropped.
+
+    Columns: name, price, quantity, kind (product, non_stocked or limited),
+    maximum (limited products), promotion (a key of ``promotions``) and active
+    (true or false; rows without it leave new products active and reactivate
+    restocked ones as before).
+
+    Args:
+        store: A Store or ColumnarStore.
+        path (str): The catalog file (.csv or .jsonl).
+        promotions (Optional[Dict[str, Promotion]]): Promotions by name.
+        upsert (bool): Update products whose name is already in the store instead of
+            rejecting the row as a duplicate.
+        chunk_size (int): Rows per chunk.
+        on_errors (Optional[Callable]): Receives each chunk's list of RowError.
+
+    Returns:
+        ImportSummary: How many rows were added, updated and rejected.
+    """
+    if chunk_size <= 0:
+        raise ValueError("Chunk size must be greater than zero")
+    promotions = promotions or {}
+    summary = ImportSummary()
+    rows = read_rows(path)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return summary
+        errors = []
+        for line, row in chunk:
+            try:
+                fields = parse_row(row, promotions)
+                existing = store.get_product(fields["name"])
+                if existing is None:
+                    store.add_product(build_product(fields))
+                    summary.added += 1
+                elif upsert:
+                    update_product(existing, fields)
+                    summary.updated += 1
+                else:
+                    raise ValueError(f"Product {fields['name']} is already in the store")
+            except ValueError as error:
+                errors.append(RowError(line, str(error)))
+        summary.rejected += len(errors)
+        if errors and on_errors is not None:
+            on_errors(errors)
+
+
+def iter_catalog_rows(products: Iterable[Product]) -> Iterator[dict]:
+    """Yields one export row per product."""
+    for product in products:
+        kind = _kind_of(product)
+        yield {
+            "name": product.name,
+            "price": product.price,
+            "quantity": product.quantity,
+            "kind": kind,
+            "maximum": product.maximum if kind == "limited" else None,
+            "promotion": product.promotion.name if product.promotion else None,
+            "active": product.is_active(),
+        }
+
+
+def export_catalog(store, path: str) -> int:
+    """
+    Streams every product in a store to a CSV or JSON Lines file.
+
+    Returns:
+        int: The number of rows written.
+    """
+    count = 0
+    if path.endswith(".csv"):
+        with open(path, "w", newline="", encoding="utf-8") as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=FIELDS)
+            writer.writeheader()
+            for row in iter_catalog_rows(store):
+                writer.writerow(row)
+                count += 1
+    elif path.endswith((".jsonl", ".ndjson")):
+        with open(path, "w", encoding="utf-8") as jsonl_file:
+            for row in iter_catalog_rows(store):
+                jsonl_file.write(json.dumps(row))
+                jsonl_file.write("\n")
+                count += 1
+    else:
+        raise ValueError(f"Unsupported catalog format: {path}")
+    return count
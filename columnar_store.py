@@ -0,0 +1,427 @@
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from money import from_cents, to_cents
+from products import Product, NonStockedProduct, LimitedProduct, ProductUnavailableError
+
+
+def _numpy():
+    """
+    Returns the NumPy module, or None if it is not installed.
+
+    Imported on first use and cached as the module attribute ``np``, as in
+    promotions.py, so loading a catalog does not pay for importing NumPy.
+    """
+    try:
+        return globals()["np"]
+    except KeyError:
+        pass
+    try:
+        import numpy
+    except ImportError:  # NumPy is optional; the store falls back to array/builtin loops.
+        numpy = None
+    globals()["np"] = numpy
+    return numpy
+
+
+def __getattr__(name: str):
+    if name == "np":
+        return _numpy()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+KIND_PRODUCT = 0
+KIND_NON_STOCKED = 1
+KIND_LIMITED = 2
+_KIND_REMOVED = -1
+
+
+class _ColumnView:
+    """
+    Mixin that redirects a product's state to a row of a ColumnarStore.
+
+    The Product methods read and write ``_name``, ``_price_cents``, ``_quantity``,
+    ``_active`` and ``promotion``; here those names are properties over the
+    store's columns, so buy(), the setters, validation and __str__ all work
+    unchanged on a view.
+    """
+
+    __slots__ = ()
+
+    @property
+    def _name(self) -> str:
+        return self._store._names[self._row]
+
+    @property
+    def _price_cents(self) -> int:
+        return self._store._prices[self._row]
+
+    @_price_cents.setter
+    def _price_cents(self, value: int) -> None:
+        self._store._prices[self._row] = value
+
+    @property
+    def _quantity(self) -> int:
+        return self._store._quantities[self._row]
+
+    @_quantity.setter
+    def _quantity(self, value: int) -> None:
+        self._store._quantities[self._row] = value
+
+    @property
+    def _active(self) -> bool:
+        return bool(self._store._active[self._row])
+
+    @_active.setter
+    def _active(self, value: bool) -> None:
+        self._store._active[self._row] = 1 if value else 0
+
+    @property
+    def promotion(self):
+        return self._store._promotion_for(self._store._promotion_ids[self._row])
+
+    @promotion.setter
+    def promotion(self, promotion) -> None:
+        self._store._promotion_ids[self._row] = self._store._promotion_id(promotion)
+
+    @property
+    def _observers(self):
+        # The columns are the single source of truth, so views have no observers.
+        return None
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, _ColumnView):
+            return self._store is other._store and self._row == other._row
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash((id(self._store), self._row))
+
+
+class ProductView(_ColumnView, Product):
+    """A Product backed by a ColumnarStore row."""
+
+    __slots__ = ("_store", "_row")
+
+
+class NonStockedProductView(_ColumnView, NonStockedProduct):
+    """A NonStockedProduct backed by a ColumnarStore row."""
+
+    __slots__ = ("_store", "_row")
+
+
+class LimitedProductView(_ColumnView, LimitedProduct):
+    """A LimitedProduct backed by a ColumnarStore row."""
+
+    __slots__ = ("_store", "_row")
+
+    @property
+    def maximum(self) -> int:
+        return self._store._maximums[self._row]
+
+    @maximum.setter
+    def maximum(self, value: int) -> None:
+        self._store._maximums[self._row] = value
+
+
+_VIEW_CLASSES = {
+    KIND_PRODUCT: ProductView,
+    KIND_NON_STOCKED: NonStockedProductView,
+    KIND_LIMITED: LimitedProductView,
+}
+
+
+class ColumnarStore:
+    """
+    A store that keeps its catalog in contiguous typed columns.
+
+    Prices, quantities, active flags, product kinds, purchase limits and
+    promotion ids each live in one ``array`` column instead of one Python
+    object per product. Products are handed out as lightweight views over a
+    row, created on demand, which support the full Product, NonStockedProduct
+    and LimitedProduct API. Aggregates and bulk restocks run over whole
+    columns, using NumPy when it is installed.
+
+    Removed rows are kept as tombstones (zero quantity, inactive) so that row
+    numbers, and therefore existing views, stay valid.
+    """
+
+    def __init__(self, product_list: Iterable[Product] = ()):
+        """
+        Initializes the store, copying the given products into columns.
+
+        Args:
+            product_list (Iterable[Product]): The initial products.
+        """
+        self._names: List[str] = []
+        self._prices = array("q")
+        self._quantities = array("q")
+        self._active = array("b")
+        self._kinds = array("b")
+        self._maximums = array("q")
+        self._promotion_ids = array("i")
+        self._rows: Dict[str, int] = {}
+        self._promotions: List[object] = []
+        self._promotion_ids_by_object: Dict[int, int] = {}
+        self._positions: Optional[List[int]] = None
+        for product in product_list:
+            self.add_product(product)
+
+    @classmethod
+    def from_columns(cls, names: List[str], prices: array, quantities: array, active: array,
+                     kinds: array, maximums: array, promotion_ids: array,
+                     promotions: List[object]) -> "ColumnarStore":
+        """
+        Creates a store that adopts ready-made columns without copying them row by row.
+
+        The columns must have equal lengths and the typecodes used by the store
+        ("q", "q", "b", "b", "q", "i"), with prices in whole cents; names must be unique. Used by snapshot loading.
+        """
+        store = cls()
+        store._names = names
+        store._prices = prices
+        store._quantities = quantities
+        store._active = active
+        store._kinds = kinds
+        store._maximums = maximums
+        store._promotion_ids = promotion_ids
+        store._rows = dict(zip(names, range(len(names))))
+        if len(store._rows) != len(names):
+            raise ValueError("Product names must be unique")
+        store._promotions = list(promotions)
+        store._promotion_ids_by_object = {id(promotion): promotion_id
+                                          for promotion_id, promotion in enumerate(store._promotions)}
+        return store
+
+    def columns(self) -> Tuple[List[str], array, array, array, array, array, array, List[object]]:
+        """
+        Returns the live rows as (names, prices, quantities, active, kinds, maximums,
+        promotion_ids, promotions), the inverse of from_columns().
+        """
+        if len(self._rows) == len(self._names):
+            return (self._names, self._prices, self._quantities, self._active, self._kinds,
+                    self._maximums, self._promotion_ids, self._promotions)
+        rows = self._live_positions()
+        return ([self._names[row] for row in rows],
+                array("q", (self._prices[row] for row in rows)),
+                array("q", (self._quantities[row] for row in rows)),
+                array("b", (self._active[row] for row in rows)),
+                array("b", (self._kinds[row] for row in rows)),
+                array("q", (self._maximums[row] for row in rows)),
+                array("i", (self._promotion_ids[row] for row in rows)),
+                self._promotions)
+
+    def _promotion_id(self, promotion) -> int:
+        """Returns the id of a promotion in this store, registering it if needed."""
+        if promotion is None:
+            return -1
+        promotion_id = self._promotion_ids_by_object.get(id(promotion))
+        if promotion_id is None:
+            promotion_id = len(self._promotions)
+            self._promotions.append(promotion)
+            self._promotion_ids_by_object[id(promotion)] = promotion_id
+        return promotion_id
+
+    def _promotion_for(self, promotion_id: int):
+        """Returns the promotion with the given id, or None for -1."""
+        return None if promotion_id < 0 else self._promotions[promotion_id]
+
+    def append_row(self, name: str, price: float, quantity: int, kind: int = KIND_PRODUCT,
+                   maximum: int = 0, promotion=None, active: bool = True) -> int:
+        """
+        Adds a product as a new row without building a Product object first.
+
+        Args:
+            name (str): The product name (SKU); must be unique in the store.
+            price (float): The unit price, stored rounded to the nearest cent.
+            quantity (int): The stock level; ignored for non-stocked products.
+            kind (int): KIND_PRODUCT, KIND_NON_STOCKED or KIND_LIMITED.
+            maximum (int): The per-order limit for limited products.
+            promotion (Promotion): An optional promotion.
+            active (bool): Whether the product starts active.
+
+        Returns:
+            int: The new row number.
+
+        Raises:
+            ValueError: On the same invalid values Product rejects, an unknown kind,
+                or a name that is already in the store.
+        """
+        if not name or price < 0 or quantity < 0:
+            raise ValueError('Name cannot be empty, and price or quantity cannot be negative')
+        if kind not in _VIEW_CLASSES:
+            raise ValueError(f"Unknown product kind: {kind}")
+        if name in self._rows:
+            raise ValueError(f"Product {name} is already in the store.")
+        row = len(self._names)
+        self._names.append(name)
+        self._prices.append(to_cents(price))
+        self._quantities.append(0 if kind == KIND_NON_STOCKED else int(quantity))
+        self._active.append(1 if active else 0)
+        self._kinds.append(kind)
+        self._maximums.append(int(maximum))
+        self._promotion_ids.append(self._promotion_id(promotion))
+        self._rows[name] = row
+        if self._positions is not None:
+            self._positions.append(row)
+        return row
+
+    def add_product(self, product: Product) -> None:
+        """Copies a Product, NonStockedProduct or LimitedProduct into the store."""
+        if isinstance(product, NonStockedProduct):
+            kind, maximum = KIND_NON_STOCKED, 0
+        elif isinstance(product, LimitedProduct):
+            kind, maximum = KIND_LIMITED, product.maximum
+        else:
+            kind, maximum = KIND_PRODUCT, 0
+        self.append_row(product.name, product.price, product.quantity, kind, maximum,
+                        product.promotion, product.is_active())
+
+    def _row_of(self, product: Product) -> int:
+        """Returns the live row behind a view of this store, or -1."""
+        if isinstance(product, _ColumnView) and product._store is self \
+                and self._kinds[product._row] != _KIND_REMOVED:
+            return product._row
+        return -1
+
+    def _view(self, row: int) -> Product:
+        """Creates a product view over a row."""
+        view = _VIEW_CLASSES[self._kinds[row]].__new__(_VIEW_CLASSES[self._kinds[row]])
+        view._store = self
+        view._row = row
+        return view
+
+    def remove_product(self, product: Product) -> None:
+        """Removes a product, leaving a tombstone row behind."""
+        row = self._row_of(product)
+        if row < 0:
+            raise ValueError(f"Product {product.name} is not in the store.")
+        del self._rows[self._names[row]]
+        self._kinds[row] = _KIND_REMOVED
+        self._quantities[row] = 0
+        self._active[row] = 0
+        self._positions = None
+
+    def get_product(self, name: str) -> Optional[Product]:
+        """Looks up a product by its name (SKU), returning None if it is not in the store."""
+        row = self._rows.get(name)
+        return None if row is None else self._view(row)
+
+    def get_total_quantity(self) -> int:
+        """Returns the total quantity of all products (tombstones hold zero)."""
+        np = _numpy()
+        if np is not None and self._quantities:
+            return int(np.frombuffer(self._quantities, dtype=np.int64).sum())
+        return sum(self._quantities)
+
+    def _active_rows(self) -> List[int]:
+        """Returns the row numbers of active products in insertion order."""
+        np = _numpy()
+        if np is not None and self._active:
+            return np.flatnonzero(np.frombuffer(self._active, dtype=np.int8)).tolist()
+        return [row for row, active in enumerate(self._active) if active]
+
+    def get_all_products(self) -> List[Product]:
+        """Retrieves all active products in the store as views."""
+        return [self._view(row) for row in self._active_rows()]
+
+    def restock(self, products: Iterable[Union[Product, str]], amounts: Iterable[int]) -> None:
+        """
+        Adds stock to many products at once and reactivates them.
+
+        Args:
+            products (Iterable[Union[Product, str]]): Views or names of the products.
+            amounts (Iterable[int]): The units to add to each product, in the same order.
+
+        Raises:
+            ValueError: If a product is unknown, non-stocked, or an amount is negative.
+                Nothing is restocked in that case.
+        """
+        rows = []
+        for product in products:
+            row = self._rows.get(product) if isinstance(product, str) else self._row_of(product)
+            if row is None or row < 0:
+                raise ValueError(f"Product {product} is not in the store.")
+            if self._kinds[row] == KIND_NON_STOCKED:
+                raise ValueError(f"Product {self._names[row]} is not stocked.")
+            rows.append(row)
+        amounts = [int(amount) for amount in amounts]
+        if len(amounts) != len(rows):
+            raise ValueError("Products and amounts must have the same length")
+        if any(amount < 0 for amount in amounts):
+            raise ValueError("Restock amount cannot be negative")
+        if not rows:
+            return
+        np = _numpy()
+        if np is not None:
+            quantities = np.frombuffer(self._quantities, dtype=np.int64)
+            active = np.frombuffer(self._active, dtype=np.int8)
+            index = np.asarray(rows, dtype=np.intp)
+            np.add.at(quantities, index, np.asarray(amounts, dtype=np.int64))
+            active[index[quantities[index] > 0]] = 1
+            del quantities, active
+            return
+        for row, amount in zip(rows, amounts):
+            self._quantities[row] += amount
+            if self._quantities[row] > 0:
+                self._active[row] = 1
+
+    def order(self, shopping_list: List[Tuple[Product, int]]) -> Tuple[float, float]:
+        """
+        Processes an order with the same all-or-nothing rules as Store.order().
+
+        Args:
+            shopping_list (List[Tuple[Product, int]]): Views of this store and quantities.
+
+        Returns:
+            Tuple[float, float]: The total price of the order and total savings from promotions.
+
+        Raises:
+            ValueError: If a product is not available, a limit is exceeded or stock is short.
+        """
+        merged: Dict[int, List] = {}
+        for product, quantity in shopping_list:
+            row = self._row_of(product)
+            if row < 0 or not self._active[row]:
+                raise ProductUnavailableError(f"Product {product.name} is not available in the store.")
+            if row in merged:
+                merged[row][1] += quantity
+            else:
+                merged[row] = [product, quantity]
+        for product, quantity in merged.values():
+            product.check_purchase(quantity)
+
+        total_price = 0
+        total_savings = 0
+        for product, quantity in merged.values():
+            original_price = product.price_cents * quantity
+            final_price = product.buy_cents(quantity)
+            total_price += final_price
+            total_savings += original_price - final_price
+        return from_cents(total_price), from_cents(total_savings)
+
+    def _live_positions(self) -> List[int]:
+        """Returns the live row numbers in insertion order."""
+        if self._positions is None:
+            self._positions = [row for row, kind in enumerate(self._kinds) if kind != _KIND_REMOVED]
+        return self._positions
+
+    def __contains__(self, product: Product) -> bool:
+        """Checks if a product view belongs to the store."""
+        return self._row_of(product) >= 0
+
+    def __len__(self) -> int:
+        """Returns the number of products in the store."""
+        return len(self._rows)
+
+    def __getitem__(self, index):
+        """Allows indexing to access product views in insertion order."""
+        rows = self._live_positions()[index]
+        if isinstance(index, slice):
+            return [self._view(row) for row in rows]
+        return self._view(rows)
+
+    def __str__(self) -> str:
+        """Returns a string representation of the store with numbered products."""
+        product_details = "\n".join(f"{index}. {self._view(row)}"
+                                    for index, row in enumerate(self._live_positions(), start=1))
+        return f"Store Inventory:\n{product_details}"
@@ -0,0 +1,475 @@
+"""
+Opt-in latency and failure metrics for the order and pricing hot paths.
+
+Nothing is measured until enable() is called. enable() swaps timing wrappers
+onto Store.order(), Product.buy_cents() (which Product.buy() goes through),
+Product.take_stock() (which every store order goes through once its lines
+are priced) and the promotions' apply_promotion_cents() and
+apply_batch_cents(); disable() puts the original methods back. While
+disabled the hot paths therefore run the original code with no added cost.
+
+Example:
+    metrics = instrumentation.enable()
+    ...
+    metrics.export("/var/lib/node_exporter/store.prom")   # Prometheus text format
+    metrics.export("metrics.json", format="json")
+
+A SamplingProfiler can also be started and stopped at runtime, directly,
+with start_profiler()/stop_profiler(), or from outside the process with
+install_signal_toggle().
+"""
+import bisect
+import functools
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Dict, List, Optional, Tuple
+
+from products import NonStockedProduct, Product
+from promotions import Promotion
+from store import Store
+
+# Upper bounds, in seconds, of the latency histogram buckets.
+LATENCY_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4,
+                   1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0)
+
+
+class Histogram:
+    """
+    A fixed-bucket latency histogram, as used by Prometheus.
+
+    observe() only appends to a deque, which is thread-safe without a lock;
+    observations are folded into the buckets in batches, and whenever the
+    histogram is read.
+
+    Attributes:
+        buckets (Tuple[float, ...]): Bucket upper bounds in seconds; a final +Inf bucket is implied.
+    """
+
+    __slots__ = ("buckets", "_counts", "_count", "_sum", "_pending", "_lock")
+
+    FOLD_EVERY = 1024
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._count = 0
+        self._sum = 0.0
+        self._pending: deque = deque()
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        """Records one observation."""
+        pending = self._pending
+        pending.append(seconds)
+        if len(pending) >= self.FOLD_EVERY:
+            self._fold()
+
+    def _fold(self) -> None:
+        """Moves pending observations into the buckets."""
+        with self._lock:
+            pending, buckets, counts = self._pending, self.buckets, self._counts
+            while pending:
+                seconds = pending.popleft()
+                counts[bisect.bisect_left(buckets, seconds)] += 1
+                self._count += 1
+                self._sum += seconds
+
+    @property
+    def counts(self) -> List[int]:
+        """Observations per bucket (not cumulative)."""
+        self._fold()
+        return list(self._counts)
+
+    @property
+    def count(self) -> int:
+        """Total observations."""
+        self._fold()
+        return self._count
+
+    @property
+    def sum(self) -> float:
+        """Total observed seconds."""
+        self._fold()
+        return self._sum
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimates a quantile as the upper bound of the bucket that holds it.
+
+        Returns:
+            float: Seconds; 0.0 with no observations, inf if it falls past the last bucket.
+        """
+        if not 0 <= q <= 1:
+            raise ValueError("Quantile must be between 0 and 1")
+        counts = self.counts
+        total = sum(counts)
+        if not total:
+            return 0.0
+        rank = q * total
+        seen = 0
+        for bound, count in zip(self.buckets, counts):
+            seen += count
+            if seen >= rank and seen:
+                return bound
+        return float("inf")
+
+    def reset(self) -> None:
+        """Drops every observation."""
+        with self._lock:
+            self._pending.clear()
+            self._counts = [0] * (len(self.buckets) + 1)
+            self._count = 0
+            self._sum = 0.0
+
+    def to_dict(self) -> dict:
+        """Returns the count, sum, p50/p99 estimates and per-bucket counts."""
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+            "buckets": {str(bound): count for bound, count in zip(self.buckets + ("+Inf",), self.counts)},
+        }
+
+
+class Metrics:
+    """
+    The latency histograms and failure counters filled in while instrumentation is enabled.
+
+    Attributes:
+        latency (Dict[str, Histogram]): "order", "buy", "promotion" (one line priced)
+            and "promotion_batch" (one apply_batch_cents() call).
+        failures (Counter): Failed orders by reason, e.g. "insufficient_stock",
+            "limit_exceeded", "inactive_product" or "invalid_quantity".
+    """
+
+    HELP = {
+        "order": "Latency of Store.order().",
+        "buy": "Latency of buying one product line.",
+        "promotion": "Latency of pricing one line with a promotion.",
+        "promotion_batch": "Latency of pricing a batch of lines with a promotion.",
+    }
+
+    def __init__(self, prefix: str = "store"):
+        """
+        Initializes empty metrics.
+
+        Args:
+            prefix (str): Prefix for the exported metric names.
+        """
+        self.prefix = prefix
+        self.latency: Dict[str, Histogram] = {name: Histogram() for name in self.HELP}
+        self.failures: Counter = Counter()
+        self._failure_lock = threading.Lock()
+
+    def record_failure(self, reason: str) -> None:
+        """Counts one failed order."""
+        with self._failure_lock:
+            self.failures[reason] += 1
+
+    def reset(self) -> None:
+        """Drops every observation and count."""
+        for histogram in self.latency.values():
+            histogram.reset()
+        with self._failure_lock:
+            self.failures.clear()
+
+    def to_dict(self) -> dict:
+        """Returns every histogram and counter as plain data."""
+        return {
+            "latency_seconds": {name: histogram.to_dict() for name, histogram in self.latency.items()},
+            "order_failures": dict(self.failures),
+        }
+
+    def render_prometheus(self) -> str:
+        """Renders the metrics in the Prometheus text exposition format."""
+        lines = []
+        for name, histogram in self.latency.items():
+            metric = f"{self.prefix}_{name}_seconds"
+            lines.append(f"# HELP {metric} {self.HELP[name]}")
+            lines.append(f"# TYPE {metric} histogram")
+            counts = histogram.counts
+            cumulative = 0
+            for bound, count in zip(self._bucket_labels(histogram), counts):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{le="{bound}"}} {cumulative}')
+            lines.append(f"{metric}_sum {histogram.sum!r}")
+            lines.append(f"{metric}_count {cumulative}")
+        metric = f"{self.prefix}_order_failures_total"
+        lines.append(f"# HELP {metric} Failed orders by reason.")
+        lines.append(f"# TYPE {metric} counter")
+        for reason, count in sorted(self.failures.items()):
+            lines.append(f'{metric}{{reason="{reason}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _bucket_labels(histogram: Histogram) -> List[str]:
+        """Returns the le="..." labels of a histogram's buckets."""
+        return [repr(bound) for bound in histogram.buckets] + ["+Inf"]
+
+    def export(self, path: str, format: str = "prometheus") -> None:
+        """
+        Writes the metrics to a file, replacing it atomically.
+
+        Args:
+            path (str): The file to write, e.g. in a node_exporter textfile directory.
+            format (str): "prometheus" or "json".
+        """
+        if format == "prometheus":
+            text = self.render_prometheus()
+        elif format == "json":
+            text = json.dumps(self.to_dict(), indent=2)
+        else:
+            raise ValueError(f"Unknown metrics format: {format}")
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as metrics_file:
+            metrics_file.write(text)
+        os.replace(temporary_path, path)
+
+
+# Reentrant, because the profiler's signal handler may run while the main thread holds it.
+_lock = threading.RLock()
+_metrics: Optional[Metrics] = None
+_originals: List[Tuple[type, str, object]] = []
+
+
+def _timed(function, histogram: Histogram):
+    """Wraps a function so that every call's duration is observed."""
+    perf_counter = time.perf_counter
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start = perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            histogram.observe(perf_counter() - start)
+    return wrapper
+
+
+def _timed_order(function, metrics: Metrics):
+    """Wraps Store.order() to also count failures by reason."""
+    histogram = metrics.latency["order"]
+    perf_counter = time.perf_counter
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start = perf_counter()
+        try:
+            return function(*args, **kwargs)
+        except ValueError as error:
+            metrics.record_failure(getattr(error, "reason", "other"))
+            raise
+        finally:
+            histogram.observe(perf_counter() - start)
+    return wrapper
+
+
+def _promotion_classes() -> List[type]:
+    """Returns Promotion and every subclass defined so far."""
+    classes, pending = [], [Promotion]
+    while pending:
+        cls = pending.pop()
+        classes.append(cls)
+        pending.extend(cls.__subclasses__())
+    return classes
+
+
+def _patch(cls: type, attribute: str, wrapper) -> None:
+    _originals.append((cls, attribute, cls.__dict__[attribute]))
+    setattr(cls, attribute, wrapper)
+
+
+def enable(metrics: Optional[Metrics] = None) -> Metrics:
+    """
+    Starts recording metrics.
+
+    Promotion subclasses defined after this call are not timed until
+    instrumentation is disabled and enabled again.
+
+    Args:
+        metrics (Optional[Metrics]): Where to record; a new Metrics by default.
+
+    Returns:
+        Metrics: The metrics being recorded.
+
+    Raises:
+        ValueError: If instrumentation is already enabled with different metrics.
+    """
+    global _metrics
+    with _lock:
+        if _metrics is not None:
+            if metrics is not None and metrics is not _metrics:
+                raise ValueError("Instrumentation is already enabled")
+            return _metrics
+        metrics = metrics or Metrics()
+        _patch(Store, "order", _timed_order(Store.__dict__["order"], metrics))
+        for cls in (Product, NonStockedProduct):
+            for attribute in ("buy_cents", "take_stock"):
+                _patch(cls, attribute, _timed(cls.__dict__[attribute], metrics.latency["buy"]))
+        for cls in _promotion_classes():
+            for attribute, name in (("apply_promotion_cents", "promotion"),
+                                    ("apply_batch_cents", "promotion_batch")):
+                if attribute in cls.__dict__:
+                    _patch(cls, attribute, _timed(cls.__dict__[attribute], metrics.latency[name]))
+        _metrics = metrics
+        return metrics
+
+
+def disable() -> None:
+    """Stops recording and restores the original methods. The metrics keep their values."""
+    global _metrics
+    with _lock:
+        while _originals:
+            cls, attribute, original = _originals.pop()
+            setattr(cls, attribute, original)
+        _metrics = None
+
+
+def current() -> Optional[Metrics]:
+    """Returns the metrics being recorded, or None while disabled."""
+    return _metrics
+
+
+class SamplingProfiler:
+    """
+    A statistical profiler that samples the stacks of running threads.
+
+    A background thread wakes up every ``interval`` seconds, reads every other
+    thread's current frame with sys._current_frames() and counts the stack.
+    The profiled code runs unmodified, so the overhead is bounded by the
+    sampling rate and can be switched on in a live process.
+    """
+
+    def __init__(self, interval: float = 0.005, max_depth: int = 64):
+        """
+        Initializes a stopped profiler.
+
+        Args:
+            interval (float): Seconds between samples.
+            max_depth (int): The most frames kept per stack, innermost first.
+        """
+        if interval <= 0 or max_depth <= 0:
+            raise ValueError("Interval and depth must be greater than zero")
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples = 0
+        self._stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        """Whether the sampling thread is running."""
+        return self._thread is not None
+
+    def start(self) -> None:
+        """Starts sampling; does nothing if already running."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops sampling and waits for the sampling thread; samples are kept."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        own_thread = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                self._stacks[tuple(reversed(stack))] += 1
+                self.samples += 1
+
+    def reset(self) -> None:
+        """Drops every sample."""
+        self._stacks.clear()
+        self.samples = 0
+
+    def top(self, count: int = 20) -> List[Tuple[str, int, int]]:
+        """
+        Returns the functions seen most often.
+
+        Returns:
+            List[Tuple[str, int, int]]: (function, samples where it was running,
+            samples where it was on the stack), by the first count descending.
+        """
+        own: Counter = Counter()
+        total: Counter = Counter()
+        for stack, samples in list(self._stacks.items()):
+            own[stack[-1]] += samples
+            for function in set(stack):
+                total[function] += samples
+        return [(function, samples, total[function]) for function, samples in own.most_common(count)]
+
+    def write_collapsed(self, path: str) -> None:
+        """Writes the samples as collapsed stacks ("a;b;c count" lines) for flame graph tools."""
+        with open(path, "w", encoding="utf-8") as collapsed_file:
+            for stack, samples in sorted(list(self._stacks.items())):
+                collapsed_file.write(f"{';'.join(stack)} {samples}\n")
+
+
+_profiler: Optional[SamplingProfiler] = None
+
+
+def start_profiler(interval: float = 0.005) -> SamplingProfiler:
+    """Starts the process-wide sampling profiler, creating it on first use."""
+    global _profiler
+    with _lock:
+        if _profiler is None:
+            _profiler = SamplingProfiler(interval)
+        _profiler.start()
+        return _profiler
+
+
+def stop_profiler() -> Optional[SamplingProfiler]:
+    """Stops the process-wide sampling profiler and returns it, or None if it was never started."""
+    with _lock:
+        if _profiler is not None:
+            _profiler.stop()
+        return _profiler
+
+
+def install_signal_toggle(path: str, signum: Optional[int] = None) -> None:
+    """
+    Lets a signal switch the process-wide profiler on and off.
+
+    The first signal starts sampling; the next one stops it and writes the
+    collapsed stacks to ``path``. Must be called from the main thread.
+
+    Args:
+        path (str): Where to write the collapsed stacks each time profiling stops.
+        signum (Optional[int]): The signal to use; SIGUSR2 by default.
+
+    Raises:
+        ValueError: If no signal is given and the platform has no SIGUSR2.
+    """
+    if signum is None:
+        signum = getattr(signal, "SIGUSR2", None)
+        if signum is None:
+            raise ValueError("SIGUSR2 is not available on this platform; pass a signal number")
+
+    def toggle(received, frame):
+        if _profiler is not None and _profiler.running:
+            stop_profiler().write_collapsed(path)
+        else:
+            start_profiler()
+
+    signal.signal(signum, toggle)
@@ -0,0 +1,277 @@
+"""
+Order journals: a compact binary recording of Store.order() traffic.
+
+A journal holds every order a store processed, in order, with its shopping
+list (by product name), when it arrived, and what it returned: the total and
+savings in cents, or the failure reason. Replaying a journal against a
+freshly loaded catalog reproduces the same traffic shape, either as fast as
+possible or at the original pacing, and reports throughput, latency
+percentiles and any order whose outcome differs from the recording.
+
+Journals reuse the framing of the persistence order log (length, CRC-32,
+payload), so a torn tail from a crash is detected and ignored.
+"""
+import math
+import os
+import struct
+import threading
+import time
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+from money import from_cents, to_cents
+from persistence import OP_ORDER, OrderLog, decode_record, encode_order, read_log
+from products import Product
+from store import Store
+
+JOURNAL_MAGIC = b"BBJRNL\x00\x01"
+# nanoseconds since the recording started, status, total cents, savings cents,
+# length of the failure reason; followed by the reason and the encoded order
+_ENTRY = struct.Struct("<QBqqH")
+# The pause placed between the last entry of a journal and the first entry appended to it
+_SESSION_GAP_NS = 1_000_000
+STATUS_OK = 0
+STATUS_FAILED = 1
+
+
+class JournalEntry(NamedTuple):
+    """One recorded order."""
+    offset_ns: int
+    lines: List[Tuple[str, int]]
+    ok: bool
+    total_cents: int
+    savings_cents: int
+    reason: str
+
+
+class JournalRecorder:
+    """
+    Records every order a store processes to a journal file.
+
+    While recording, the store's order() is shadowed by an instance attribute
+    that times the call and appends an entry; close() removes it again. Orders
+    placed through an AsyncStore, ConcurrentOrderEngine or PersistentStore
+    wrapping the store are recorded too.
+
+    Example:
+        with JournalRecorder(best_buy, "orders.journal"):
+            run_the_shop(best_buy)
+    """
+
+    def __init__(self, store: Store, path: str, group_size: int = 256):
+        """
+        Starts recording.
+
+        Args:
+            store (Store): The store whose orders are recorded.
+            path (str): The journal file; it is created, or appended to if it exists.
+                Appended entries carry on shortly after the journal's last entry, so a
+                paced replay keeps every session in order without waiting out the time
+                between sessions.
+            group_size (int): Entries buffered per write.
+
+        Raises:
+            ValueError: If the file exists but is not a journal.
+        """
+        if "order" in vars(store):
+            raise ValueError("The store's orders are already being recorded")
+        started, payloads, intact_length = read_log(path, magic=JOURNAL_MAGIC)
+        offset = 0
+        if started >= 0:
+            if payloads:
+                offset = decode_entry(payloads[-1]).offset_ns + 1 + _SESSION_GAP_NS
+            if os.path.getsize(path) > intact_length:
+                # Drop a torn tail so new entries follow valid data.
+                with open(path, "r+b") as journal_file:
+                    journal_file.truncate(intact_length)
+        elif os.path.exists(path) and os.path.getsize(path):
+            raise ValueError(f"{path} is not an order journal")
+        self.store = store
+        self._log = OrderLog(path, generation=time.time_ns(), group_size=group_size,
+                             fsync=False, magic=JOURNAL_MAGIC)
+        self._lock = threading.Lock()
+        self._started = time.monotonic_ns() - offset
+        self.recorded = 0
+        order = store.order
+
+        def recorded_order(shopping_list):
+            received = time.monotonic_ns() - self._started
+            try:
+                result = order(shopping_list)
+            except ValueError as error:
+                self._append(received, shopping_list, None, getattr(error, "reason", str(error)))
+                raise
+            self._append(received, shopping_list, result, "")
+            return result
+
+        store.order = recorded_order
+
+    def _append(self, received: int, shopping_list: List[Tuple[Product, int]],
+                result: Optional[Tuple[float, float]], reason: str) -> None:
+        """Encodes and buffers one entry."""
+        encoded_reason = reason.encode("utf-8")[:0xFFFF]
+        if result is None:
+            header = _ENTRY.pack(received, STATUS_FAILED, 0, 0, len(encoded_reason))
+        else:
+            header = _ENTRY.pack(received, STATUS_OK, to_cents(result[0]), to_cents(result[1]),
+                                 len(encoded_reason))
+        with self._lock:
+            self._log.append(header + encoded_reason + encode_order(shopping_list))
+            self.recorded += 1
+
+    def flush(self) -> None:
+        """Writes buffered entries to the file."""
+        with self._lock:
+            self._log.flush()
+
+    def close(self) -> None:
+        """Stops recording and closes the journal."""
+        if vars(self.store).get("order") is not None:
+            del self.store.order
+        with self._lock:
+            self._log.close()
+
+    def __enter__(self) -> "JournalRecorder":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+def decode_entry(payload: bytes) -> JournalEntry:
+    """Decodes one journal record payload."""
+    offset_ns, status, total_cents, savings_cents, reason_length = _ENTRY.unpack_from(payload, 0)
+    start = _ENTRY.size
+    reason = payload[start:start + reason_length].decode("utf-8")
+    record = decode_record(payload[start + reason_length:])
+    if record[0] != OP_ORDER:
+        raise ValueError("Journal entry does not hold an order")
+    return JournalEntry(offset_ns, record[1], status == STATUS_OK, total_cents, savings_cents, reason)
+
+
+def read_journal(path: str) -> Tuple[int, Iterator[JournalEntry]]:
+    """
+    Reads a journal file.
+
+    Returns:
+        Tuple[int, Iterator[JournalEntry]]: When recording started (ns since the epoch)
+        and the intact entries, in order.
+
+    Raises:
+        ValueError: If the file is missing or is not a journal.
+    """
+    started, payloads, _ = read_log(path, magic=JOURNAL_MAGIC)
+    if started < 0:
+        raise ValueError(f"{path} is not an order journal")
+    return started, (decode_entry(payload) for payload in payloads)
+
+
+class Divergence(NamedTuple):
+    """An order whose replayed outcome differs from the recording."""
+    index: int
+    expected: str
+    actual: str
+
+
+class ReplayReport:
+    """
+    The outcome of a replay.
+
+    Attributes:
+        orders (int): Orders replayed.
+        failed (int): Orders that failed during the replay.
+        elapsed (float): Wall-clock seconds for the whole replay.
+        latencies (List[float]): Seconds spent in Store.order() per order, in replay order.
+        divergences (List[Divergence]): Orders whose total, savings or failure reason
+            differ from the recording.
+    """
+
+    def __init__(self) -> None:
+        self.orders = 0
+        self.failed = 0
+        self.elapsed = 0.0
+        self.latencies: List[float] = []
+        self.divergences: List[Divergence] = []
+
+    @property
+    def throughput(self) -> float:
+        """Orders per second over the whole replay."""
+        return self.orders / self.elapsed if self.elapsed else 0.0
+
+    def percentile(self, q: float) -> float:
+        """Returns a latency percentile (nearest rank), in seconds."""
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+    def to_dict(self) -> dict:
+        """Returns the summary as plain data."""
+        return {
+            "orders": self.orders,
+            "failed": self.failed,
+            "elapsed_seconds": self.elapsed,
+            "throughput_per_sec": self.throughput,
+            "p50_ms": self.percentile(0.5) * 1000,
+            "p99_ms": self.percentile(0.99) * 1000,
+            "max_ms": max(self.latencies, default=0.0) * 1000,
+            "divergences": len(self.divergences),
+        }
+
+
+def _outcome(ok: bool, total_cents: int, savings_cents: int, reason: str) -> str:
+    """Describes an order's outcome for a divergence report."""
+    if ok:
+        return f"total=${from_cents(total_cents):,.2f} savings=${from_cents(savings_cents):,.2f}"
+    return f"failed: {reason}"
+
+
+def replay(store: Store, entries: Iterator[JournalEntry], speed: Optional[float] = None) -> ReplayReport:
+    """
+    Replays recorded orders against a store.
+
+    Args:
+        store (Store): A freshly loaded store holding the recorded products by name.
+        entries (Iterator[JournalEntry]): The recorded orders, e.g. from read_journal().
+        speed (Optional[float]): None replays as fast as possible; otherwise orders are
+            sent at their recorded offsets divided by speed (1.0 is the original pacing).
+
+    Returns:
+        ReplayReport: Throughput, latencies and divergences.
+    """
+    if speed is not None and speed <= 0:
+        raise ValueError("Speed must be greater than zero")
+    report = ReplayReport()
+    perf_counter = time.perf_counter
+    start = perf_counter()
+    for index, entry in enumerate(entries):
+        if speed is not None:
+            delay = entry.offset_ns / 1e9 / speed - (perf_counter() - start)
+            if delay > 0:
+                time.sleep(delay)
+        shopping_list = []
+        reason = ""
+        for name, quantity in entry.lines:
+            product = store.get_product(name)
+            if product is None:
+                reason = "unknown_product"
+                break
+            shopping_list.append((product, quantity))
+        total_cents = savings_cents = 0
+        began = perf_counter()
+        if not reason:
+            try:
+                total, savings = store.order(shopping_list)
+                total_cents, savings_cents = to_cents(total), to_cents(savings)
+            except ValueError as error:
+                reason = getattr(error, "reason", str(error))
+        report.latencies.append(perf_counter() - began)
+        report.orders += 1
+        ok = not reason
+        if not ok:
+            report.failed += 1
+        expected = (entry.ok, entry.total_cents, entry.savings_cents, entry.reason)
+        actual = (ok, total_cents, savings_cents, reason)
+        if expected != actual:
+            report.divergences.append(Divergence(index, _outcome(*expected), _outcome(*actual)))
+    report.elapsed = perf_counter() - start
+    return report
@@ -1,8 +1,10 @@
+import argparse
 import sys
+from itertools import islice
+from typing import List, Optional
 
 #Loads Store Class and Product Class
 from products import Product, NonStockedProduct, LimitedProduct
-from promotions import PercentDiscount, SecondHalfPrice, ThirdOneFree
 from store import Store
 
 
@@ -12,16 +14,19 @@ class StoreMenu:
 
     Attributes:
         store_obj (Store): The store instance that manages inventory and operations.
+        page_size (int): How many products are listed before asking to continue.
     """
 
-    def __init__(self, store_obj: "Store") -> None:
+    def __init__(self, store_obj: "Store", page_size: int = 20) -> None:
         """
         Initializes the StoreMenu with a given Store instance.
 
         Args:
             store_obj (Store): The store instance.
+            page_size (int): How many products are listed before asking to continue.
         """
         self.store_obj = store_obj
+        self.page_size = page_size
 
     def print_menu(self) -> None:
         """
@@ -39,16 +44,22 @@ class StoreMenu:
 
     def list_all_products(self) -> None:
         """
-        Lists all available products in the store along with their details.
+        Lists all available products in the store along with their details, one page at a time.
         """
         print("------")
-        print(self.store_obj)
+        lines = self.store_obj.iter_lines()
+        page = list(islice(lines, self.page_size))
+        while page:
+            print("\n".join(page))
+            page = list(islice(lines, self.page_size))
+            if page and input("Press Enter for more products, or q to stop: ").strip().lower() == "q":
+                break
         print("------")
 
     def total_amount(self) -> None:
         """Displays the total number of unique products and the total quantity of all items in the store."""
         total_unique_items = len(self.store_obj)
-        total_items = sum(product.quantity for product in self.store_obj)
+        total_items = self.store_obj.get_total_quantity()
         print(f"Total unique products: {total_unique_items}, Total items in stock: {total_items}")
 
     def make_order(self) -> None:
@@ -76,7 +87,11 @@ class StoreMenu:
                 print("Error: Invalid quantity. Please enter a valid number.")
 
         if shopping_list:
-            total_payment, total_savings = self.store_obj.order(shopping_list)
+            try:
+                total_payment, total_savings = self.store_obj.order(shopping_list)
+            except ValueError as error:
+                print(f"Error: {error}")
+                return
             print("********")
             print(f"Order made! Total payment: ${total_payment:,.2f}")
             if total_savings > 0:
@@ -110,10 +125,12 @@ class StoreMenu:
             print("Invalid option. Please try again.")
 
 
-def main() -> None:
+def default_products() -> List[Product]:
     """
-    Sets up the store and initializes the store menu for user interaction.
+    Builds the demo catalog with its promotions attached.
     """
+    # Only the demo catalog needs the promotion classes here; a catalog image brings its own.
+    from promotions import PercentDiscount, SecondHalfPrice, ThirdOneFree
     product_list = [ Product("MacBook Air M2", price=1450, quantity=100),
                      Product("Bose QuietComfort Earbuds", price=250, quantity=500),
                      Product("Google Pixel 7", price=500, quantity=250),
@@ -131,10 +148,38 @@ def main() -> None:
     product_list[1].set_promotion(third_one_free)
     product_list[3].set_promotion(thirty_percent)
     product_list[4].set_promotion(thirty_percent)
+    return product_list
 
 
-    best_buy = Store(product_list)
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Sets up the store and initializes the store menu for user interaction.
+    """
+    parser = argparse.ArgumentParser(description="Best Buy store menu.")
+    parser.add_argument("--catalog", help="Start from this catalog image instead of the demo catalog")
+    parser.add_argument("--save-catalog", metavar="PATH",
+                        help="Write the catalog to a catalog image at PATH and exit")
+    parser.add_argument("--journal", help="Record every order to this journal file (see replay.py)")
+    args = parser.parse_args(argv)
+
+    if args.catalog or args.save_catalog:
+        from persistence import load_image, save_image
+    try:
+        best_buy = load_image(args.catalog) if args.catalog else Store(default_products())
+    except (OSError, ValueError) as error:
+        parser.error(f"cannot load the catalog: {error}")
+    if args.save_catalog:
+        save_image(best_buy, args.save_catalog)
+        print(f"Saved {len(best_buy)} products to {args.save_catalog}")
+        return
     store_menu = StoreMenu(best_buy)
+    if args.journal:
+        from journal import JournalRecorder
+        try:
+            # One entry per write, so the journal is complete whenever the menu exits.
+            JournalRecorder(best_buy, args.journal, group_size=1)
+        except (OSError, ValueError) as error:
+            parser.error(f"cannot record the journal: {error}")
     while True:
         store_menu.print_menu()
         user_input = input("Please choose a number: ").strip()
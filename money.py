@@ -0,0 +1,65 @@
+"""
+Integer-cents money helpers.
+
+Prices are stored and combined as whole cents (Python ints), so promotion
+math and order totals are exact. The public API still accepts and returns
+dollar amounts as floats; conversion happens only at the edges.
+
+Rounding rules:
+    * A dollar amount is converted to cents by rounding its decimal value to the
+      nearest cent, halves away from zero (1.005 -> 101 cents).
+    * Promotions that produce fractions of a cent round the whole line total once,
+      halves away from zero, never each unit separately.
+"""
+
+
+def to_cents(amount) -> int:
+    """
+    Converts a dollar amount (int, float, str or Decimal) to whole cents.
+
+    Floats are rounded by their shortest decimal representation, so 1.005
+    becomes 101 cents even though the binary float is slightly below 1.005.
+
+    Raises:
+        ValueError: If the amount is infinite or not a number.
+    """
+    if isinstance(amount, int):
+        return amount * 100
+    if isinstance(amount, float):
+        scaled = amount * 100
+        if scaled - scaled != 0.0:
+            # inf - inf and nan - nan are both nan; finite values give 0.0.
+            raise ValueError(f"Amount must be a finite number, not {amount!r}")
+        cents = round(scaled)
+        # Only values that sit (almost) exactly on half a cent need the slow, exact path.
+        if abs(abs(scaled - cents) - 0.5) > 1e-6:
+            return cents
+        amount = repr(amount)
+    # decimal is imported here, not at the top, to keep it out of startup; it is rarely needed.
+    from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+    try:
+        amount = Decimal(amount)
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount {amount!r}") from None
+    if not amount.is_finite():
+        raise ValueError(f"Amount must be a finite number, not {amount!r}")
+    return int(amount.scaleb(2).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def from_cents(cents: int) -> float:
+    """Converts whole cents to a dollar amount."""
+    return cents / 100
+
+
+def divide_round(numerator: int, denominator: int) -> int:
+    """Divides two integers, rounding the quotient to the nearest integer, halves away from zero."""
+    if denominator <= 0:
+        raise ValueError("Denominator must be greater than zero")
+    if numerator >= 0:
+        return (2 * numerator + denominator) // (2 * denominator)
+    return -((-2 * numerator + denominator) // (2 * denominator))
+
+
+def to_basis_points(percent) -> int:
+    """Converts a percentage (e.g. 12.5) to hundredths of a percent (1250)."""
+    return to_cents(percent)
@@ -0,0 +1,272 @@
+"""
+Clients for the order service (see order_service.py).
+
+OrderClient holds one persistent connection. Besides one-request-at-a-time
+calls it can pipeline: pipeline() writes a whole list of requests in one
+send and then reads the responses, so a burst of orders costs one round trip
+instead of one per order. ConnectionPool shares a few connections between
+threads, so a multi-threaded program does not pay a connect per request.
+
+    pool = ConnectionPool(("127.0.0.1", 7480), size=8)
+    total, savings = pool.order([("MacBook Air M2", 1)])
+    with pool.connection() as client:
+        responses = client.pipeline([{"op": "quote", "lines": [["Google Pixel 7", n]]} for n in range(1, 50)])
+"""
+import queue
+import socket
+import threading
+from contextlib import contextmanager
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from order_service import FRAME_HEADER, MAX_FRAME_SIZE, ProtocolError, decode_payload, encode_frame
+
+Address = Union[Tuple[str, int], str]
+
+
+class OrderServiceError(ValueError):
+    """
+    A request the service answered with an error.
+
+    Attributes:
+        reason (str): The service's reason label, e.g. "insufficient_stock".
+    """
+
+    def __init__(self, message: str, reason: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+def _lines(shopping_list: Iterable[Tuple[str, int]]) -> List[list]:
+    """Converts (product name, quantity) pairs to the wire format."""
+    return [[name, quantity] for name, quantity in shopping_list]
+
+
+def _result(response: dict):
+    """Returns a response's result, raising its error if it failed."""
+    if not response.get("ok"):
+        raise OrderServiceError(response.get("error", "Request failed"),
+                                response.get("reason", ProtocolError.reason))
+    return response["result"]
+
+
+class OrderClient:
+    """
+    One persistent connection to the order service. Not thread-safe; use a
+    ConnectionPool to share connections between threads.
+    """
+
+    def __init__(self, address: Address, timeout: Optional[float] = 10.0):
+        """
+        Connects to the service.
+
+        Args:
+            address (Union[Tuple[str, int], str]): (host, port) for TCP, or a Unix socket path.
+            timeout (Optional[float]): Seconds to wait on the socket; None waits forever.
+        """
+        if isinstance(address, str):
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._socket.settimeout(timeout)
+        try:
+            self._socket.connect(address)
+        except OSError:
+            self._socket.close()
+            raise
+        self._buffer = bytearray()
+        self._next_id = 0
+        self.closed = False
+
+    def close(self) -> None:
+        """Closes the connection."""
+        self.closed = True
+        self._socket.close()
+
+    def __enter__(self) -> "OrderClient":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def _send(self, requests: Sequence[dict]) -> List[int]:
+        """Writes requests in one send, numbering them, and returns their ids."""
+        ids = []
+        frames = []
+        for request in requests:
+            self._next_id += 1
+            ids.append(self._next_id)
+            frames.append(encode_frame({**request, "id": self._next_id}))
+        try:
+            self._socket.sendall(b"".join(frames))
+        except OSError:
+            self.close()
+            raise
+        return ids
+
+    def _receive(self) -> dict:
+        """Reads one response frame."""
+        buffer = self._buffer
+        try:
+            while True:
+                if len(buffer) >= FRAME_HEADER.size:
+                    (length,) = FRAME_HEADER.unpack_from(buffer)
+                    if length > MAX_FRAME_SIZE:
+                        raise ProtocolError("Frame is too large")
+                    end = FRAME_HEADER.size + length
+                    if len(buffer) >= end:
+                        payload = bytes(buffer[FRAME_HEADER.size:end])
+                        del buffer[:end]
+                        return decode_payload(payload)
+                chunk = self._socket.recv(65536)
+                if not chunk:
+                    raise ConnectionError("The order service closed the connection")
+                buffer += chunk
+        except (OSError, ProtocolError):
+            self.close()
+            raise
+
+    def pipeline(self, requests: Sequence[dict]) -> List[dict]:
+        """
+        Sends many requests before reading any response.
+
+        Args:
+            requests (Sequence[dict]): Requests such as {"op": "order", "lines": [[name, 1]]}.
+
+        Returns:
+            List[dict]: The raw responses, in request order; failed requests have
+            "ok": false and are not raised.
+        """
+        ids = self._send(requests)
+        responses = []
+        for expected in ids:
+            response = self._receive()
+            if response.get("id") != expected:
+                self.close()
+                raise ProtocolError(f"Expected response {expected}, got {response.get('id')}")
+            responses.append(response)
+        return responses
+
+    def request(self, request: dict):
+        """Sends one request and returns its result, raising OrderServiceError if it failed."""
+        return _result(self.pipeline([request])[0])
+
+    def order(self, shopping_list: Iterable[Tuple[str, int]]) -> Tuple[float, float]:
+        """Places an order by product name; returns (total, savings) in dollars."""
+        result = self.request({"op": "order", "lines": _lines(shopping_list)})
+        return result["total"], result["savings"]
+
+    def quote(self, shopping_list: Iterable[Tuple[str, int]]) -> Tuple[float, float]:
+        """Prices an order without placing it; returns (total, savings) in dollars."""
+        result = self.request({"op": "quote", "lines": _lines(shopping_list)})
+        return result["total"], result["savings"]
+
+    def list_products(self, offset: int = 0, limit: int = 100, active: Optional[bool] = None) -> List[dict]:
+        """Returns one page of catalog entries."""
+        return self.request({"op": "list", "offset": offset, "limit": limit, "active": active})["products"]
+
+    def batch(self, requests: Sequence[dict]) -> List[dict]:
+        """Sends requests as one batch frame and returns their raw responses."""
+        return self.request({"op": "batch", "requests": list(requests)})
+
+    def stats(self) -> dict:
+        """Returns the service's counters."""
+        return self.request({"op": "stats"})
+
+
+class ConnectionPool:
+    """
+    A thread-safe pool of OrderClient connections to one service.
+
+    Connections are opened on demand, up to size, and reused; a caller that
+    finds all of them busy waits for one. A connection that fails is dropped
+    rather than returned to the pool.
+    """
+
+    def __init__(self, address: Address, size: int = 8, timeout: Optional[float] = 10.0):
+        """
+        Initializes the pool; no connection is opened yet.
+
+        Raises:
+            ValueError: If the size is not positive.
+        """
+        if size <= 0:
+            raise ValueError("Pool size must be greater than zero")
+        self.address = address
+        self.size = size
+        self._timeout = timeout
+        self._idle: "queue.LifoQueue[OrderClient]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._opened = 0
+        self._closed = False
+
+    @contextmanager
+    def connection(self) -> Iterator[OrderClient]:
+        """Borrows a connection for the duration of a with block."""
+        client = self._acquire()
+        try:
+            yield client
+        finally:
+            if client.closed or self._closed:
+                client.close()
+                with self._lock:
+                    self._opened -= 1
+            else:
+                self._idle.put(client)
+
+    def _acquire(self) -> OrderClient:
+        wait = 0.0
+        while True:
+            if self._closed:
+                raise ValueError("The connection pool is closed")
+            try:
+                return self._idle.get(timeout=wait) if wait else self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            with self._lock:
+                opening = self._opened < self.size
+                if opening:
+                    self._opened += 1
+            if opening:
+                break
+            # A dropped connection frees a slot without waking waiters, so look again shortly.
+            wait = 0.05
+        try:
+            return OrderClient(self.address, self._timeout)
+        except OSError:
+            with self._lock:
+                self._opened -= 1
+            raise
+
+    def order(self, shopping_list: Iterable[Tuple[str, int]]) -> Tuple[float, float]:
+        """Places an order over a pooled connection."""
+        with self.connection() as client:
+            return client.order(shopping_list)
+
+    def quote(self, shopping_list: Iterable[Tuple[str, int]]) -> Tuple[float, float]:
+        """Prices an order over a pooled connection."""
+        with self.connection() as client:
+            return client.quote(shopping_list)
+
+    def pipeline(self, requests: Sequence[dict]) -> List[dict]:
+        """Pipelines requests over a pooled connection."""
+        with self.connection() as client:
+            return client.pipeline(requests)
+
+    def close(self) -> None:
+        """Closes idle connections; borrowed ones are closed when returned."""
+        self._closed = True
+        while True:
+            try:
+                client = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            client.close()
+            with self._lock:
+                self._opened -= 1
+
+    def __enter__(self) -> "ConnectionPool":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
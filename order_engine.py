@@ -0,0 +1,97 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from products import Product
+from reservations import Reservation
+from store import Store
+
+
+class ConcurrentOrderEngine:
+    """
+    Runs Store orders from many threads without overselling.
+
+    Each product maps to one of a fixed number of lock stripes. An order takes
+    the stripes of all its products in ascending stripe order, so two orders
+    never wait on each other in a cycle, and orders on disjoint products do
+    not queue behind one store-wide lock. The pricing and stock updates are
+    Python code that holds the GIL, so CPU-bound orders do not run faster on
+    more threads; what the engine buys is that threads which also block (on
+    I/O, for instance) can place orders concurrently without overselling.
+
+    All stock-changing calls on the store must go through the engine while it
+    is in use; the locks only protect callers that share them.
+
+    Attributes:
+        store (Store): The store whose orders are processed.
+    """
+
+    def __init__(self, store: Store, max_workers: Optional[int] = None, stripes: int = 64):
+        """
+        Initializes the engine.
+
+        Args:
+            store (Store): The store whose orders are processed.
+            max_workers (Optional[int]): Thread-pool size for submit_order(); defaults to
+                the ThreadPoolExecutor default.
+            stripes (int): The number of product locks. More stripes mean fewer false
+                conflicts between unrelated products.
+        """
+        if stripes <= 0:
+            raise ValueError("The number of lock stripes must be greater than zero")
+        self.store = store
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="order-engine")
+
+    def _stripes_for(self, products) -> List[int]:
+        """Returns the sorted, distinct stripe numbers covering the given products."""
+        # Objects are at least 16-byte aligned, so drop the low bits of id() first.
+        stripe_count = len(self._locks)
+        return sorted({(id(product) >> 4) % stripe_count for product in products})
+
+    def _run_locked(self, products, action):
+        """Calls action() while holding the stripes of every given product."""
+        acquired = [self._locks[stripe] for stripe in self._stripes_for(products)]
+        for lock in acquired:
+            lock.acquire()
+        try:
+            return action()
+        finally:
+            for lock in reversed(acquired):
+                lock.release()
+
+    def order(self, shopping_list: List[Tuple[Product, int]]) -> Tuple[float, float]:
+        """Processes an order on the calling thread, with the same result as Store.order()."""
+        return self._run_locked((product for product, _ in shopping_list),
+                                lambda: self.store.order(shopping_list))
+
+    def submit_order(self, shopping_list: List[Tuple[Product, int]]) -> Future:
+        """
+        Queues an order on the thread pool.
+
+        Returns:
+            Future: Resolves to (total_price, total_savings), or raises the order's ValueError.
+        """
+        return self._executor.submit(self.order, list(shopping_list))
+
+    def reserve(self, shopping_list: List[Tuple[Product, int]],
+                timeout: Optional[float] = None) -> Reservation:
+        """Holds stock for a later checkout, as Store.reserve() does."""
+        return self._run_locked((product for product, _ in shopping_list),
+                                lambda: self.store.reserve(shopping_list, timeout))
+
+    def commit_reservation(self, reservation: Reservation) -> Tuple[float, float]:
+        """Buys a reservation's lines, as Reservation.commit() does."""
+        return self._run_locked((product for product, _ in reservation.lines),
+                                lambda: self.store.commit_reservation(reservation))
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stops the thread pool, optionally waiting for queued orders to finish."""
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self) -> "ConcurrentOrderEngine":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.shutdown()
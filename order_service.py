@@ -0,0 +1,366 @@
+"""
+A long-lived order service: a Store served over a local socket.
+
+Clients keep a connection open and exchange frames: a 4-byte little-endian
+payload length followed by a UTF-8 JSON object. Each request names an
+operation and may carry an id, which is echoed in its response:
+
+    {"id": 1, "op": "order", "lines": [["MacBook Air M2", 2], ["Shipping", 1]]}
+    {"id": 1, "ok": true, "result": {"total": 2185.0, "savings": 725.0}}
+    {"id": 2, "ok": false, "error": "Not enough quantity in stock", "reason": "insufficient_stock"}
+
+Operations:
+    order, quote: "lines" is a list of [product name, quantity] pairs; the result
+        holds the total and savings in dollars.
+    list: one page of the catalog ("offset", "limit", optional "active").
+    batch: "requests" is a list of requests, answered by a list of responses.
+    stats, ping.
+
+A failed request is answered with a reason: the PurchaseError reason of a
+refused order, "unknown_product", "invalid_request", or "internal_error" for
+a failure inside the service. Only that request fails; the connection and the
+requests pipelined around it carry on.
+
+Requests are pipelined: a client may send many before reading any
+responses, and each connection's responses come back in request order.
+Every request is handled on the event loop's thread, so the store is only
+ever touched by one request at a time, as with AsyncStore.
+
+    python order_service.py --port 7480
+    python order_service.py --unix /tmp/best_buy.sock --catalog catalog.img
+
+See order_client.py for a client with a connection pool.
+"""
+import argparse
+import asyncio
+import json
+import os
+import struct
+import sys
+import time
+from itertools import islice
+from typing import List, Optional, Tuple, Union
+
+from products import LimitedProduct, NonStockedProduct, Product
+from store import Store
+
+# payload length; the payload is a UTF-8 JSON object
+FRAME_HEADER = struct.Struct("<I")
+MAX_FRAME_SIZE = 16 * 1024 * 1024
+DEFAULT_PORT = 7480
+_READ_SIZE = 256 * 1024
+# Responses are left to the transport until this much is waiting to be sent.
+_WRITE_HIGH_WATER = 256 * 1024
+
+
+class ProtocolError(ValueError):
+    """A frame or request that the service cannot interpret."""
+
+    reason = "invalid_request"
+
+
+# The reason given for a request that failed inside the service.
+INTERNAL_ERROR = "internal_error"
+
+
+def encode_frame(message: dict) -> bytes:
+    """Serializes a message into one length-prefixed frame."""
+    payload = json.dumps(message, separators=(",", ":")).encode("utf-8")
+    if len(payload) > MAX_FRAME_SIZE:
+        raise ProtocolError("Message is too large")
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+
+def decode_payload(payload: bytes) -> dict:
+    """Parses a frame payload into a message."""
+    try:
+        message = json.loads(payload)
+    except (UnicodeDecodeError, json.JSONDecodeError) as error:
+        raise ProtocolError(f"Invalid JSON: {error}") from None
+    if not isinstance(message, dict):
+        raise ProtocolError("A message must be a JSON object")
+    return message
+
+
+def _product_row(number: int, product: Product, active: bool) -> dict:
+    """Describes a catalog entry for the list operation."""
+    if isinstance(product, NonStockedProduct):
+        kind = "non_stocked"
+    elif isinstance(product, LimitedProduct):
+        kind = "limited"
+    else:
+        kind = "product"
+    row = {"number": number, "name": product.name, "price": product.price, "quantity": product.quantity,
+           "kind": kind, "active": active,
+           "promotion": product.promotion.name if product.promotion else None}
+    if kind == "limited":
+        row["maximum"] = product.maximum
+    return row
+
+
+class OrderService:
+    """
+    Serves a Store to local clients over TCP (localhost) or a Unix socket.
+
+    Attributes:
+        store (Store): The store being served.
+        address (Union[Tuple[str, int], str, None]): The bound (host, port) or socket path,
+            once started.
+    """
+
+    def __init__(self, store: Store, host: str = "127.0.0.1", port: int = DEFAULT_PORT,
+                 path: Optional[str] = None, max_list: int = 1000):
+        """
+        Initializes the service. Call start() (or use ``async with``) to listen.
+
+        Args:
+            store (Store): The store to serve.
+            host (str): The TCP host; the service is meant for localhost.
+            port (int): The TCP port; 0 picks a free one.
+            path (Optional[str]): Listen on this Unix socket instead of TCP.
+            max_list (int): The largest page the list operation returns.
+        """
+        self.store = store
+        self.address: Union[Tuple[str, int], str, None] = None
+        self._host, self._port, self._path = host, port, path
+        self._max_list = max_list
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._operations = {"order": self._order, "quote": self._quote, "list": self._list,
+                            "batch": self._batch, "stats": self._stats, "ping": lambda request: "pong"}
+        self._started_at = 0.0
+        self._connections = 0
+        self._open_connections = 0
+        self._requests = 0
+        self._errors = 0
+
+    async def start(self) -> None:
+        """Starts listening on the running event loop."""
+        if self._server is not None:
+            return
+        if self._path is not None:
+            if os.path.exists(self._path):
+                os.unlink(self._path)
+            self._server = await asyncio.start_unix_server(self._serve_connection, path=self._path)
+            self.address = self._path
+        else:
+            self._server = await asyncio.start_server(self._serve_connection, self._host, self._port)
+            self.address = self._server.sockets[0].getsockname()[:2]
+        self._started_at = time.perf_counter()
+
+    async def close(self) -> None:
+        """Stops accepting connections and closes the open ones."""
+        if self._server is None:
+            return
+        self._server.close()
+        # Python 3.12+ wait_closed() waits for open connections too; ask them to stop first.
+        if hasattr(self._server, "close_clients"):
+            self._server.close_clients()
+        await self._server.wait_closed()
+        self._server = None
+        if self._path is not None and os.path.exists(self._path):
+            os.unlink(self._path)
+
+    async def serve_forever(self) -> None:
+        """Serves until cancelled."""
+        await self.start()
+        await self._server.serve_forever()
+
+    async def __aenter__(self) -> "OrderService":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.close()
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Answers one client's frames in order until it disconnects."""
+        self._connections += 1
+        self._open_connections += 1
+        transport = writer.transport
+        header_size, unpack_from = FRAME_HEADER.size, FRAME_HEADER.unpack_from
+        buffer = bytearray()
+        responses: List[bytes] = []
+        try:
+            while True:
+                chunk = await reader.read(_READ_SIZE)
+                if not chunk:
+                    break
+                buffer += chunk
+                # Answer every complete frame that arrived, pipelined ones included, in one write.
+                position = 0
+                while len(buffer) - position >= header_size:
+                    (length,) = unpack_from(buffer, position)
+                    if length > MAX_FRAME_SIZE:
+                        responses.append(encode_frame({"ok": False, "error": "Frame is too large",
+                                                       "reason": ProtocolError.reason}))
+                        return
+                    end = position + header_size + length
+                    if len(buffer) < end:
+                        break
+                    responses.append(self.handle_payload(bytes(buffer[position + header_size:end])))
+                    position = end
+                del buffer[:position]
+                if responses:
+                    writer.write(b"".join(responses))
+                    responses.clear()
+                # The transport sends as it can; only wait when a slow reader lets replies pile up.
+                if transport.get_write_buffer_size() > _WRITE_HIGH_WATER:
+                    await writer.drain()
+        except ConnectionError:
+            responses.clear()
+        finally:
+            # Requests already answered may have changed the store; their clients must hear so.
+            if responses and not writer.is_closing():
+                writer.write(b"".join(responses))
+            self._open_connections -= 1
+            writer.close()
+
+    def handle_payload(self, payload: bytes) -> bytes:
+        """Answers one request frame payload with a response frame."""
+        try:
+            request = decode_payload(payload)
+        except ProtocolError as error:
+            self._requests += 1
+            self._errors += 1
+            return encode_frame({"ok": False, "error": str(error), "reason": error.reason})
+        response = self.handle(request)
+        try:
+            return encode_frame(response)
+        except (ProtocolError, TypeError, ValueError) as error:
+            # e.g. a batch whose responses outgrow a frame; the work is done, so say so.
+            failed = {"id": response["id"]} if "id" in response else {}
+            self._fail(failed, str(error), getattr(error, "reason", INTERNAL_ERROR))
+            return encode_frame(failed)
+
+    def handle(self, request: dict) -> dict:
+        """Answers one decoded request."""
+        self._requests += 1
+        response = {"id": request["id"]} if "id" in request else {}
+        op = request.get("op")
+        try:
+            operation = self._operations.get(op) if isinstance(op, str) else None
+            if operation is None:
+                raise ProtocolError(f"Unknown operation {op!r}")
+            result = operation(request)
+            response["ok"] = True
+            response["result"] = result
+        except ValueError as error:
+            self._fail(response, str(error), getattr(error, "reason", ProtocolError.reason))
+        except Exception as error:
+            # One bad request must not cost the connection the responses around it.
+            self._fail(response, f"{type(error).__name__}: {error}", INTERNAL_ERROR)
+        return response
+
+    def _fail(self, response: dict, message: str, reason: str) -> None:
+        self._errors += 1
+        response["ok"] = False
+        response["error"] = message
+        response["reason"] = reason
+
+    def _resolve(self, request: dict) -> List[Tuple[Product, int]]:
+        """Turns a request's [name, quantity] lines into a shopping list."""
+        lines = request.get("lines")
+        if not isinstance(lines, list):
+            raise ProtocolError("Lines must be a list of [product name, quantity] pairs")
+        shopping_list = []
+        for line in lines:
+            if not (isinstance(line, list) and len(line) == 2 and isinstance(line[0], str)
+                    and type(line[1]) is int):
+                raise ProtocolError("Lines must be a list of [product name, quantity] pairs")
+            product = self.store.get_product(line[0])
+            if product is None:
+                error = ValueError(f"Product {line[0]} is not in the store.")
+                error.reason = "unknown_product"
+                raise error
+            shopping_list.append((product, line[1]))
+        return shopping_list
+
+    def _order(self, request: dict) -> dict:
+        total, savings = self.store.order(self._resolve(request))
+        return {"total": total, "savings": savings}
+
+    def _quote(self, request: dict) -> dict:
+        total, savings = self.store.quote(self._resolve(request))
+        return {"total": total, "savings": savings}
+
+    def _list(self, request: dict) -> dict:
+        offset, limit, active = request.get("offset", 0), request.get("limit", 100), request.get("active")
+        if type(offset) is not int or type(limit) is not int or offset < 0 or limit < 0:
+            raise ProtocolError("Offset and limit must be non-negative integers")
+        if active is not None and not isinstance(active, bool):
+            raise ProtocolError("Active must be true, false or null")
+        store, stop = self.store, offset + min(limit, self._max_list)
+        products = store.product_list
+        if active is None:
+            # Unfiltered pages are slices, so deep pages cost no more than the first.
+            matches = ((number, product, store.is_available(product))
+                       for number, product in enumerate(products[offset:stop], start=offset + 1))
+        else:
+            matches = ((number, product, store.is_available(product))
+                       for number, product in enumerate(products, start=1))
+            matches = islice((match for match in matches if match[2] == active), offset, stop)
+        rows = [_product_row(*match) for match in matches]
+        return {"count": len(store), "products": rows}
+
+    def _batch(self, request: dict) -> List[dict]:
+        requests = request.get("requests")
+        if not isinstance(requests, list) or not all(isinstance(item, dict) for item in requests):
+            raise ProtocolError("Requests must be a list of request objects")
+        if any(item.get("op") == "batch" for item in requests):
+            raise ProtocolError("Batches cannot be nested")
+        return [self.handle(item) for item in requests]
+
+    def _stats(self, request: dict) -> dict:
+        return self.stats()
+
+    def stats(self) -> dict:
+        """Returns connection and request counters."""
+        elapsed = time.perf_counter() - self._started_at if self._started_at else 0.0
+        return {
+            "connections": self._connections,
+            "open_connections": self._open_connections,
+            "requests": self._requests,
+            "errors": self._errors,
+            "uptime_seconds": elapsed,
+            "products": len(self.store),
+        }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="TCP port; 0 picks a free one")
+    parser.add_argument("--unix", metavar="PATH", help="Listen on a Unix socket instead of TCP")
+    parser.add_argument("--catalog", help="Serve this catalog image instead of the demo catalog")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.catalog:
+            from persistence import load_image
+            store = load_image(args.catalog)
+        else:
+            from main import default_products
+            store = Store(default_products())
+    except (OSError, ValueError) as error:
+        print(f"error: {error}", file=sys.stderr)
+        return 2
+
+    async def serve() -> None:
+        service = OrderService(store, host=args.host, port=args.port, path=args.unix)
+        await service.start()
+        address = service.address if isinstance(service.address, str) else "%s:%d" % service.address
+        print(f"Serving {len(store):,} products on {address}", flush=True)
+        try:
+            await service.serve_forever()
+        finally:
+            await service.close()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
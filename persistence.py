@@ -0,0 +1,580 @@
+import gc
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from typing import List, Optional, Tuple, Union
+
+from money import from_cents
+from columnar_store import ColumnarStore, KIND_PRODUCT, KIND_NON_STOCKED, KIND_LIMITED
+from products import Product, NonStockedProduct, LimitedProduct
+from promotions import Promotion, PercentDiscount, SecondHalfPrice, ThirdOneFree
+from store import Store
+
+SNAPSHOT_MAGIC = b"BBSNAP\x00\x02"
+# magic, little-endian flag, product count, promotion count, size of the name blob,
+# log generation the snapshot was taken at
+_SNAPSHOT_HEADER = struct.Struct("<8sB3xIIQQ")
+# promotion type code, percent, name length
+_PROMOTION_RECORD = struct.Struct("<BdH")
+# (typecode, attribute) of each column, in file order; prices are whole cents
+_COLUMNS = (("q", "prices"), ("q", "quantities"), ("q", "maximums"),
+            ("i", "promotion_ids"), ("b", "kinds"), ("b", "active"))
+
+IMAGE_MAGIC = b"BBIMG\x00\x00\x01"
+# a catalog image adds each product's promotional stock value, in cents
+_IMAGE_COLUMNS = _COLUMNS + (("q", "promotional"),)
+_KIND_OF_MAGIC = {SNAPSHOT_MAGIC: "catalog snapshot", IMAGE_MAGIC: "catalog image"}
+
+_PROMOTION_CODES = {PercentDiscount: 1, SecondHalfPrice: 2, ThirdOneFree: 3}
+_PROMOTION_TYPES = {code: promotion_type for promotion_type, code in _PROMOTION_CODES.items()}
+
+LOG_MAGIC = b"BBLOG\x00\x00\x02"
+# magic, generation
+_LOG_HEADER = struct.Struct("<8sQ")
+# payload length, CRC-32 of the payload
+_FRAME = struct.Struct("<II")
+OP_ORDER = 1
+OP_RESTOCK = 2
+OP_PRICE = 3
+_ORDER_HEADER = struct.Struct("<BI")
+_ORDER_LINE = struct.Struct("<Hq")
+_RESTOCK = struct.Struct("<BHq")
+_PRICE = struct.Struct("<BHq")
+
+
+def _encode_promotion(promotion: Promotion) -> bytes:
+    """Serializes one promotion for the snapshot's promotion table."""
+    code = _PROMOTION_CODES.get(type(promotion))
+    if code is None:
+        raise ValueError(f"Cannot persist promotion of type {type(promotion).__name__}")
+    name = promotion.name.encode("utf-8")
+    return _PROMOTION_RECORD.pack(code, getattr(promotion, "percent", 0.0), len(name)) + name
+
+
+def _decode_promotion(code: int, percent: float, name: str) -> Promotion:
+    """Rebuilds a promotion from its snapshot record."""
+    promotion_type = _PROMOTION_TYPES.get(code)
+    if promotion_type is None:
+        raise ValueError(f"Unknown promotion type code {code} in snapshot")
+    if promotion_type is PercentDiscount:
+        return PercentDiscount(name, percent=percent)
+    return promotion_type(name)
+
+
+def _store_columns(store: Store) -> Tuple:
+    """Converts an object Store into the same column tuple ColumnarStore.columns() returns."""
+    names, promotions, promotion_ids_by_object = [], [], {}
+    prices, quantities, active = array("q"), array("q"), array("b")
+    kinds, maximums, promotion_ids = array("b"), array("q"), array("i")
+    for product in store.product_list:
+        names.append(product.name)
+        prices.append(product.price_cents)
+        quantities.append(product.quantity)
+        active.append(1 if product.is_active() else 0)
+        if isinstance(product, NonStockedProduct):
+            kinds.append(KIND_NON_STOCKED)
+            maximums.append(0)
+        elif isinstance(product, LimitedProduct):
+            kinds.append(KIND_LIMITED)
+            maximums.append(product.maximum)
+        else:
+            kinds.append(KIND_PRODUCT)
+            maximums.append(0)
+        promotion = product.promotion
+        if promotion is None:
+            promotion_ids.append(-1)
+        else:
+            if id(promotion) not in promotion_ids_by_object:
+                promotion_ids_by_object[id(promotion)] = len(promotions)
+                promotions.append(promotion)
+            promotion_ids.append(promotion_ids_by_object[id(promotion)])
+    return names, prices, quantities, active, kinds, maximums, promotion_ids, promotions
+
+
+def _write_catalog(path: str, magic: bytes, layout: Tuple, names: List[str], columns: dict,
+                   promotions: List[Promotion], generation: int) -> None:
+    """
+    Writes a header, the promotion table, one block per column of the layout and
+    the name blob to a temporary file, then renames it into place.
+    """
+    if any("\0" in name for name in names):
+        raise ValueError("Product names cannot contain NUL characters")
+    name_blob = "\0".join(names).encode("utf-8")
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "wb") as snapshot:
+        snapshot.write(_SNAPSHOT_HEADER.pack(magic, sys.byteorder == "little",
+                                             len(names), len(promotions), len(name_blob),
+                                             generation))
+        for promotion in promotions:
+            snapshot.write(_encode_promotion(promotion))
+        for typecode, attribute in layout:
+            column = columns[attribute]
+            if column.typecode != typecode:
+                column = array(typecode, column)
+            column.tofile(snapshot)
+        snapshot.write(name_blob)
+        snapshot.flush()
+        os.fsync(snapshot.fileno())
+    os.replace(temporary_path, path)
+
+
+def save_snapshot(store: Union[Store, ColumnarStore], path: str, generation: int = 0) -> None:
+    """
+    Writes a store's catalog to a binary snapshot file.
+
+    The file holds a header, the promotion table, one contiguous block per
+    column and a NUL-separated name blob, so loading is mostly memory copies.
+    It is written to a temporary file and renamed into place, so a crash never
+    leaves a half-written snapshot behind.
+
+    Args:
+        store (Union[Store, ColumnarStore]): The store to save.
+        path (str): The snapshot file to write.
+        generation (int): The log generation whose records come after this snapshot.
+
+    Raises:
+        ValueError: If a promotion type cannot be persisted or a name contains NUL.
+    """
+    if isinstance(store, ColumnarStore):
+        columns = store.columns()
+    else:
+        columns = _store_columns(store)
+    names, prices, quantities, active, kinds, maximums, promotion_ids, promotions = columns
+    by_attribute = {"prices": prices, "quantities": quantities, "maximums": maximums,
+                    "promotion_ids": promotion_ids, "kinds": kinds, "active": active}
+    _write_catalog(path, SNAPSHOT_MAGIC, _COLUMNS, names, by_attribute, promotions, generation)
+
+
+def save_image(store: Store, path: str) -> None:
+    """
+    Writes a store to a catalog image, the fast way to start a Store-based program.
+
+    An image is a snapshot that also holds what the store would otherwise compute
+    for every product on load: the value of its stock with its promotion
+    applied. load_image() adopts those values and rebuilds the products without
+    validation, so prefer an image over building a large catalog in Python (or
+    loading a snapshot) at startup. Build it once, e.g. with
+    ``python main.py --save-catalog catalog.img``.
+
+    Raises:
+        ValueError: If a promotion type cannot be persisted or a name contains NUL.
+    """
+    names, prices, quantities, active, kinds, maximums, promotion_ids, promotions = _store_columns(store)
+    promotional = array("q", (product.price_for_cents(product.quantity) if product.quantity else 0
+                              for product in store.product_list))
+    by_attribute = {"prices": prices, "quantities": quantities, "maximums": maximums,
+                    "promotion_ids": promotion_ids, "kinds": kinds, "active": active,
+                    "promotional": promotional}
+    _write_catalog(path, IMAGE_MAGIC, _IMAGE_COLUMNS, names, by_attribute, promotions, 0)
+
+
+def _read_catalog(path: str, magic: bytes, layout: Tuple) -> Tuple:
+    """
+    Memory-maps a file written by _write_catalog() and decodes it.
+
+    Returns:
+        Tuple: The generation, the promotions, the columns by attribute and the names.
+
+    Raises:
+        ValueError: If the file does not start with the magic or is truncated.
+    """
+    with open(path, "rb") as snapshot_file:
+        if os.fstat(snapshot_file.fileno()).st_size < _SNAPSHOT_HEADER.size:
+            raise ValueError(f"{path} is not a {_KIND_OF_MAGIC[magic]}")
+        with mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                return _parse_catalog(view, path, magic, layout)
+            finally:
+                view.release()
+
+
+def load_snapshot(path: str, columnar: bool = False) -> Union[Store, ColumnarStore]:
+    """
+    Loads a snapshot written by save_snapshot().
+
+    The file is memory-mapped and each column is copied straight into an
+    array. With ``columnar=True`` those arrays are adopted by a ColumnarStore
+    as-is, which is the fast path for large catalogs; otherwise Product,
+    NonStockedProduct and LimitedProduct objects are built for a Store.
+
+    Raises:
+        ValueError: If the file is not a snapshot or is truncated.
+    """
+    _, promotions, columns, names = _read_catalog(path, SNAPSHOT_MAGIC, _COLUMNS)
+    if columnar:
+        return ColumnarStore.from_columns(names, columns["prices"], columns["quantities"],
+                                          columns["active"], columns["kinds"], columns["maximums"],
+                                          columns["promotion_ids"], promotions)
+    return Store(_build_products(names, columns, promotions))
+
+
+def load_image(path: str) -> Store:
+    """
+    Loads a catalog image written by save_image().
+
+    Products come back with their promotions attached (promotions shared in
+    the saved store are shared again) and the store adopts the saved
+    promotional values instead of recomputing them.
+
+    Raises:
+        ValueError: If the file is not a catalog image or is truncated.
+    """
+    _, promotions, columns, names = _read_catalog(path, IMAGE_MAGIC, _IMAGE_COLUMNS)
+    # Every product is a new tracked object, so the cyclic collector would run over
+    # and over while the catalog is built without finding any garbage.
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        return Store.restore(_build_products(names, columns, promotions), columns["promotional"])
+    finally:
+        if collecting:
+            gc.enable()
+
+
+def snapshot_generation(path: str) -> int:
+    """Returns the log generation recorded in a snapshot's header."""
+    with open(path, "rb") as snapshot_file:
+        header = snapshot_file.read(_SNAPSHOT_HEADER.size)
+    if len(header) < _SNAPSHOT_HEADER.size or header[:8] != SNAPSHOT_MAGIC:
+        raise ValueError(f"{path} is not a catalog snapshot")
+    return _SNAPSHOT_HEADER.unpack(header)[-1]
+
+
+def _parse_catalog(view: memoryview, path: str, magic: bytes, layout: Tuple) -> Tuple:
+    """Decodes a memory-mapped snapshot or image."""
+    file_magic, little_endian, product_count, promotion_count, names_size, generation = \
+        _SNAPSHOT_HEADER.unpack_from(view, 0)
+    if file_magic != magic:
+        raise ValueError(f"{path} is not a {_KIND_OF_MAGIC[magic]}")
+    offset = _SNAPSHOT_HEADER.size
+
+    promotions = []
+    for _ in range(promotion_count):
+        code, percent, name_length = _PROMOTION_RECORD.unpack_from(view, offset)
+        offset += _PROMOTION_RECORD.size
+        name = bytes(view[offset:offset + name_length]).decode("utf-8")
+        offset += name_length
+        promotions.append(_decode_promotion(code, percent, name))
+
+    columns = {}
+    swap = bool(little_endian) != (sys.byteorder == "little")
+    for typecode, attribute in layout:
+        column = array(typecode)
+        size = column.itemsize * product_count
+        if offset + size > len(view):
+            raise ValueError(f"{path} is truncated")
+        column.frombytes(view[offset:offset + size])
+        if swap:
+            column.byteswap()
+        columns[attribute] = column
+        offset += size
+    if offset + names_size > len(view):
+        raise ValueError(f"{path} is truncated")
+    names = bytes(view[offset:offset + names_size]).decode("utf-8").split("\0") if product_count else []
+    return generation, promotions, columns, names
+
+
+def _build_products(names: List[str], columns: dict, promotions: List[Promotion]) -> List[Product]:
+    """Rebuilds the product objects of a snapshot or image; the data was validated when saved."""
+    products = []
+    append = products.append
+    restore_product, restore_non_stocked = Product.restore, NonStockedProduct.restore
+    restore_limited = LimitedProduct.restore
+    for name, price, quantity, maximum, promotion_id, kind, active in zip(
+            names, *(columns[attribute] for _, attribute in _COLUMNS)):
+        promotion = promotions[promotion_id] if promotion_id >= 0 else None
+        if kind == KIND_NON_STOCKED:
+            append(restore_non_stocked(name, price, 0, active == 1, promotion))
+        elif kind == KIND_LIMITED:
+            append(restore_limited(name, price, quantity, maximum, active == 1, promotion))
+        else:
+            append(restore_product(name, price, quantity, active == 1, promotion))
+    return products
+
+
+def _encode_name(name: str) -> bytes:
+    """Encodes a product name for a log record."""
+    encoded = name.encode("utf-8")
+    if len(encoded) > 0xFFFF:
+        raise ValueError("Product name is too long to log")
+    return encoded
+
+
+def encode_order(shopping_list: List[Tuple[Product, int]]) -> bytes:
+    """Encodes an order as a log payload."""
+    parts = [_ORDER_HEADER.pack(OP_ORDER, len(shopping_list))]
+    for product, quantity in shopping_list:
+        name = _encode_name(product.name)
+        parts.append(_ORDER_LINE.pack(len(name), quantity))
+        parts.append(name)
+    return b"".join(parts)
+
+
+def decode_record(payload: bytes) -> Tuple:
+    """
+    Decodes a log payload.
+
+    Returns:
+        Tuple: (OP_ORDER, [(name, quantity), ...]), (OP_RESTOCK, name, amount)
+        or (OP_PRICE, name, price in cents).
+    """
+    op = payload[0]
+    if op == OP_ORDER:
+        _, line_count = _ORDER_HEADER.unpack_from(payload, 0)
+        offset = _ORDER_HEADER.size
+        lines = []
+        for _ in range(line_count):
+            name_length, quantity = _ORDER_LINE.unpack_from(payload, offset)
+            offset += _ORDER_LINE.size
+            lines.append((payload[offset:offset + name_length].decode("utf-8"), quantity))
+            offset += name_length
+        return OP_ORDER, lines
+    if op in (OP_RESTOCK, OP_PRICE):
+        record = _RESTOCK if op == OP_RESTOCK else _PRICE
+        _, name_length, value = record.unpack_from(payload, 0)
+        name = payload[record.size:record.size + name_length].decode("utf-8")
+        return op, name, value
+    raise ValueError(f"Unknown log operation {op}")
+
+
+def read_log(path: str, magic: bytes = LOG_MAGIC) -> Tuple[int, List[bytes], int]:
+    """
+    Reads every intact record from a log file.
+
+    Reading stops at the first record that is cut short or fails its checksum,
+    which is where a crash interrupted a write.
+
+    Args:
+        path (str): The log file.
+        magic (bytes): The 8-byte file signature to expect.
+
+    Returns:
+        Tuple[int, List[bytes], int]: The log generation (-1 if the file is missing or
+        has no valid header), the record payloads and the byte length of the intact prefix.
+    """
+    if not os.path.exists(path):
+        return -1, [], 0
+    with open(path, "rb") as log_file:
+        data = log_file.read()
+    if len(data) < _LOG_HEADER.size or data[:8] != magic:
+        return -1, [], 0
+    generation = _LOG_HEADER.unpack_from(data, 0)[1]
+    records = []
+    offset = _LOG_HEADER.size
+    while offset + _FRAME.size <= len(data):
+        length, checksum = _FRAME.unpack_from(data, offset)
+        start = offset + _FRAME.size
+        payload = data[start:start + length]
+        if len(payload) < length or zlib.crc32(payload) != checksum:
+            break
+        records.append(payload)
+        offset = start + length
+    return generation, records, offset
+
+
+class OrderLog:
+    """
+    An append-only write-ahead log with group commit.
+
+    Records are framed with their length and CRC-32 and buffered in memory.
+    Every ``group_size`` records (or on flush()) the buffer is written with
+    one write() and, unless disabled, one fsync(), so the cost of a disk sync
+    is shared by the whole group. Records in an unflushed group are lost if
+    the process dies.
+
+    The file starts with a generation number. A snapshot records the
+    generation that follows it, so after a checkpoint the old log is
+    recognised as already folded in, even if the process died before it
+    could be emptied.
+    """
+
+    def __init__(self, path: str, generation: int = 0, group_size: int = 32, fsync: bool = True,
+                 magic: bytes = LOG_MAGIC):
+        """
+        Opens (or creates) a log for appending.
+
+        Args:
+            path (str): The log file.
+            generation (int): The generation to write if the file is new or empty.
+            group_size (int): Records per group commit; 1 makes every record durable at once.
+            fsync (bool): Whether group commits call os.fsync().
+            magic (bytes): The 8-byte file signature, for other files that reuse this framing.
+        """
+        if group_size <= 0:
+            raise ValueError("Group size must be greater than zero")
+        if len(magic) != 8:
+            raise ValueError("Log magic must be 8 bytes")
+        self.path = path
+        self.group_size = group_size
+        self.magic = magic
+        self._fsync = fsync
+        self._file = open(path, "ab")
+        self._pending = bytearray()
+        self._pending_records = 0
+        if self._file.tell() == 0:
+            self._write_header(generation)
+
+    def _write_header(self, generation: int) -> None:
+        """Writes the generation header to an empty file."""
+        self._file.write(_LOG_HEADER.pack(self.magic, generation))
+        self._file.flush()
+        if self._fsync:
+            os.fsync(self._file.fileno())
+
+    def append(self, payload: bytes) -> None:
+        """Buffers one record, committing the group when it is full."""
+        self._pending += _FRAME.pack(len(payload), zlib.crc32(payload))
+        self._pending += payload
+        self._pending_records += 1
+        if self._pending_records >= self.group_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes and syncs every buffered record."""
+        if not self._pending:
+            return
+        self._file.write(self._pending)
+        self._file.flush()
+        if self._fsync:
+            os.fsync(self._file.fileno())
+        self._pending.clear()
+        self._pending_records = 0
+
+    def truncate(self, generation: int) -> None:
+        """Discards the whole log, including buffered records, and starts a new generation."""
+        self._pending.clear()
+        self._pending_records = 0
+        self._file.truncate(0)
+        self._write_header(generation)
+
+    def close(self) -> None:
+        """Flushes buffered records and closes the file."""
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+
+class PersistentStore:
+    """
+    A Store whose stock and price changes survive restarts.
+
+    State is a snapshot plus a write-ahead log of the orders, restocks and
+    price changes made since. open() loads the snapshot and replays the log;
+    checkpoint() folds the log into a fresh snapshot. Only changes made
+    through this class are logged.
+
+    Attributes:
+        store (Store): The live in-memory store.
+    """
+
+    SNAPSHOT_FILE = "catalog.snapshot"
+    LOG_FILE = "orders.log"
+
+    def __init__(self, store: Store, directory: str, generation: int,
+                 group_size: int = 32, fsync: bool = True):
+        """
+        Wraps a store that is already in sync with the directory. Use open() instead.
+        """
+        self.store = store
+        self.directory = directory
+        self._generation = generation
+        self._log = OrderLog(os.path.join(directory, self.LOG_FILE), generation, group_size, fsync)
+
+    @classmethod
+    def open(cls, directory: str, initial_products: Optional[List[Product]] = None,
+             group_size: int = 32, fsync: bool = True) -> "PersistentStore":
+        """
+        Restores the store saved in a directory, or creates one.
+
+        Args:
+            directory (str): Where the snapshot and log live; created if missing.
+            initial_products (Optional[List[Product]]): The catalog to start from when the
+                directory holds no snapshot yet.
+            group_size (int): Records per group commit.
+            fsync (bool): Whether group commits call os.fsync().
+
+        Returns:
+            PersistentStore: The recovered store.
+        """
+        os.makedirs(directory, exist_ok=True)
+        snapshot_path = os.path.join(directory, cls.SNAPSHOT_FILE)
+        log_path = os.path.join(directory, cls.LOG_FILE)
+        if os.path.exists(snapshot_path):
+            store = load_snapshot(snapshot_path)
+            generation = snapshot_generation(snapshot_path)
+        else:
+            store = Store(list(initial_products or []))
+            generation = 0
+            save_snapshot(store, snapshot_path, generation)
+
+        log_generation, records, intact_length = read_log(log_path)
+        if log_generation == generation:
+            for payload in records:
+                cls._replay(store, decode_record(payload))
+        else:
+            # A stale log from before the last checkpoint, or no usable log at all.
+            intact_length = 0
+        if os.path.exists(log_path) and os.path.getsize(log_path) > intact_length:
+            # Drop the torn tail (or stale log) so new records follow valid data.
+            with open(log_path, "r+b") as log_file:
+                log_file.truncate(intact_length)
+        return cls(store, directory, generation, group_size, fsync)
+
+    @staticmethod
+    def _replay(store: Store, record: Tuple) -> None:
+        """Applies one decoded log record to a store."""
+        def product_named(name):
+            product = store.get_product(name)
+            if product is None:
+                raise ValueError(f"Log refers to unknown product {name}")
+            return product
+
+        if record[0] == OP_ORDER:
+            store.order([(product_named(name), quantity) for name, quantity in record[1]])
+        elif record[0] == OP_RESTOCK:
+            store.restock(product_named(record[1]), record[2])
+        else:
+            product_named(record[1]).price = from_cents(record[2])
+
+    def order(self, shopping_list: List[Tuple[Product, int]]) -> Tuple[float, float]:
+        """Processes an order as Store.order() does and logs it once it succeeds."""
+        result = self.store.order(shopping_list)
+        self._log.append(encode_order(shopping_list))
+        return result
+
+    def restock(self, product: Product, amount: int) -> None:
+        """Restocks a product as Store.restock() does and logs it."""
+        self.store.restock(product, amount)
+        name = _encode_name(product.name)
+        self._log.append(_RESTOCK.pack(OP_RESTOCK, len(name), amount) + name)
+
+    def set_price(self, product: Product, price: float) -> None:
+        """Changes a product's price and logs it."""
+        product.price = price
+        name = _encode_name(product.name)
+        self._log.append(_PRICE.pack(OP_PRICE, len(name), product.price_cents) + name)
+
+    def flush(self) -> None:
+        """Makes every change so far durable."""
+        self._log.flush()
+
+    def checkpoint(self) -> None:
+        """Writes a fresh snapshot and empties the log."""
+        self._log.flush()
+        self._generation += 1
+        save_snapshot(self.store, os.path.join(self.directory, self.SNAPSHOT_FILE), self._generation)
+        self._log.truncate(self._generation)
+
+    def close(self) -> None:
+        """Flushes the log and closes it."""
+        self._log.close()
+
+    def __enter__(self) -> "PersistentStore":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
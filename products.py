@@ -1,8 +1,66 @@
+import weakref
+from typing import Iterable
+
+from money import from_cents, to_cents
+
+
+class PurchaseError(ValueError):
+    """
+    Raised when an order line cannot be bought.
+
+    Subclasses name the reason, so callers and metrics can tell failures apart
+    without parsing messages. Being a ValueError, it is caught by existing
+    ``except ValueError`` handlers.
+
+    Attributes:
+        reason (str): A short, stable label for the failure.
+    """
+
+    reason = "invalid_purchase"
+
+
+class InvalidQuantityError(PurchaseError):
+    """The quantity to buy is not positive."""
+
+    reason = "invalid_quantity"
+
+
+class InsufficientStockError(PurchaseError):
+    """There is not enough unreserved stock."""
+
+    reason = "insufficient_stock"
+
+
+class PurchaseLimitError(PurchaseError):
+    """The quantity exceeds a per-order limit."""
+
+    reason = "limit_exceeded"
+
+
+class ProductUnavailableError(PurchaseError):
+    """The product is inactive or not in the store."""
+
+    reason = "inactive_product"
+
+
 class Product:
     """
     Represents a product with a name, price, and quantity. Also handles promotions.
+
+    Stores that hold the product subscribe to it and are notified whenever its
+    price, quantity, active status or promotion (or a limited product's
+    maximum) changes, so they can keep their indexes current without
+    rescanning the catalog.
+
+    The hierarchy uses __slots__ rather than per-instance dictionaries, which
+    keeps large catalogs compact; subclasses must declare their own slots.
+
+    Prices are held as whole cents (see money.py) so that promotion and order
+    math is exact; the ``price`` property still reads and writes dollars.
     """
 
+    __slots__ = ("_observers", "_name", "_price_cents", "_quantity", "_active", "promotion")
+
     def __init__(self, name: str, price: float, quantity: int):
         """
         Initializes a Product instance.
@@ -18,12 +76,80 @@ class Product:
         if not name or price < 0 or quantity < 0:
             raise ValueError('Name cannot be empty, and price or quantity cannot be negative')
 
+        self._observers = None
         self._name = name
-        self._price = float(price)
+        self._price_cents = to_cents(price)
         self._quantity = int(quantity)
-        self.active = True
+        self._active = True
         self.promotion = None
 
+    @classmethod
+    def restore(cls, name: str, price_cents: int, quantity: int, active: bool = True,
+                promotion=None) -> "Product":
+        """
+        Rebuilds a product from trusted state, such as a saved catalog.
+
+        Unlike the constructor it does not validate, convert dollars to cents or
+        notify anyone, which makes it several times faster for large catalogs.
+
+        Args:
+            name (str): The name of the product.
+            price_cents (int): The price in whole cents.
+            quantity (int): The quantity available.
+            active (bool): Whether the product is active.
+            promotion (Optional[Promotion]): The product's promotion, if any.
+        """
+        product = cls.__new__(cls)
+        product._observers = None
+        product._name = name
+        product._price_cents = price_cents
+        product._quantity = quantity
+        product._active = active
+        product.promotion = promotion
+        return product
+
+    def subscribe(self, observer) -> None:
+        """Registers an observer (usually a Store) to be notified of changes."""
+        # Observers are held as a tuple of weak references. CPython shares one
+        # plain weakref per observer, so a product costs a small tuple, not a set.
+        reference = weakref.ref(observer)
+        if self._observers is None:
+            self._observers = (reference,)
+            return
+        observers = tuple(existing for existing in self._observers or () if existing() is not None)
+        if reference not in observers:
+            self._observers = observers + (reference,)
+
+    def unsubscribe(self, observer) -> None:
+        """Removes a previously registered observer."""
+        if self._observers:
+            remaining = tuple(reference for reference in self._observers
+                              if reference() is not None and reference() is not observer)
+            self._observers = remaining or None
+
+    def _notify(self, attribute: str) -> None:
+        """Tells every observer that the given attribute has changed."""
+        if self._observers:
+            for reference in self._observers:
+                observer = reference()
+                if observer is not None:
+                    observer.on_product_changed(self, attribute)
+
+    def __getstate__(self) -> dict:
+        """Returns the product's slots for pickling, leaving out its observers."""
+        state = {}
+        for cls in type(self).__mro__:
+            for slot in cls.__dict__.get("__slots__", ()):
+                if slot != "_observers" and hasattr(self, slot):
+                    state[slot] = getattr(self, slot)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        """Restores a pickled product; it starts with no observers."""
+        self._observers = None
+        for slot, value in state.items():
+            setattr(self, slot, value)
+
     @property
     def name(self) -> str:
         """Returns the name of the product."""
@@ -32,14 +158,20 @@ class Product:
     @property
     def price(self) -> float:
         """Gets the price of the product."""
-        return self._price
+        return from_cents(self._price_cents)
 
     @price.setter
     def price(self, value: float) -> None:
-        """Sets the price of the product with validation."""
+        """Sets the price of the product with validation, rounding to the nearest cent."""
         if value < 0:
             raise ValueError("Price cannot be negative")
-        self._price = value
+        self._price_cents = to_cents(value)
+        self._notify("price")
+
+    @property
+    def price_cents(self) -> int:
+        """Gets the price of the product in whole cents."""
+        return self._price_cents
 
     @property
     def quantity(self) -> int:
@@ -52,9 +184,23 @@ class Product:
         if value < 0:
             raise ValueError("Quantity cannot be negative")
         self._quantity = value
+        self._notify("quantity")
         if self._quantity == 0:
             self.deactivate()
 
+    @property
+    def active(self) -> bool:
+        """Gets the active status of the product."""
+        return self._active
+
+    @active.setter
+    def active(self, value: bool) -> None:
+        """Sets the active status of the product and notifies observers."""
+        value = bool(value)
+        if value != self._active:
+            self._active = value
+            self._notify("active")
+
     def is_active(self) -> bool:
         """Returns whether the product is active."""
         return self.active
@@ -67,53 +213,117 @@ class Product:
         """Deactivates the product."""
         self.active = False
 
+    def check_purchase(self, purchase_quantity: int, reserved: int = 0) -> None:
+        """
+        Validates a purchase without changing any state.
+
+        Args:
+            purchase_quantity (int): The quantity to buy.
+            reserved (int): Units already held by other reservations.
+
+        Raises:
+            InvalidQuantityError: If the quantity is not positive.
+            InsufficientStockError: If the quantity exceeds the available stock.
+        """
+        if purchase_quantity <= 0:
+            raise InvalidQuantityError('Quantity to buy must be greater than zero')
+        if self._quantity - reserved < purchase_quantity:
+            raise InsufficientStockError('Not enough quantity in stock')
+
+    def price_for_cents(self, purchase_quantity: int) -> int:
+        """Returns the cost in cents of buying the given quantity, with the promotion applied."""
+        if self.promotion:
+            return self.promotion.apply_promotion_cents(self, purchase_quantity)
+        return self._price_cents * purchase_quantity
+
+    def price_for(self, purchase_quantity: int) -> float:
+        """Returns the cost of buying the given quantity, with the promotion applied."""
+        return from_cents(self.price_for_cents(purchase_quantity))
+
+    def take_stock(self, purchase_quantity: int) -> None:
+        """
+        Processes a purchase without pricing it, for callers that price lines themselves.
+
+        Raises:
+            InvalidQuantityError: If the quantity is not positive.
+            InsufficientStockError: If the quantity exceeds the available stock.
+        """
+        self.check_purchase(purchase_quantity)
+        self._quantity -= purchase_quantity
+        self._notify("quantity")
+
+    def buy_cents(self, purchase_quantity: int) -> int:
+        """Processes a purchase, reducing quantity and returning the cost in cents."""
+        self.check_purchase(purchase_quantity)
+        # Priced before the stock moves, so a promotion that raises leaves the stock as it was.
+        cost = self.price_for_cents(purchase_quantity)
+        self._quantity -= purchase_quantity
+        self._notify("quantity")
+        return cost
+
     def buy(self, purchase_quantity: int) -> float:
         """Processes a purchase, reducing quantity and calculating cost."""
-        if purchase_quantity <= 0:
-            raise ValueError('Quantity to buy must be greater than zero')
-        if self._quantity >= purchase_quantity:
-            self._quantity -= purchase_quantity
-            if self.promotion:
-                return self.promotion.apply_promotion(self, purchase_quantity)
-            return self._price * purchase_quantity
-        else:
-            raise ValueError('Not enough quantity in stock')
+        return from_cents(self.buy_cents(purchase_quantity))
 
     def set_promotion(self, promotion) -> None:
         """Sets a promotion for the product."""
         self.promotion = promotion
+        self._notify("promotion")
 
     def __str__(self) -> str:
         """Returns a string representation of the product."""
         promotion_info = f" (Promotion: {self.promotion.name})" if self.promotion else ""
-        return f"{self._name}, Price: ${self._price:,.2f}, Quantity: {self._quantity}{promotion_info}"
+        return f"{self._name}, Price: ${self.price:,.2f}, Quantity: {self._quantity}{promotion_info}"
 
     def __gt__(self, other: "Product") -> bool:
         """Compares product prices for greater-than comparison."""
         if isinstance(other, Product):
-            return self._price > other._price
+            return self._price_cents > other._price_cents
         return NotImplemented
 
     def __lt__(self, other: "Product") -> bool:
         """Compares product prices for less-than comparison."""
         if isinstance(other, Product):
-            return self._price < other._price
+            return self._price_cents < other._price_cents
         return NotImplemented
 
 
+def subscribe_all(products: Iterable[Product], observer) -> None:
+    """
+    Registers one observer with many products, e.g. a store loading its catalog.
+
+    Products without observers share a single one-element tuple, so this is
+    much faster than calling subscribe() on each.
+    """
+    shared = (weakref.ref(observer),)
+    for product in products:
+        if product._observers is None:
+            product._observers = shared
+        else:
+            product.subscribe(observer)
+
+
 class NonStockedProduct(Product):
     """Represents a product that is not stocked and has unlimited availability."""
 
+    __slots__ = ()
+
     def __init__(self, name: str, price: float):
         super().__init__(name, price, quantity=0)
 
-    def buy(self, purchase_quantity: int) -> float:
-        """Allows purchasing without reducing stock."""
+    def check_purchase(self, purchase_quantity: int, reserved: int = 0) -> None:
+        """Validates a purchase; stock is unlimited, so only the quantity is checked."""
         if purchase_quantity <= 0:
-            raise ValueError("Quantity to buy must be greater than zero")
-        if self.promotion:
-            return self.promotion.apply_promotion(self, purchase_quantity)
-        return self.price * purchase_quantity
+            raise InvalidQuantityError("Quantity to buy must be greater than zero")
+
+    def take_stock(self, purchase_quantity: int) -> None:
+        """Validates a purchase; there is no stock to reduce."""
+        self.check_purchase(purchase_quantity)
+
+    def buy_cents(self, purchase_quantity: int) -> int:
+        """Allows purchasing without reducing stock, returning the cost in cents."""
+        self.check_purchase(purchase_quantity)
+        return self.price_for_cents(purchase_quantity)
 
     def __str__(self) -> str:
         """Returns a string representation of the non-stocked product with promotion info."""
@@ -124,15 +334,36 @@ class NonStockedProduct(Product):
 class LimitedProduct(Product):
     """Represents a product with a purchase limit per order."""
 
+    __slots__ = ("_maximum",)
+
     def __init__(self, name: str, price: float, quantity: int, maximum: int):
         super().__init__(name, price, quantity)
-        self.maximum = maximum
+        self._maximum = maximum
 
-    def buy(self, purchase_quantity: int) -> float:
-        """Allows purchasing within the defined limit."""
+    @classmethod
+    def restore(cls, name: str, price_cents: int, quantity: int, maximum: int, active: bool = True,
+                promotion=None) -> "LimitedProduct":
+        """Rebuilds a limited product from trusted state; see Product.restore()."""
+        product = super().restore(name, price_cents, quantity, active, promotion)
+        product._maximum = maximum
+        return product
+
+    @property
+    def maximum(self) -> int:
+        """Gets the most units that can be bought per order."""
+        return self._maximum
+
+    @maximum.setter
+    def maximum(self, value: int) -> None:
+        """Sets the per-order limit and notifies observers."""
+        self._maximum = value
+        self._notify("maximum")
+
+    def check_purchase(self, purchase_quantity: int, reserved: int = 0) -> None:
+        """Validates a purchase against the per-order limit and the available stock."""
         if purchase_quantity > self.maximum:
-            raise ValueError(f"Cannot buy more than {self.maximum} units of {self.name} per transaction.")
-        return super().buy(purchase_quantity)
+            raise PurchaseLimitError(f"Cannot buy more than {self.maximum} units of {self.name} per transaction.")
+        super().check_purchase(purchase_quantity, reserved)
 
     def __str__(self) -> str:
         """Returns a string representation of the limited product."""
@@ -0,0 +1,318 @@
+from abc import abstractmethod
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from money import divide_round, from_cents, to_basis_points, to_cents
+from products import Product
+from promotions import PricePoint, Promotion
+
+
+class PromotionRule:
+    """
+    A promotion together with how it combines with others.
+
+    Attributes:
+        promotion (Promotion): The promotion to apply.
+        priority (int): Higher priorities are applied first.
+        exclusive (bool): An exclusive rule is never combined with other rules: it is
+            applied alone if it comes first, and skipped otherwise.
+    """
+
+    __slots__ = ("promotion", "priority", "exclusive")
+
+    def __init__(self, promotion: Promotion, priority: int = 0, exclusive: bool = False):
+        self.promotion = promotion
+        self.priority = priority
+        self.exclusive = exclusive
+
+
+def _select(rules: Iterable[PromotionRule]) -> List[Promotion]:
+    """Orders rules by priority and applies the exclusivity rules, returning the promotions to stack."""
+    selected = []
+    for rule in sorted(rules, key=lambda rule: -rule.priority):
+        if rule.exclusive:
+            if not selected:
+                return [rule.promotion]
+            continue
+        selected.append(rule.promotion)
+    return selected
+
+
+def _stack(promotions: Sequence[Promotion], product: Product, quantity: int) -> int:
+    """
+    Prices a line in cents with several promotions applied one after another.
+
+    Every promotion but the last turns the unit price into the average unit
+    price it produces, rounded to the nearest cent; the last one prices the
+    line from that unit price. With a single promotion this is exactly
+    promotion.apply_promotion_cents().
+    """
+    if len(promotions) == 1:
+        return promotions[0].apply_promotion_cents(product, quantity)
+    unit = product.price_cents
+    for promotion in promotions[:-1]:
+        unit = divide_round(promotion.apply_promotion_cents(PricePoint(unit), quantity), quantity)
+    return promotions[-1].apply_promotion_cents(PricePoint(unit), quantity)
+
+
+class StackedPromotion(Promotion):
+    """
+    A promotion that combines several promotions on one product.
+
+    For example, "30% off plus third one free" is a StackedPromotion of a
+    PercentDiscount and a ThirdOneFree. It can be set on a product like any
+    other promotion. A change to one of the stacked promotions is passed on
+    to the stores that sell products with this one.
+    """
+
+    __slots__ = ("rules", "_selected", "__weakref__")
+
+    def __init__(self, name: str, rules: Iterable[PromotionRule]):
+        super().__init__(name)
+        self.rules = list(rules)
+        self._selected = _select(self.rules)
+        for promotion in self._selected:
+            promotion.subscribe(self)
+
+    def on_promotion_changed(self, promotion: Promotion) -> None:
+        """Passes a stacked promotion's change on to this promotion's observers."""
+        self._notify()
+
+    def apply_promotion(self, product: Product, quantity: int) -> float:
+        """Calculates the price with every selected promotion stacked."""
+        return from_cents(self.apply_promotion_cents(product, quantity))
+
+    def apply_promotion_cents(self, product: Product, quantity: int) -> int:
+        """Calculates the price in cents with every selected promotion stacked."""
+        if not self._selected:
+            return product.price_cents * quantity
+        return _stack(self._selected, product, quantity)
+
+
+class CartPromotion(Promotion):
+    """
+    Base class for promotions that look at the whole cart rather than one line.
+
+    Used on its own for a single product, a cart promotion sees a cart with
+    just that line.
+    """
+
+    __slots__ = ()
+
+    @abstractmethod
+    def cart_discount_cents(self, subtotal_cents: int, quantities: Dict[int, int]) -> int:
+        """
+        Returns the discount for a cart, in cents.
+
+        Args:
+            subtotal_cents (int): The cart total in cents after line promotions (and earlier cart rules).
+            quantities (Dict[int, int]): Quantity per product, keyed by id(product).
+        """
+
+    def cart_discount(self, subtotal: float, quantities: Dict[int, int]) -> float:
+        """Returns the discount for a cart whose subtotal is given in dollars."""
+        return from_cents(self.cart_discount_cents(to_cents(subtotal), quantities))
+
+    def apply_promotion(self, product: Product, quantity: int) -> float:
+        """Prices a one-line cart."""
+        return from_cents(self.apply_promotion_cents(product, quantity))
+
+    def apply_promotion_cents(self, product: Product, quantity: int) -> int:
+        """Prices a one-line cart, in cents."""
+        subtotal = product.price_cents * quantity
+        return subtotal - self.cart_discount_cents(subtotal, {id(product): quantity})
+
+
+class CartThreshold(CartPromotion):
+    """Takes a percentage off the whole cart once its subtotal reaches a threshold."""
+
+    __slots__ = ("_threshold", "_percent")
+
+    def __init__(self, name: str, threshold: float, percent: float):
+        super().__init__(name)
+        self._threshold = threshold
+        self._percent = percent
+
+    @property
+    def threshold(self) -> float:
+        """Gets the subtotal, in dollars, from which the discount applies."""
+        return self._threshold
+
+    @threshold.setter
+    def threshold(self, value: float) -> None:
+        self._threshold = value
+        self._notify()
+
+    @property
+    def percent(self) -> float:
+        """Gets the discount percentage."""
+        return self._percent
+
+    @percent.setter
+    def percent(self, value: float) -> None:
+        self._percent = value
+        self._notify()
+
+    def cart_discount_cents(self, subtotal_cents: int, quantities: Dict[int, int]) -> int:
+        """Returns the percentage discount, rounded to the nearest cent, if the subtotal reaches the threshold."""
+        if subtotal_cents >= to_cents(self.threshold):
+            return divide_round(subtotal_cents * to_basis_points(self.percent), 10000)
+        return 0
+
+
+class Bundle(CartPromotion):
+    """Sells a set of products together for a fixed price, once per complete set in the cart."""
+
+    __slots__ = ("products", "_bundle_price")
+
+    def __init__(self, name: str, products: Sequence[Product], bundle_price: float):
+        super().__init__(name)
+        if not products:
+            raise ValueError("A bundle needs at least one product")
+        self.products = list(products)
+        self._bundle_price = bundle_price
+
+    @property
+    def bundle_price(self) -> float:
+        """Gets the price of one complete set, in dollars."""
+        return self._bundle_price
+
+    @bundle_price.setter
+    def bundle_price(self, value: float) -> None:
+        self._bundle_price = value
+        self._notify()
+
+    def cart_discount_cents(self, subtotal_cents: int, quantities: Dict[int, int]) -> int:
+        """Returns the saving in cents for every complete bundle in the cart."""
+        sets = min(quantities.get(id(product), 0) for product in self.products)
+        if not sets:
+            return 0
+        list_price = sum(product.price_cents for product in self.products)
+        return sets * max(0, list_price - to_cents(self.bundle_price))
+
+
+def _rules_for(line_rules: Iterable[Tuple[Optional[frozenset], PromotionRule]],
+               product: Product) -> List[Promotion]:
+    """Selects the promotions to stack on one product from a set of line rules and its own promotion."""
+    rules = [rule for targets, rule in line_rules if targets is None or id(product) in targets]
+    if product.promotion is not None:
+        rules.append(PromotionRule(product.promotion))
+    return _select(rules)
+
+
+class PromotionEngine:
+    """
+    Collects promotion rules and compiles them into an EvaluationPlan.
+
+    Line rules target specific products (or every product); a product's own
+    ``promotion`` also takes part as a priority-0 rule. Cart rules apply to
+    the whole order after line pricing.
+    """
+
+    def __init__(self) -> None:
+        self._line_rules: List[Tuple[Optional[frozenset], PromotionRule]] = []
+        self._cart_rules: List[PromotionRule] = []
+
+    def add_rule(self, promotion: Promotion, products: Optional[Iterable[Product]] = None,
+                 priority: int = 0, exclusive: bool = False) -> None:
+        """
+        Adds a line rule.
+
+        Args:
+            promotion (Promotion): The promotion to apply to each matching line.
+            products (Optional[Iterable[Product]]): The products it applies to; None for all.
+            priority (int): Higher priorities are applied first.
+            exclusive (bool): Whether the rule refuses to stack with others.
+        """
+        targets = None if products is None else frozenset(id(product) for product in products)
+        self._line_rules.append((targets, PromotionRule(promotion, priority, exclusive)))
+
+    def add_cart_rule(self, promotion: CartPromotion, priority: int = 0, exclusive: bool = False) -> None:
+        """Adds a cart-wide rule."""
+        if not isinstance(promotion, CartPromotion):
+            raise ValueError("Cart rules must be CartPromotion instances")
+        self._cart_rules.append(PromotionRule(promotion, priority, exclusive))
+
+    def _rules_for(self, product: Product) -> List[Promotion]:
+        """Selects the promotions to stack on one product."""
+        return _rules_for(self._line_rules, product)
+
+    def compile(self, products: Iterable[Product]) -> "EvaluationPlan":
+        """
+        Resolves the rules for every product of a catalog into an EvaluationPlan.
+
+        The plan keeps the rules as they are now; rules added to the engine later
+        only reach plans compiled after them.
+        """
+        plan = EvaluationPlan(tuple(self._line_rules), _select(self._cart_rules))
+        for product in products:
+            plan._compile_product(product)
+        return plan
+
+
+class EvaluationPlan:
+    """
+    A compiled rule set that prices an order in one pass.
+
+    Each product's stack of promotions is resolved once at compile time. If a
+    product's own promotion changes later, or a product that was not in the
+    catalog shows up, its entry is recompiled on first use, from the engine's
+    rules as they were at compile time.
+    """
+
+    def __init__(self, line_rules: Tuple[Tuple[Optional[frozenset], PromotionRule], ...],
+                 cart_promotions: List[Promotion]):
+        self._line_rules = line_rules
+        self._cart_promotions = cart_promotions
+        self._lines: Dict[int, Tuple[Product, object, Tuple[Promotion, ...]]] = {}
+
+    def _compile_product(self, product: Product) -> Tuple[Promotion, ...]:
+        promotions = tuple(_rules_for(self._line_rules, product))
+        self._lines[id(product)] = (product, product.promotion, promotions)
+        return promotions
+
+    def line_price_cents(self, product: Product, quantity: int) -> int:
+        """Returns a line's price in cents after line promotions."""
+        entry = self._lines.get(id(product))
+        if entry is None or entry[0] is not product or entry[1] is not product.promotion:
+            promotions = self._compile_product(product)
+        else:
+            promotions = entry[2]
+        if not promotions:
+            return product.price_cents * quantity
+        return _stack(promotions, product, quantity)
+
+    def line_price(self, product: Product, quantity: int) -> float:
+        """Returns a line's price after line promotions."""
+        return from_cents(self.line_price_cents(product, quantity))
+
+    def price_cents(self, shopping_list: Sequence[Tuple[Product, int]]) -> Tuple[int, int]:
+        """
+        Prices an order in cents without changing any stock.
+
+        Returns:
+            Tuple[int, int]: The total price and the savings against list price, in cents.
+        """
+        total_price = 0
+        total_savings = 0
+        quantities: Dict[int, int] = {}
+        for product, quantity in shopping_list:
+            original_price = product.price_cents * quantity
+            final_price = self.line_price_cents(product, quantity)
+            total_price += final_price
+            total_savings += original_price - final_price
+            quantities[id(product)] = quantities.get(id(product), 0) + quantity
+        for promotion in self._cart_promotions:
+            discount = min(promotion.cart_discount_cents(total_price, quantities), total_price)
+            total_price -= discount
+            total_savings += discount
+        return total_price, total_savings
+
+    def price(self, shopping_list: Sequence[Tuple[Product, int]]) -> Tuple[float, float]:
+        """
+        Prices an order without changing any stock.
+
+        Returns:
+            Tuple[float, float]: The total price and the savings against list price.
+        """
+        total_price, total_savings = self.price_cents(shopping_list)
+        return from_cents(total_price), from_cents(total_savings)
@@ -1,56 +1,367 @@
+import math
+import weakref
 from abc import ABC, abstractmethod
+from typing import Sequence, Tuple
+from money import divide_round, from_cents, to_basis_points, to_cents
 from products import Product, NonStockedProduct, LimitedProduct
 
 
+def _numpy():
+    """
+    Returns the NumPy module, or None if it is not installed.
+
+    NumPy is optional and only batch pricing uses it, so it is imported on
+    first use rather than with this module; importing it costs more than the
+    rest of the catalog code combined. The result is cached as the module
+    attribute ``np``, which callers may also set to None to force the
+    plain-Python path.
+    """
+    try:
+        return globals()["np"]
+    except KeyError:
+        pass
+    try:
+        import numpy
+    except ImportError:  # NumPy is optional; batch pricing falls back to plain Python.
+        numpy = None
+    globals()["np"] = numpy
+    return numpy
+
+
+def __getattr__(name: str):
+    if name == "np":
+        return _numpy()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def as_batch(prices: Sequence[float], quantities: Sequence[int]) -> Tuple:
+    """
+    Converts prices and quantities into the arrays used by apply_batch().
+
+    Returns float64/int64 NumPy arrays when NumPy is installed, otherwise lists.
+    """
+    np = _numpy()
+    if len(prices) != len(quantities):
+        raise ValueError("Prices and quantities must have the same length")
+    if np is not None:
+        return np.asarray(prices, dtype=np.float64), np.asarray(quantities, dtype=np.int64)
+    return [float(price) for price in prices], [int(quantity) for quantity in quantities]
+
+
+def as_cents_batch(prices_cents: Sequence[int], quantities: Sequence[int]) -> Tuple:
+    """
+    Converts prices in cents and quantities into the arrays used by apply_batch_cents().
+
+    Returns int64 NumPy arrays when NumPy is installed, otherwise lists.
+    """
+    np = _numpy()
+    if len(prices_cents) != len(quantities):
+        raise ValueError("Prices and quantities must have the same length")
+    if np is not None:
+        return np.asarray(prices_cents, dtype=np.int64), np.asarray(quantities, dtype=np.int64)
+    return list(map(int, prices_cents)), list(map(int, quantities))
+
+
+# The largest value an int64 batch may hold; batches that could pass it are priced with Python ints.
+_INT64_MAX = 2 ** 63 - 1
+
+
+def _magnitude(values) -> int:
+    """Returns the largest absolute value in a non-empty int64 array, as a Python int."""
+    return max(-int(values.min()), int(values.max()))
+
+
+def _cents_batch(prices_cents: Sequence[int], quantities: Sequence[int], headroom: int) -> Tuple:
+    """
+    Converts a batch like as_cents_batch(), choosing int64 arrays only when they are safe.
+
+    Args:
+        prices_cents (Sequence[int]): The unit price of each line, in cents.
+        quantities (Sequence[int]): The quantity of each line.
+        headroom (int): How many times the largest price times the largest quantity the
+            caller's int64 arithmetic may reach.
+
+    Returns:
+        Tuple: The NumPy module and int64 arrays, or None and lists of Python ints when
+        NumPy is not installed or int64 arithmetic could overflow.
+    """
+    np = _numpy()
+    if np is not None:
+        try:
+            price_array, quantity_array = as_cents_batch(prices_cents, quantities)
+        except OverflowError:
+            pass
+        else:
+            if not len(price_array) or _magnitude(price_array) * _magnitude(quantity_array) * headroom <= _INT64_MAX:
+                return np, price_array, quantity_array
+    if len(prices_cents) != len(quantities):
+        raise ValueError("Prices and quantities must have the same length")
+    return None, list(map(int, prices_cents)), list(map(int, quantities))
+
+
+def _divide_round_batch(numerators, denominator: int):
+    """Vectorized money.divide_round() for an int64 array."""
+    np = _numpy()
+    magnitudes = (2 * np.abs(numerators) + denominator) // (2 * denominator)
+    return np.where(numerators < 0, -magnitudes, magnitudes)
+
+
+class PricePoint:
+    """Stands in for a product when only its unit price matters, e.g. in batch or stacked pricing."""
+
+    __slots__ = ("price_cents",)
+
+    def __init__(self, price_cents: int):
+        self.price_cents = price_cents
+
+    @property
+    def price(self) -> float:
+        return from_cents(self.price_cents)
+
+
 class Promotion(ABC):
-    """Abstract base class for promotions."""
+    """
+    Abstract base class for promotions.
+
+    Subclasses implement apply_promotion(); the built-in promotions also
+    implement apply_promotion_cents() so that line totals are computed exactly
+    in whole cents and rounded once per line (see money.py).
+
+    Stores that sell products with a promotion subscribe to it, as they do to
+    products. A subclass whose pricing parameters can change in place (such
+    as PercentDiscount.percent) calls _notify() from its setters, so cached
+    line prices and running totals never go stale.
+    """
+
+    __slots__ = ("name", "_observers")
 
     def __init__(self, name: str):
         """Initializes a promotion with a name."""
         self.name = name
+        self._observers = None
+
+    def subscribe(self, observer) -> None:
+        """Registers an observer (usually a Store) to be notified when the pricing changes."""
+        # A tuple of weak references, as on Product: a promotion is watched by a few stores.
+        observers = getattr(self, "_observers", None) or ()
+        reference = weakref.ref(observer)
+        if reference not in observers:
+            self._observers = tuple(existing for existing in observers if existing() is not None) + (reference,)
+
+    def unsubscribe(self, observer) -> None:
+        """Removes a previously registered observer."""
+        if getattr(self, "_observers", None):
+            remaining = tuple(reference for reference in self._observers
+                              if reference() is not None and reference() is not observer)
+            self._observers = remaining or None
+
+    def _notify(self) -> None:
+        """Tells every observer that the promotion now prices lines differently."""
+        if getattr(self, "_observers", None):
+            for reference in self._observers:
+                observer = reference()
+                if observer is not None:
+                    observer.on_promotion_changed(self)
+
+    def __getstate__(self) -> dict:
+        """Returns the promotion's slots for pickling, leaving out its observers."""
+        state = {}
+        for cls in type(self).__mro__:
+            for slot in cls.__dict__.get("__slots__", ()):
+                if slot not in ("_observers", "__weakref__") and hasattr(self, slot):
+                    state[slot] = getattr(self, slot)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        """Restores a pickled promotion; it starts with no observers."""
+        self._observers = None
+        for slot, value in state.items():
+            setattr(self, slot, value)
 
     @abstractmethod
     def apply_promotion(self, product: Product, quantity: int) -> float:
         """Applies the promotion to a product purchase."""
         pass
 
+    def apply_promotion_cents(self, product: Product, quantity: int) -> int:
+        """
+        Applies the promotion to a product purchase, in whole cents.
+
+        This fallback rounds apply_promotion() to the nearest cent; subclasses
+        override it with exact integer arithmetic.
+        """
+        return to_cents(self.apply_promotion(product, quantity))
+
+    def apply_batch_cents(self, prices_cents: Sequence[int], quantities: Sequence[int]):
+        """
+        Applies the promotion to many lines at once, in whole cents.
+
+        Each result is exactly what apply_promotion_cents() returns for a product
+        with that price bought in that quantity. Subclasses override this with
+        vectorized arithmetic; this fallback prices line by line.
+
+        Args:
+            prices_cents (Sequence[int]): The unit price of each line, in cents.
+            quantities (Sequence[int]): The quantity of each line.
+
+        Returns:
+            An int64 NumPy array when NumPy is installed, otherwise a list, of line totals in
+            cents. Totals too large for int64 also come back as a list of exact Python ints.
+        """
+        np = _numpy()
+        prices_cents, quantities = as_cents_batch(prices_cents, quantities)
+        totals = [self.apply_promotion_cents(PricePoint(int(price)), int(quantity))
+                  for price, quantity in zip(prices_cents, quantities)]
+        if np is None:
+            return totals
+        try:
+            return np.asarray(totals, dtype=np.int64)
+        except OverflowError:
+            return totals
+
+    def apply_batch(self, prices: Sequence[float], quantities: Sequence[int]):
+        """
+        Applies the promotion to many lines at once.
+
+        Each result is exactly what apply_promotion() returns for a product with
+        that price bought in that quantity.
+
+        Args:
+            prices (Sequence[float]): The unit price of each line.
+            quantities (Sequence[int]): The quantity of each line.
+
+        Returns:
+            A NumPy array when NumPy is installed, otherwise a list, of line totals.
+        """
+        np = _numpy()
+        prices, quantities = as_batch(prices, quantities)
+        totals = self.apply_batch_cents([to_cents(float(price)) for price in prices], quantities)
+        if isinstance(totals, list):
+            totals = [from_cents(total) for total in totals]
+            return np.asarray(totals, dtype=np.float64) if np is not None else totals
+        return totals / 100
+
 
 class PercentDiscount(Promotion):
-    """Applies a percentage discount to the product price."""
+    """
+    Applies a percentage discount to the product price.
+
+    The percentage is held in basis points (hundredths of a percent) and the
+    discounted line total is rounded to the nearest cent once per line.
+    """
+
+    __slots__ = ("_percent", "_basis_points", "_kept", "_kept_numerator", "_kept_denominator", "_kept_half")
 
     def __init__(self, name: str, percent: float):
         super().__init__(name)
         self.percent = percent
 
+    @property
+    def percent(self) -> float:
+        """Gets the discount percentage."""
+        return self._percent
+
+    @percent.setter
+    def percent(self, value: float) -> None:
+        """Sets the discount percentage, to the nearest hundredth of a percent."""
+        self._percent = value
+        self._basis_points = to_basis_points(value)
+        self._kept = 10000 - self._basis_points
+        # kept / 10000 in lowest terms, so the per-line products stay small, fast integers.
+        divisor = math.gcd(self._kept, 10000)
+        self._kept_numerator = self._kept // divisor
+        self._kept_denominator = 10000 // divisor
+        self._kept_half = self._kept_denominator // 2
+        self._notify()
+
     def apply_promotion(self, product: Product, quantity: int) -> float:
         """Calculates the price after applying the percentage discount."""
-        discount = product.price * (self.percent / 100)
-        return (product.price - discount) * quantity
+        return from_cents(self.apply_promotion_cents(product, quantity))
+
+    def apply_promotion_cents(self, product: Product, quantity: int) -> int:
+        """Calculates the price in cents after applying the percentage discount."""
+        numerator = self._kept_numerator
+        if numerator >= 0 and quantity >= 0:
+            # divide_round() inlined for the common, non-negative case; this is the hot path.
+            return (product.price_cents * quantity * numerator + self._kept_half) // self._kept_denominator
+        return divide_round(product.price_cents * quantity * numerator, self._kept_denominator)
+
+    def apply_batch_cents(self, prices_cents: Sequence[int], quantities: Sequence[int]):
+        """Calculates discounted totals in cents for many lines at once."""
+        kept = self._kept
+        # _divide_round_batch() doubles the products and adds the denominator.
+        np, prices_cents, quantities = _cents_batch(prices_cents, quantities, 2 * abs(kept) + 2)
+        if np is not None:
+            return _divide_round_batch(prices_cents * quantities * kept, 10000)
+        if kept >= 0 and min(quantities, default=0) >= 0 and min(prices_cents, default=0) >= 0:
+            # divide_round() inlined for the common, non-negative case, as in apply_promotion_cents().
+            return [(price * quantity * kept + 5000) // 10000 for price, quantity in zip(prices_cents, quantities)]
+        return [divide_round(price * quantity * kept, 10000) for price, quantity in zip(prices_cents, quantities)]
 
 
 class SecondHalfPrice(Promotion):
-    """Applies a promotion where the second product is half-price."""
+    """
+    Applies a promotion where the second product is half-price.
+
+    The half-price items of a line are rounded to the nearest cent together.
+    """
+
+    __slots__ = ()
 
     def __init__(self, name: str):
         super().__init__(name)
 
     def apply_promotion(self, product: Product, quantity: int) -> float:
         """Calculates the total price using the second-half price promotion."""
+        return from_cents(self.apply_promotion_cents(product, quantity))
+
+    def apply_promotion_cents(self, product: Product, quantity: int) -> int:
+        """Calculates the total price in cents using the second-half price promotion."""
+        price = product.price_cents
         full_price_items = quantity // 2 + quantity % 2
         half_price_items = quantity // 2
-        return full_price_items * product.price + half_price_items * (product.price / 2)
+        if quantity < 0:
+            return full_price_items * price + divide_round(half_price_items * price, 2)
+        # Half of a non-negative amount rounded half up; divide_round() inlined for speed.
+        return full_price_items * price + (half_price_items * price + 1) // 2
+
+    def apply_batch_cents(self, prices_cents: Sequence[int], quantities: Sequence[int]):
+        """Calculates second-half-price totals in cents for many lines at once."""
+        np, prices_cents, quantities = _cents_batch(prices_cents, quantities, 4)
+        if np is not None:
+            half_price_items = quantities // 2
+            return ((half_price_items + quantities % 2) * prices_cents
+                    + _divide_round_batch(half_price_items * prices_cents, 2))
+        if min(quantities, default=0) >= 0 and min(prices_cents, default=0) >= 0:
+            return [(quantity // 2 + quantity % 2) * price + ((quantity // 2) * price + 1) // 2
+                    for price, quantity in zip(prices_cents, quantities)]
+        return [(quantity // 2 + quantity % 2) * price + divide_round((quantity // 2) * price, 2)
+                for price, quantity in zip(prices_cents, quantities)]
 
 
 class ThirdOneFree(Promotion):
     """Applies a promotion where every third product is free."""
 
+    __slots__ = ()
+
     def __init__(self, name: str):
         super().__init__(name)
 
     def apply_promotion(self, product: Product, quantity: int) -> float:
         """Calculates the total price using the third-one-free promotion."""
+        return from_cents(self.apply_promotion_cents(product, quantity))
+
+    def apply_promotion_cents(self, product: Product, quantity: int) -> int:
+        """Calculates the total price in cents using the third-one-free promotion."""
         chargeable_items = quantity - (quantity // 3)
-        return chargeable_items * product.price
+        return chargeable_items * product.price_cents
+
+    def apply_batch_cents(self, prices_cents: Sequence[int], quantities: Sequence[int]):
+        """Calculates third-one-free totals in cents for many lines at once."""
+        np, prices_cents, quantities = _cents_batch(prices_cents, quantities, 1)
+        if np is not None:
+            return (quantities - quantities // 3) * prices_cents
+        return [(quantity - quantity // 3) * price for price, quantity in zip(prices_cents, quantities)]
 
 
 if __name__ == '__main__':
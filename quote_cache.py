@@ -0,0 +1,95 @@
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+from products import Product
+
+
+class QuoteCache:
+    """
+    A bounded LRU cache of line prices for Store.quote().
+
+    Entries are keyed on (product, quantity, promotion, price version). The
+    store calls invalidate() when a product's price or promotion changes, or
+    when its promotion is edited in place, which drops exactly that product's
+    entries and bumps its price version, so a stale price can never be returned.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        """
+        Initializes the cache.
+
+        Args:
+            maxsize (int): The most line prices kept; 0 disables caching.
+        """
+        if maxsize < 0:
+            raise ValueError("Cache size cannot be negative")
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Tuple[int, int, int, int], int]" = OrderedDict()
+        self._keys_by_product: Dict[int, Set[Tuple[int, int, int, int]]] = {}
+        self._versions: Dict[int, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _key(self, product: Product, quantity: int) -> Tuple[int, int, int, int]:
+        return id(product), quantity, id(product.promotion), self._versions.get(id(product), 0)
+
+    def get(self, product: Product, quantity: int) -> Optional[int]:
+        """Returns the cached line price in cents, or None on a miss."""
+        key = self._key(product, quantity)
+        price = self._entries.get(key)
+        if price is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return price
+
+    def put(self, product: Product, quantity: int, price: int) -> None:
+        """Stores a line price in cents, evicting the least recently used entry when full."""
+        if not self.maxsize:
+            return
+        key = self._key(product, quantity)
+        if key not in self._entries:
+            self._keys_by_product.setdefault(key[0], set()).add(key)
+        self._entries[key] = price
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            old_key, _ = self._entries.popitem(last=False)
+            keys = self._keys_by_product[old_key[0]]
+            keys.discard(old_key)
+            if not keys:
+                del self._keys_by_product[old_key[0]]
+            self.evictions += 1
+
+    def invalidate(self, product: Product) -> None:
+        """Drops every entry for a product and bumps its price version."""
+        key = id(product)
+        self._versions[key] = self._versions.get(key, 0) + 1
+        for entry_key in self._keys_by_product.pop(key, ()):
+            del self._entries[entry_key]
+            self.invalidations += 1
+
+    def forget(self, product: Product) -> None:
+        """Drops a product's entries and version, e.g. when it leaves the store."""
+        self.invalidate(product)
+        del self._versions[id(product)]
+
+    def clear(self) -> None:
+        """Empties the cache; statistics are kept."""
+        self._entries.clear()
+        self._keys_by_product.clear()
+
+    def stats(self) -> dict:
+        """Returns hit, miss, eviction and invalidation counts and the current size."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+        }
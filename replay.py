@@ -0,0 +1,73 @@
+"""
+Replays an order journal against a freshly loaded catalog.
+
+Record a journal with ``python main.py --journal orders.journal`` (or
+journal.JournalRecorder in a service), then:
+
+    python replay.py orders.journal                          # demo catalog, full speed
+    python replay.py orders.journal --snapshot catalog.snapshot --pace
+    python replay.py orders.journal --catalog catalog.image  # as main.py --catalog
+    python replay.py orders.journal --speed 4 --json
+
+Prints throughput, p50/p99 latency and every order whose total, savings or
+failure reason differs from the recording. Exits with status 1 if any did.
+"""
+import argparse
+import json
+import sys
+from typing import List, Optional
+
+from journal import read_journal, replay
+
+
+def load_store(snapshot: Optional[str], catalog: Optional[str] = None):
+    """Loads the catalog to replay against: a snapshot, a catalog image, or the demo catalog from main.py."""
+    if snapshot:
+        from persistence import load_snapshot
+        return load_snapshot(snapshot)
+    if catalog:
+        from persistence import load_image
+        return load_image(catalog)
+    from main import default_products
+    from store import Store
+    return Store(default_products())
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("journal", help="The journal file to replay")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--snapshot", help="A catalog snapshot to load instead of the demo catalog")
+    source.add_argument("--catalog", help="A catalog image (see main.py --save-catalog) to load instead")
+    pacing = parser.add_mutually_exclusive_group()
+    pacing.add_argument("--pace", action="store_true", help="Send orders at their recorded pacing")
+    pacing.add_argument("--speed", type=float, help="Send orders at the recorded pacing sped up by this factor")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    parser.add_argument("--show", type=int, default=10, help="How many divergences to list")
+    args = parser.parse_args(argv)
+
+    try:
+        _, entries = read_journal(args.journal)
+        store = load_store(args.snapshot, args.catalog)
+    except (OSError, ValueError) as error:
+        print(f"error: {error}", file=sys.stderr)
+        return 2
+    report = replay(store, entries, speed=1.0 if args.pace else args.speed)
+
+    summary = report.to_dict()
+    if args.json:
+        summary["first_divergences"] = [divergence._asdict() for divergence in report.divergences[:args.show]]
+        print(json.dumps(summary, indent=2))
+    else:
+        print(f"orders:      {summary['orders']:,} ({summary['failed']:,} failed)")
+        print(f"throughput:  {summary['throughput_per_sec']:,.0f} orders/sec")
+        print(f"latency:     p50 {summary['p50_ms']:.3f} ms, p99 {summary['p99_ms']:.3f} ms, "
+              f"max {summary['max_ms']:.3f} ms")
+        print(f"divergences: {summary['divergences']:,}")
+        for divergence in report.divergences[:args.show]:
+            print(f"  order #{divergence.index}: expected {divergence.expected}, got {divergence.actual}")
+    return 1 if report.divergences else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,55 @@
+import itertools
+import time
+from typing import List, Optional, Tuple
+
+from products import Product
+
+_reservation_ids = itertools.count(1)
+
+
+class Reservation:
+    """
+    Represents stock held for a shopping cart that will be checked out later.
+
+    A reservation is created by Store.reserve(). While it is open, its units are
+    not available to other orders. It ends when it is committed, released, or
+    when its timeout passes.
+
+    Attributes:
+        reservation_id (int): A unique id for the reservation.
+        lines (List[Tuple[Product, int]]): The reserved products and quantities,
+            with duplicate products already merged.
+        expires_at (Optional[float]): The time.monotonic() deadline, or None if it never expires.
+    """
+
+    def __init__(self, store, lines: List[Tuple[Product, int]], expires_at: Optional[float]):
+        """
+        Initializes a reservation. Use Store.reserve() rather than calling this directly.
+
+        Args:
+            store (Store): The store holding the stock.
+            lines (List[Tuple[Product, int]]): The merged lines to reserve.
+            expires_at (Optional[float]): The monotonic deadline, or None.
+        """
+        self.reservation_id = next(_reservation_ids)
+        self.lines = lines
+        self.expires_at = expires_at
+        self._store = store
+
+    def is_expired(self, now: Optional[float] = None) -> bool:
+        """Returns whether the reservation's timeout has passed."""
+        if self.expires_at is None:
+            return False
+        return (time.monotonic() if now is None else now) >= self.expires_at
+
+    def is_open(self) -> bool:
+        """Returns whether the reservation still holds stock."""
+        return self._store.has_reservation(self)
+
+    def commit(self) -> Tuple[float, float]:
+        """Buys every reserved line at once and returns the total price and savings."""
+        return self._store.commit_reservation(self)
+
+    def release(self) -> None:
+        """Gives the reserved stock back without buying anything."""
+        self._store.release_reservation(self)
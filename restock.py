@@ -0,0 +1,273 @@
+"""
+Demand-aware restock planning over a store's order stream.
+
+A RestockPlanner listens to every completed order of a Store and keeps, per
+SKU, an exponentially decayed estimate of its sales rate: each unit sold adds
+to the rate, and the rate halves every ``half_life`` seconds without sales.
+This needs O(1) memory per product that has sold, however long the stream.
+
+Products are ranked by predicted time to stock-out (stock / current rate).
+Because every rate decays at the same speed, two products' ranking does not
+change with the passage of time, only when one of them sells or is
+restocked. So the ranking is kept in a heap whose entries are updated in
+O(log n) per order line, with stale entries discarded lazily.
+
+    planner = RestockPlanner(best_buy, half_life=3 * 3600, alert_horizon=3600,
+                             on_alert=lambda product, seconds: print("Low stock:", product.name))
+    ...
+    planner.restock(planner.plan(cover=7 * 24 * 3600))
+"""
+import heapq
+import logging
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from products import NonStockedProduct, Product
+from store import Store
+
+logger = logging.getLogger(__name__)
+
+# Keys above this are exp() overflow territory: the product is not expected to sell out.
+_MAX_EXPONENT = 700.0
+
+
+class _Demand:
+    """The decayed sales rate of one product, held as log(rate) + time / tau."""
+
+    __slots__ = ("product", "log_weight", "version")
+
+    def __init__(self, product: Product):
+        self.product = product
+        self.log_weight = -math.inf
+        self.version = 0
+
+
+def _log_add(first: float, second: float) -> float:
+    """Returns log(exp(first) + exp(second)) without overflowing."""
+    if first < second:
+        first, second = second, first
+    if second == -math.inf:
+        return first
+    return first + math.log1p(math.exp(second - first))
+
+
+class RestockPlanner:
+    """
+    Tracks demand per SKU from a store's orders and ranks products by how soon
+    they will run out.
+
+    Attributes:
+        store (Store): The store whose orders are tracked.
+        half_life (float): Seconds after which past sales count half as much.
+    """
+
+    def __init__(self, store: Store, half_life: float = 86_400.0,
+                 alert_horizon: Optional[float] = None,
+                 on_alert: Optional[Callable[[Product, float], None]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Starts listening to the store's orders.
+
+        Args:
+            store (Store): The store to track.
+            half_life (float): Seconds after which a sale counts half as much towards
+                the demand estimate.
+            alert_horizon (Optional[float]): If set, on_alert is called once when a sale
+                leaves a product predicted to sell out within this many seconds. It is
+                called again only after the product has been restocked.
+            on_alert (Optional[Callable[[Product, float], None]]): Called with the product
+                and its predicted seconds to stock-out.
+            clock (Callable[[], float]): The time source, in seconds.
+
+        Raises:
+            ValueError: If the half-life or alert horizon is not positive.
+        """
+        if half_life <= 0 or (alert_horizon is not None and alert_horizon <= 0):
+            raise ValueError("Half-life and alert horizon must be greater than zero")
+        self.store = store
+        self.half_life = half_life
+        self.alert_horizon = alert_horizon
+        self.on_alert = on_alert
+        self._tau = half_life / math.log(2)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._demand: Dict[int, _Demand] = {}
+        self._heap: List[Tuple[float, int, int]] = []
+        self._alerted: Set[int] = set()
+        store.add_order_listener(self.record)
+
+    def close(self) -> None:
+        """Stops listening to the store's orders."""
+        self.store.remove_order_listener(self.record)
+
+    def _key(self, demand: _Demand) -> float:
+        """
+        Returns the product's time-invariant rank: log(stock / rate) - now / tau.
+
+        Adding now / tau turns it back into the log of the seconds to stock-out.
+        """
+        quantity = demand.product.quantity
+        return math.log(quantity) - demand.log_weight if quantity > 0 else -math.inf
+
+    def _push(self, key: int, demand: _Demand) -> None:
+        """Re-ranks a product; any older heap entry for it becomes stale."""
+        demand.version += 1
+        heapq.heappush(self._heap, (self._key(demand), demand.version, key))
+        # Stale entries are dropped as they surface; rebuild if they pile up.
+        if len(self._heap) > 2 * len(self._demand) + 64:
+            self._heap = [(self._key(tracked), tracked.version, tracked_key)
+                          for tracked_key, tracked in self._demand.items()]
+            heapq.heapify(self._heap)
+
+    def record(self, lines: List[Tuple[Product, int]]) -> None:
+        """
+        Adds an order's lines to the demand estimates. Called by the store for every
+        completed order; call it directly to feed in orders from elsewhere.
+        """
+        now, tau = self._clock(), self._tau
+        offset = now / tau - math.log(tau)
+        log, tracked, horizon = math.log, self._demand, self.alert_horizon
+        alerts = []
+        with self._lock:
+            for product, quantity in lines:
+                if quantity <= 0 or isinstance(product, NonStockedProduct):
+                    continue
+                key = id(product)
+                demand = tracked.get(key)
+                if demand is None or demand.product is not product:
+                    demand = tracked[key] = _Demand(product)
+                # rate += quantity / tau, in the time-shifted log space of _Demand.
+                demand.log_weight = _log_add(demand.log_weight, log(quantity) + offset)
+                self._push(key, demand)
+                if horizon is not None and key not in self._alerted:
+                    seconds = self._seconds_left(demand, now)
+                    if seconds <= horizon:
+                        self._alerted.add(key)
+                        alerts.append((product, seconds))
+        if self.on_alert is not None:
+            for product, seconds in alerts:
+                try:
+                    self.on_alert(product, seconds)
+                except Exception:
+                    # record() runs inside the store's order path; one bad alert must not
+                    # cost the others, nor fail the order that triggered it.
+                    logger.exception("Restock alert for %s failed", product.name)
+
+    def _seconds_left(self, demand: _Demand, now: float) -> float:
+        """Returns the predicted seconds until a tracked product sells out."""
+        exponent = self._key(demand) + now / self._tau
+        return math.exp(exponent) if exponent < _MAX_EXPONENT else math.inf
+
+    def demand_rate(self, product: Product) -> float:
+        """Returns the product's estimated current sales rate, in units per second."""
+        demand = self._demand.get(id(product))
+        if demand is None or demand.product is not product:
+            return 0.0
+        return math.exp(demand.log_weight - self._clock() / self._tau)
+
+    def time_to_stockout(self, product: Product) -> float:
+        """Returns the predicted seconds until the product sells out; inf if it has no demand."""
+        demand = self._demand.get(id(product))
+        if demand is None or demand.product is not product:
+            return 0.0 if product.quantity == 0 and not isinstance(product, NonStockedProduct) else math.inf
+        return self._seconds_left(demand, self._clock())
+
+    def _ranked(self) -> Iterator[Tuple[_Demand, float]]:
+        """
+        Pops tracked products still in the store off the heap, soonest stock-out first.
+
+        The caller must hold the lock and push the yielded products back.
+        """
+        heap, now = self._heap, self._clock()
+        while heap:
+            stored_key, version, key = heapq.heappop(heap)
+            demand = self._demand.get(key)
+            if demand is None or demand.version != version:
+                continue
+            if demand.product not in self.store:
+                del self._demand[key]
+                self._alerted.discard(key)
+                continue
+            actual_key = self._key(demand)
+            if actual_key != stored_key:
+                # The stock changed outside orders and restock(); rank it again.
+                heapq.heappush(heap, (actual_key, version, key))
+                continue
+            yield demand, self._seconds_left(demand, now)
+
+    def _take(self, keep: Callable[[int, float], bool]) -> List[Tuple[Product, float]]:
+        """Returns leading ranked products while keep(count so far, seconds) holds."""
+        with self._lock:
+            taken, popped = [], []
+            for demand, seconds in self._ranked():
+                popped.append(demand)
+                if not keep(len(taken), seconds):
+                    break
+                taken.append((demand.product, seconds))
+            for demand in popped:
+                heapq.heappush(self._heap, (self._key(demand), demand.version, id(demand.product)))
+            return taken
+
+    def most_urgent(self, count: int = 10) -> List[Tuple[Product, float]]:
+        """
+        Returns the products predicted to sell out first.
+
+        Runs in O(count log n); products that are already out of stock come first.
+
+        Returns:
+            List[Tuple[Product, float]]: Up to count (product, seconds to stock-out) pairs.
+        """
+        return self._take(lambda taken, seconds: taken < count) if count > 0 else []
+
+    def low_stock(self, horizon: float) -> List[Tuple[Product, float]]:
+        """Returns every tracked product predicted to sell out within horizon seconds, soonest first."""
+        return self._take(lambda taken, seconds: seconds <= horizon)
+
+    def plan(self, cover: float, horizon: Optional[float] = None) -> List[Tuple[Product, int]]:
+        """
+        Suggests restock amounts that cover the predicted demand.
+
+        Args:
+            cover (float): Seconds of demand, at the current rate, that stock should last.
+            horizon (Optional[float]): Only consider products predicted to sell out within
+                this many seconds; defaults to cover.
+
+        Returns:
+            List[Tuple[Product, int]]: Products and the units to add, soonest stock-out first,
+            ready for restock().
+        """
+        horizon = cover if horizon is None else horizon
+        lines = []
+        for product, _ in self.low_stock(horizon):
+            amount = math.ceil(self.demand_rate(product) * cover) - product.quantity
+            if amount > 0:
+                lines.append((product, amount))
+        return lines
+
+    def restock(self, lines: Iterable[Tuple[Product, int]]) -> None:
+        """
+        Adds stock to many products and reactivates them, re-ranking each in O(log n).
+
+        Raises:
+            ValueError: If a product is not in the store or is not stocked, or an amount is
+                not positive. Nothing is restocked in that case.
+        """
+        lines = list(lines)
+        for product, amount in lines:
+            if product not in self.store:
+                raise ValueError(f"Product {product.name} is not in the store.")
+            if isinstance(product, NonStockedProduct):
+                raise ValueError(f"Product {product.name} is not stocked.")
+            if amount <= 0:
+                raise ValueError("Restock amount must be greater than zero")
+        for product, amount in lines:
+            self.store.restock(product, amount)
+        with self._lock:
+            for product, _ in lines:
+                key = id(product)
+                self._alerted.discard(key)
+                demand = self._demand.get(key)
+                if demand is not None and demand.product is product:
+                    self._push(key, demand)
@@ -0,0 +1,306 @@
+import bisect
+import hashlib
+import itertools
+import multiprocessing
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from money import from_cents, to_cents
+from products import Product
+from store import Store
+
+
+class ConsistentHashRing:
+    """
+    Maps product names (SKUs) to shards on a consistent-hash ring.
+
+    Each shard is placed on the ring ``replicas`` times, and a name belongs to
+    the first shard point at or after its own hash. Adding a shard therefore
+    moves only about 1/N of the names.
+    """
+
+    def __init__(self, shard_count: int, replicas: int = 64):
+        """
+        Initializes the ring.
+
+        Args:
+            shard_count (int): The number of shards.
+            replicas (int): Virtual points per shard; more points even out the split.
+        """
+        if shard_count <= 0 or replicas <= 0:
+            raise ValueError("Shard count and replicas must be greater than zero")
+        points = sorted((self._hash(f"shard-{shard}#{replica}"), shard)
+                        for shard in range(shard_count) for replica in range(replicas))
+        self._hashes = [point for point, _ in points]
+        self._shards = [shard for _, shard in points]
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+    def shard_for(self, name: str) -> int:
+        """Returns the shard that owns a product name."""
+        index = bisect.bisect_left(self._hashes, self._hash(name))
+        return self._shards[index % len(self._shards)]
+
+
+def _worker_main(connection, products: List[Product]) -> None:
+    """
+    Serves one shard: owns a Store and answers requests from the router.
+
+    Requests are tuples whose first item names the operation; every request
+    gets exactly one ("ok", result) or ("error", message) reply.
+    """
+    store = Store(products)
+    reservations = {}
+
+    def resolve(lines):
+        resolved = []
+        for name, quantity in lines:
+            product = store.get_product(name)
+            if product is None:
+                raise ValueError(f"Product {name} is not available in the store.")
+            resolved.append((product, quantity))
+        return resolved
+
+    def handle(request):
+        operation = request[0]
+        if operation == "order":
+            return store.order(resolve(request[1]))
+        if operation == "orders":
+            results = []
+            for lines in request[1]:
+                try:
+                    results.append(("ok", store.order(resolve(lines))))
+                except Exception as error:
+                    results.append(("error", str(error)))
+            return results
+        if operation == "reserve":
+            reservation = store.reserve(resolve(request[2]))
+            try:
+                # Priced now, so that the commit only takes stock that is already held.
+                totals = store.quote(reservation.lines)
+            except Exception:
+                reservation.release()
+                raise
+            reservations[request[1]] = (reservation, totals)
+            return None
+        if operation == "commit":
+            reservation, totals = reservations.pop(request[1])
+            try:
+                return store.commit_reservation(reservation, totals)
+            except Exception:
+                reservation.release()
+                raise
+        if operation == "release":
+            entry = reservations.pop(request[1], None)
+            if entry is not None:
+                entry[0].release()
+            return None
+        if operation == "quantity":
+            return {product.name: product.quantity for product in store.product_list} \
+                if request[1] else store.get_total_quantity()
+        raise ValueError(f"Unknown operation {operation}")
+
+    while True:
+        request = connection.recv()
+        if request[0] == "stop":
+            connection.close()
+            return
+        try:
+            connection.send(("ok", handle(request)))
+        except Exception as error:
+            # Any failure is answered, so the router never waits for a reply that will not come.
+            connection.send(("error", str(error)))
+
+
+class ShardedStore:
+    """
+    Spreads a catalog over several worker processes.
+
+    Products are assigned to shards with a ConsistentHashRing on their names,
+    and each shard runs its own Store in a separate process, so orders can use
+    more than one core. The router splits a shopping list by shard. An order
+    that touches one shard is sent as a plain order; an order that spans
+    shards uses two-phase commit: every shard reserves and prices its lines
+    first, and the order is committed everywhere only if all reservations
+    succeed, so the commit itself only takes stock that is already held.
+
+    Workers hold their own copies of the products, so shopping lists may use
+    either product objects or names, and stock must be read back through the
+    router (get_quantities(), get_total_quantity()).
+    """
+
+    def __init__(self, products: Iterable[Product], workers: int = 2, replicas: int = 64,
+                 start_method: Optional[str] = None):
+        """
+        Starts one worker process per shard.
+
+        Args:
+            products (Iterable[Product]): The catalog; names must be unique.
+            workers (int): The number of shards (worker processes).
+            replicas (int): Virtual ring points per shard.
+            start_method (Optional[str]): The multiprocessing start method, e.g. "spawn".
+        """
+        self.ring = ConsistentHashRing(workers, replicas)
+        partitions: List[List[Product]] = [[] for _ in range(workers)]
+        for product in products:
+            partitions[self.ring.shard_for(product.name)].append(product)
+        context = multiprocessing.get_context(start_method)
+        self._connections = []
+        self._processes = []
+        for partition in partitions:
+            parent_end, child_end = context.Pipe()
+            process = context.Process(target=_worker_main, args=(child_end, partition), daemon=True)
+            process.start()
+            child_end.close()
+            self._connections.append(parent_end)
+            self._processes.append(process)
+        self._transaction_ids = itertools.count(1)
+
+    @staticmethod
+    def _name_lines(shopping_list: Sequence[Tuple[Union[Product, str], int]]) -> List[Tuple[str, int]]:
+        """Converts a shopping list to (name, quantity) pairs."""
+        return [(item if isinstance(item, str) else item.name, quantity) for item, quantity in shopping_list]
+
+    def _split(self, lines: List[Tuple[str, int]]) -> Dict[int, List[Tuple[str, int]]]:
+        """Groups (name, quantity) lines by owning shard."""
+        by_shard: Dict[int, List[Tuple[str, int]]] = {}
+        for name, quantity in lines:
+            by_shard.setdefault(self.ring.shard_for(name), []).append((name, quantity))
+        return by_shard
+
+    def _call_all(self, requests: Dict[int, tuple]) -> Dict[int, tuple]:
+        """Sends one request to each given shard, then collects every reply."""
+        for shard, request in requests.items():
+            self._connections[shard].send(request)
+        return {shard: self._connections[shard].recv() for shard in requests}
+
+    def _call_each(self, request: tuple) -> List:
+        """Sends the same request to every shard and returns the results, raising ValueError on any error."""
+        replies = self._call_all({shard: request for shard in range(len(self._connections))})
+        for status, result in replies.values():
+            if status == "error":
+                raise ValueError(result)
+        return [result for _, result in replies.values()]
+
+    @staticmethod
+    def _merge_totals(results: Iterable[Tuple[float, float]]) -> Tuple[float, float]:
+        """Sums per-shard totals in cents, so the merged totals are exact."""
+        total_price = 0
+        total_savings = 0
+        for price, savings in results:
+            total_price += to_cents(price)
+            total_savings += to_cents(savings)
+        return from_cents(total_price), from_cents(total_savings)
+
+    def _order_split(self, by_shard: Dict[int, List[Tuple[str, int]]]) -> Tuple[float, float]:
+        """Places an order that has already been split by shard."""
+        if len(by_shard) == 1:
+            (shard, lines), = by_shard.items()
+            status, result = self._call_all({shard: ("order", lines)})[shard]
+            if status == "error":
+                raise ValueError(result)
+            return result
+
+        transaction_id = next(self._transaction_ids)
+        replies = self._call_all({shard: ("reserve", transaction_id, lines)
+                                  for shard, lines in by_shard.items()})
+        failures = [result for status, result in replies.values() if status == "error"]
+        if failures:
+            reserved = {shard: ("release", transaction_id)
+                        for shard, (status, _) in replies.items() if status == "ok"}
+            self._call_all(reserved)
+            raise ValueError(failures[0])
+        replies = self._call_all({shard: ("commit", transaction_id) for shard in by_shard})
+        failures = [result for status, result in replies.values() if status == "error"]
+        if failures:
+            # Lines are priced when reserved, so this takes a shard failing outright; the
+            # shards that committed cannot be undone.
+            committed = sorted(shard for shard, (status, _) in replies.items() if status == "ok")
+            raise ValueError(f"Order failed to commit on some shards and was committed on shards "
+                             f"{committed}: {failures[0]}")
+        return self._merge_totals(result for _, result in replies.values())
+
+    def order(self, shopping_list: List[Tuple[Union[Product, str], int]]) -> Tuple[float, float]:
+        """
+        Processes an order across shards, all-or-nothing.
+
+        Returns:
+            Tuple[float, float]: The total price and total savings, summed over shards.
+
+        Raises:
+            ValueError: If any line fails; no shard changes its stock in that case.
+        """
+        by_shard = self._split(self._name_lines(shopping_list))
+        if not by_shard:
+            return 0.0, 0.0
+        return self._order_split(by_shard)
+
+    def order_many(self, shopping_lists: Sequence[List[Tuple[Union[Product, str], int]]]) -> List:
+        """
+        Processes many orders, letting shards work on them in parallel.
+
+        Orders that touch a single shard are sent to their shards in one batch
+        per shard and run concurrently; orders that span shards then run one by
+        one with two-phase commit. Each order is still all-or-nothing.
+
+        Returns:
+            List: For each order, (total_price, total_savings) or the ValueError it raised.
+        """
+        results: List = [None] * len(shopping_lists)
+        batches: Dict[int, List[Tuple[int, List[Tuple[str, int]]]]] = {}
+        cross_shard = []
+        for position, shopping_list in enumerate(shopping_lists):
+            by_shard = self._split(self._name_lines(shopping_list))
+            if len(by_shard) == 1:
+                (shard, lines), = by_shard.items()
+                batches.setdefault(shard, []).append((position, lines))
+            elif not by_shard:
+                results[position] = (0.0, 0.0)
+            else:
+                cross_shard.append((position, by_shard))
+
+        replies = self._call_all({shard: ("orders", [lines for _, lines in batch])
+                                  for shard, batch in batches.items()})
+        for shard, batch in batches.items():
+            status, outcomes = replies[shard]
+            if status == "error":
+                outcomes = [(status, outcomes)] * len(batch)
+            for (position, _), (status, result) in zip(batch, outcomes):
+                results[position] = result if status == "ok" else ValueError(result)
+        for position, by_shard in cross_shard:
+            try:
+                results[position] = self._order_split(by_shard)
+            except ValueError as error:
+                results[position] = error
+        return results
+
+    def get_quantities(self) -> Dict[str, int]:
+        """Returns the current stock of every product, by name."""
+        quantities = {}
+        for result in self._call_each(("quantity", True)):
+            quantities.update(result)
+        return quantities
+
+    def get_total_quantity(self) -> int:
+        """Returns the total quantity of all products across shards."""
+        return sum(self._call_each(("quantity", False)))
+
+    def close(self) -> None:
+        """Stops every worker process."""
+        for connection in self._connections:
+            try:
+                connection.send(("stop",))
+            except (BrokenPipeError, OSError):
+                pass
+            connection.close()
+        for process in self._processes:
+            process.join(timeout=5)
+        self._connections = []
+        self._processes = []
+
+    def __enter__(self) -> "ShardedStore":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
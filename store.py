@@ -1,43 +1,422 @@
-from typing import List, Tuple
-from products import Product
+import heapq
+import logging
+import threading
+import time
+from itertools import chain, compress, islice
+from operator import attrgetter, mul
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+from money import from_cents
+from products import InvalidQuantityError, NonStockedProduct, Product, ProductUnavailableError, subscribe_all
+from quote_cache import QuoteCache
+from reservations import Reservation
+
+logger = logging.getLogger(__name__)
+# quote() prices a promotion's lines one by one below this many, and as one batch from it on.
+_MIN_BATCH_LINES = 4
 
 class Store:
     """
     A class to represent a store that manages products.
 
+    Products are kept in an insertion-ordered catalog keyed by identity, with a
+    secondary index by name (SKU) and a set of active products. The store
+    subscribes to each product, so activation changes keep the active set
+    current and lookups, membership tests and removals are O(1).
+
+    The store also keeps running totals of units in stock and of the stock's
+    value at list price and after promotions. Each product's share is cached
+    and swapped in O(1) whenever the product reports a change.
+
+    All money is summed in whole cents, so order totals, savings and stock
+    values are exact; they are returned as dollar floats.
+
+    Listing rows are rendered lazily and cached per product until that
+    product's price, quantity or promotion changes (see iter_lines()).
+    Price-range, name-prefix and promotion lookups go through index, which
+    is built on first use and then kept current.
+
     Attributes:
-        product_list (List[Product]): A list of Product objects available in the store.
+        product_list (List[Product]): The products managed by the store, in insertion order.
     """
 
-    def __init__(self, product_list: List[Product]):
+    def __init__(self, product_list: Iterable[Product], quote_cache_size: int = 4096):
         """
         Initializes the Store instance with a list of products.
 
         Args:
-            product_list (List[Product]): The initial list of products to be managed by the store.
+            product_list (Iterable[Product]): The initial products to be managed by the store.
+            quote_cache_size (int): How many line prices quote() may cache; 0 disables the cache.
         """
-        self.product_list = product_list
+        self._products: Dict[int, Product] = {}
+        self._by_name: Dict[str, Product] = {}
+        self._active: Set[int] = set()
+        self._ordered: Optional[List[Product]] = None
+        self._reserved: Dict[int, int] = {}
+        self._reservations: Dict[int, Reservation] = {}
+        self._expiry_heap: List[Tuple[float, int]] = []
+        self._reservation_lock = threading.RLock()
+        self._aggregate_lock = threading.Lock()
+        self._contributions: Dict[int, Tuple[int, int]] = {}
+        self._total_quantity = 0
+        self._list_value = 0
+        self._promotional_contributions: Dict[int, int] = {}
+        self._stale_promotional: Dict[int, Product] = {}
+        self._promotional_value = 0
+        self._pricing_plan = None
+        self._quote_cache = QuoteCache(quote_cache_size)
+        self._rendered: Dict[int, str] = {}
+        self._catalog_version = 0
+        self._order_listeners: Tuple[Callable[[List[Tuple[Product, int]]], None], ...] = ()
+        self._catalog_index = None
+        for product in product_list:
+            self.add_product(product)
+
+    @classmethod
+    def restore(cls, products: List[Product], promotional_cents: Sequence[int],
+                quote_cache_size: int = 4096) -> "Store":
+        """
+        Builds a store from products whose promotional stock values are already known.
+
+        This is the bulk counterpart of the constructor used when loading a saved
+        catalog image: rather than pricing every product's stock with its
+        promotion again, it adopts the value saved alongside each product.
+
+        Args:
+            products (List[Product]): Distinct products, in catalog order.
+            promotional_cents (Sequence[int]): The price in cents of each product's whole
+                stock with its promotion applied, in the same order.
+            quote_cache_size (int): How many line prices quote() may cache; 0 disables the cache.
+
+        Raises:
+            ValueError: If a product appears twice or there is not one value per product.
+        """
+        if len(promotional_cents) != len(products):
+            raise ValueError("Need one promotional value per product")
+        store = cls((), quote_cache_size)
+        # Built with C-level map/zip rather than a Python loop; this is the hot path of startup.
+        keys = list(map(id, products))
+        store._products = dict(zip(keys, products))
+        if len(store._products) != len(keys):
+            raise ValueError("A product cannot be added to a store twice")
+        store._by_name = dict(zip(map(attrgetter("name"), products), products))
+        store._active = set(compress(keys, map(attrgetter("active"), products)))
+        quantities = list(map(attrgetter("quantity"), products))
+        list_values = list(map(mul, map(attrgetter("price_cents"), products), quantities))
+        store._contributions = dict(zip(keys, zip(quantities, list_values)))
+        store._total_quantity = sum(quantities)
+        store._list_value = sum(list_values)
+        store._promotional_contributions = dict(zip(keys, promotional_cents))
+        store._promotional_value = sum(promotional_cents)
+        subscribe_all(products, store)
+        for promotion in {id(promotion): promotion for promotion in map(attrgetter("promotion"), products)
+                          if promotion is not None}.values():
+            promotion.subscribe(store)
+        store._catalog_version = len(keys)
+        return store
+
+    @property
+    def product_list(self) -> List[Product]:
+        """Returns the products in insertion order (treat as read-only)."""
+        if self._ordered is None:
+            self._ordered = list(self._products.values())
+        return self._ordered
 
     def add_product(self, product: Product) -> None:
-        """Adds a Product object to the store."""
-        self.product_list.append(product)
+        """Adds a Product object to the store. Adding the same product twice has no effect."""
+        key = id(product)
+        if key in self._products:
+            return
+        self._products[key] = product
+        self._by_name[product.name] = product
+        if product.is_active():
+            self._active.add(key)
+        self._ordered = None
+        self._catalog_version += 1
+        self._update_aggregates(product)
+        product.subscribe(self)
+        if product.promotion is not None:
+            product.promotion.subscribe(self)
+        if self._catalog_index is not None:
+            self._catalog_index.add(product)
 
     def remove_product(self, product: Product) -> None:
         """Removes a Product object from the store."""
-        self.product_list.remove(product)
+        key = id(product)
+        if key not in self._products:
+            raise ValueError(f"Product {product.name} is not in the store.")
+        del self._products[key]
+        if self._by_name.get(product.name) is product:
+            del self._by_name[product.name]
+        self._active.discard(key)
+        self._ordered = None
+        self._catalog_version += 1
+        product.unsubscribe(self)
+        self._update_aggregates(product, removed=True)
+        self._quote_cache.forget(product)
+        self._rendered.pop(key, None)
+        if self._catalog_index is not None:
+            self._catalog_index.remove(product)
+
+    def get_product(self, name: str) -> Optional[Product]:
+        """Looks up a product by its name (SKU), returning None if it is not in the store."""
+        return self._by_name.get(name)
+
+    @property
+    def index(self):
+        """
+        The store's CatalogIndex: price order, name prefix and promotion lookups.
+
+        It is built on first use and from then on kept current as products are
+        added, removed, repriced or given a new promotion.
+        """
+        if self._catalog_index is None:
+            from catalog_index import CatalogIndex
+            self._catalog_index = CatalogIndex(self, self._products.values())
+        return self._catalog_index
+
+    @property
+    def catalog_version(self) -> int:
+        """A counter that changes whenever a product is added or removed."""
+        return self._catalog_version
+
+    def on_product_changed(self, product: Product, attribute: str) -> None:
+        """Keeps the store's indexes in sync when one of its products changes."""
+        if attribute == "active":
+            if product.is_active():
+                self._active.add(id(product))
+            else:
+                self._active.discard(id(product))
+        elif attribute == "maximum":
+            self._rendered.pop(id(product), None)
+        else:
+            self._update_aggregates(product)
+            self._rendered.pop(id(product), None)
+            if attribute != "quantity":
+                self._quote_cache.invalidate(product)
+                if self._catalog_index is not None:
+                    self._catalog_index.on_product_changed(product, attribute)
+                if attribute == "promotion" and product.promotion is not None:
+                    product.promotion.subscribe(self)
+
+    def on_promotion_changed(self, promotion) -> None:
+        """
+        Marks the stock of every product sold with a promotion whose pricing changed for
+        repricing, and drops their cached line prices.
+
+        This scans the catalog once; promotions are edited far less often than they are applied.
+        """
+        for product in self._products.values():
+            if product.promotion is promotion:
+                self._update_aggregates(product)
+                self._quote_cache.invalidate(product)
+
+    @staticmethod
+    def _contribution(product: Product) -> Tuple[int, int]:
+        """Returns a product's units and list value (in cents)."""
+        quantity = product.quantity
+        return quantity, product.price_cents * quantity
+
+    @staticmethod
+    def _promotional_contribution(product: Product) -> int:
+        """Returns the price in cents of a product's whole stock with its promotion applied."""
+        quantity = product.quantity
+        return product.price_for_cents(quantity) if quantity else 0
+
+    def _update_aggregates(self, product: Product, removed: bool = False) -> None:
+        """
+        Replaces a product's cached share of the running totals.
+
+        Its promotional value is only marked stale here and repriced when it is next
+        read, so that no promotion code runs while an order changes stock.
+        """
+        key = id(product)
+        new = (0, 0) if removed else self._contribution(product)
+        with self._aggregate_lock:
+            old = self._contributions.pop(key, (0, 0))
+            if removed:
+                self._stale_promotional.pop(key, None)
+                self._promotional_value -= self._promotional_contributions.pop(key, 0)
+            else:
+                self._contributions[key] = new
+                self._stale_promotional[key] = product
+            self._total_quantity += new[0] - old[0]
+            self._list_value += new[1] - old[1]
+
+    def _refresh_promotional_value(self) -> int:
+        """Reprices the stock of every product marked stale and returns the promotional value."""
+        with self._aggregate_lock:
+            stale = self._stale_promotional
+            while stale:
+                key, product = next(iter(stale.items()))
+                # Priced before the entry is dropped, so a promotion that raises leaves it stale.
+                value = self._promotional_contribution(product)
+                del stale[key]
+                self._promotional_value += value - self._promotional_contributions.get(key, 0)
+                self._promotional_contributions[key] = value
+            return self._promotional_value
+
+    def get_active_count(self) -> int:
+        """Returns the number of active products."""
+        return len(self._active)
+
+    def get_inventory_value(self) -> float:
+        """Returns the value of all stock at list price."""
+        return from_cents(self._list_value)
+
+    def get_promotional_value(self) -> float:
+        """
+        Returns the value of all stock if each product's stock were bought with its promotion.
+
+        Products whose stock, price or promotion changed since the last call are repriced first.
+        """
+        return from_cents(self._refresh_promotional_value())
+
+    def verify_aggregates(self) -> None:
+        """
+        Recomputes every running total from scratch and compares.
+
+        Raises:
+            ValueError: If a running total or the active set has drifted from the catalog.
+        """
+        products = self._products.values()
+        expected_active = {id(product) for product in products if product.is_active()}
+        if expected_active != self._active:
+            raise ValueError("Active product set is out of date")
+        contributions = [self._contribution(product) for product in products]
+        expected_quantity = sum(units for units, _ in contributions)
+        if expected_quantity != self._total_quantity:
+            raise ValueError(f"Total quantity is {self._total_quantity}, expected {expected_quantity}")
+        promotional_value = self._refresh_promotional_value()
+        for label, actual, expected in (
+                ("Inventory value", self._list_value, sum(value for _, value in contributions)),
+                ("Promotional value", promotional_value,
+                 sum(self._promotional_contribution(product) for product in products))):
+            if actual != expected:
+                raise ValueError(f"{label} is {from_cents(actual)}, expected {from_cents(expected)}")
+
+    def is_available(self, product: Product) -> bool:
+        """Returns whether the product belongs to the store and is active."""
+        return id(product) in self._active
 
     def get_total_quantity(self) -> int:
-        """Calculates and returns the total quantity of all products in the store."""
-        return sum(product.quantity for product in self.product_list)
+        """Returns the total quantity of all products in the store."""
+        return self._total_quantity
 
     def get_all_products(self) -> List[Product]:
         """Retrieves all active products in the store."""
-        return [product for product in self.product_list if product.is_active()]
+        active = self._active
+        return [product for key, product in self._products.items() if key in active]
+
+    def restock(self, product: Product, amount: int) -> None:
+        """
+        Adds stock to a product and reactivates it.
+
+        Raises:
+            ValueError: If the product is not in the store, is not stocked, or the amount
+                is not positive.
+        """
+        if id(product) not in self._products:
+            raise ValueError(f"Product {product.name} is not in the store.")
+        if isinstance(product, NonStockedProduct):
+            raise ValueError(f"Product {product.name} is not stocked.")
+        if amount <= 0:
+            raise ValueError("Restock amount must be greater than zero")
+        product.quantity += amount
+        product.activate()
+
+    @staticmethod
+    def _merge_lines(shopping_list: List[Tuple[Product, int]]) -> List[Tuple[Product, int]]:
+        """Combines repeated products in a shopping list, keeping first-seen order."""
+        merged: Dict[int, List] = {}
+        for product, quantity in shopping_list:
+            line = merged.get(id(product))
+            if line is None:
+                merged[id(product)] = [product, quantity]
+            else:
+                line[1] += quantity
+        return [(product, quantity) for product, quantity in merged.values()]
+
+    def _validate(self, lines: List[Tuple[Product, int]]) -> None:
+        """Checks every merged line against availability, limits and unreserved stock."""
+        reserved = self._reserved
+        for product, quantity in lines:
+            if not self.is_available(product):
+                raise ProductUnavailableError(f"Product {product.name} is not available in the store.")
+            product.check_purchase(quantity, reserved.get(id(product), 0))
+
+    def set_pricing_plan(self, plan) -> None:
+        """
+        Prices orders and quotes with a compiled promotion plan.
+
+        Args:
+            plan (Optional[EvaluationPlan]): A plan from PromotionEngine.compile(), or None to
+                price each line with its product's own promotion again.
+        """
+        self._pricing_plan = plan
+
+    def add_order_listener(self, listener: Callable[[List[Tuple[Product, int]]], None]) -> None:
+        """
+        Registers a callable that is told about every completed order.
+
+        After an order or a committed reservation has bought its lines, each
+        listener is called with the merged (product, quantity) lines, on the
+        thread that placed the order. Failed orders are not reported.
+
+        The order has already happened when listeners run, so an exception from
+        a listener is logged and swallowed rather than raised from order().
+        """
+        if listener not in self._order_listeners:
+            self._order_listeners += (listener,)
+
+    def remove_order_listener(self, listener: Callable[[List[Tuple[Product, int]]], None]) -> None:
+        """Unregisters an order listener. Removing one that is not registered has no effect."""
+        self._order_listeners = tuple(existing for existing in self._order_listeners
+                                      if existing != listener)
+
+    def _commit(self, lines: List[Tuple[Product, int]],
+                totals: Optional[Tuple[float, float]] = None) -> Tuple[float, float]:
+        """
+        Buys lines that have already been validated and totals price and savings.
+
+        If totals are given, the lines were priced beforehand and only their stock is taken.
+        """
+        if totals is not None:
+            for product, quantity in lines:
+                product.take_stock(quantity)
+            self._notify_listeners(lines)
+            return totals
+        # Every line is priced before any stock moves, so a promotion that raises leaves the stock as it was.
+        if self._pricing_plan is not None:
+            total_price, total_savings = self._pricing_plan.price_cents(lines)
+        else:
+            total_price = 0
+            total_savings = 0
+            for product, quantity in lines:
+                original_price = product.price_cents * quantity
+                final_price = product.price_for_cents(quantity)
+                total_price += final_price
+                total_savings += original_price - final_price
+        for product, quantity in lines:
+            product.take_stock(quantity)
+        self._notify_listeners(lines)
+        return from_cents(total_price), from_cents(total_savings)
+
+    def _notify_listeners(self, lines: List[Tuple[Product, int]]) -> None:
+        """Tells every order listener about a completed order."""
+        for listener in self._order_listeners:
+            try:
+                listener(lines)
+            except Exception:
+                # The stock is already taken; raising now would report a completed order as failed.
+                logger.exception("Order listener %r failed", listener)
 
     def order(self, shopping_list: List[Tuple[Product, int]]) -> Tuple[float, float]:
         """
         Processes an order and calculates the total price and total savings.
 
+        The order is all-or-nothing: repeated products are merged, every line is
+        validated first, and stock is only reduced once all lines have passed.
+
         Args:
             shopping_list (List[Tuple[Product, int]]): A list of tuples where each tuple contains
                 a Product object and the quantity to order.
@@ -46,41 +425,268 @@ class Store:
             Tuple[float, float]: The total price of the order and total savings from promotions.
 
         Raises:
-            ValueError: If a product is not available in the store.
+            PurchaseError: A ValueError whose subclass names the reason: the product is not
+                available in the store, a purchase limit is exceeded, or there is not enough
+                unreserved stock. No stock is changed.
         """
-        total_price = 0.0
-        total_savings = 0.0
-        active_products = self.get_all_products()
+        self.expire_reservations()
+        lines = self._merge_lines(shopping_list)
+        self._validate(lines)
+        return self._commit(lines)
 
-        for product, quantity in shopping_list:
-            if product in active_products:
-                original_price = product.price * quantity
-                final_price = product.buy(quantity)
-                savings = original_price - final_price
-                total_price += final_price
-                total_savings += savings
+    def quote(self, shopping_list: List[Tuple[Product, int]]) -> Tuple[float, float]:
+        """
+        Prices a shopping list without buying anything.
+
+        Line prices are served from the store's QuoteCache when possible. The
+        remaining lines are grouped by promotion and each group is priced with
+        one Promotion.apply_batch_cents() call, or line by line if it is too
+        small for a batch to pay off. Totals are summed in cents,
+        giving exactly the result order() would return for the same cart.
+        Stock is not checked.
+
+        Args:
+            shopping_list (List[Tuple[Product, int]]): The products and quantities to price.
+
+        Returns:
+            Tuple[float, float]: The total price and total savings from promotions.
+
+        Raises:
+            ValueError: If a product is not available in the store or a quantity is not positive.
+        """
+        lines = self._merge_lines(shopping_list)
+        for product, quantity in lines:
+            if not self.is_available(product):
+                raise ProductUnavailableError(f"Product {product.name} is not available in the store.")
+            if quantity <= 0:
+                raise InvalidQuantityError('Quantity to buy must be greater than zero')
+        if self._pricing_plan is not None:
+            return self._pricing_plan.price(lines)
+
+        cache = self._quote_cache
+        final_prices: List[Optional[int]] = [None] * len(lines)
+        groups: Dict[int, Tuple[object, List[int]]] = {}
+        for position, (product, quantity) in enumerate(lines):
+            cached = cache.get(product, quantity) if cache.maxsize else None
+            if cached is not None:
+                final_prices[position] = cached
+                continue
+            promotion = product.promotion
+            group = groups.get(id(promotion))
+            if group is None:
+                groups[id(promotion)] = group = (promotion, [])
+            group[1].append(position)
+
+        for promotion, positions in groups.values():
+            if promotion is None:
+                totals = [lines[position][0].price_cents * lines[position][1] for position in positions]
+            elif len(positions) < _MIN_BATCH_LINES:
+                # Setting up a batch costs more than pricing a few lines one by one.
+                totals = [promotion.apply_promotion_cents(*lines[position]) for position in positions]
             else:
-                raise ValueError(f"Product {product.name} is not available in the store.")
+                totals = promotion.apply_batch_cents([lines[position][0].price_cents for position in positions],
+                                                     [lines[position][1] for position in positions])
+            for position, total in zip(positions, totals):
+                final_prices[position] = total = int(total)
+                cache.put(lines[position][0], lines[position][1], total)
+
+        total_price = 0
+        total_savings = 0
+        for (product, quantity), final_price in zip(lines, final_prices):
+            total_price += final_price
+            total_savings += product.price_cents * quantity - final_price
+        # from_cents(), inlined: quote() is on the hot path.
+        return total_price / 100, total_savings / 100
+
+    def render_row(self, product: Product) -> str:
+        """Returns str(product), reusing the cached row until the product changes."""
+        key = id(product)
+        row = self._rendered.get(key)
+        if row is None:
+            row = str(product)
+            if key in self._products:
+                self._rendered[key] = row
+        return row
+
+    def iter_lines(self, active: Optional[bool] = None, promotion=None,
+                   offset: int = 0, limit: Optional[int] = None) -> Iterator[str]:
+        """
+        Yields numbered listing lines ("3. MacBook Air M2, Price: ...") one at a time.
+
+        Each line is numbered by the product's position in the catalog, so the
+        number can be used with store[number - 1] even when filtering. Only the
+        lines actually consumed are rendered.
+
+        Args:
+            active (Optional[bool]): True for active products only, False for inactive
+                ones only, None for all.
+            promotion: None for no promotion filter, True for products with any promotion,
+                False for products without one, or a Promotion to match exactly.
+            offset (int): The number of matching lines to skip.
+            limit (Optional[int]): The most lines to yield.
+        """
+        if offset < 0 or (limit is not None and limit < 0):
+            raise ValueError("Offset and limit cannot be negative")
+        matches = enumerate(self.product_list, start=1)
+        if active is not None or promotion is not None:
+            active_ids = self._active
+            matches = ((number, product) for number, product in matches
+                       if (active is None or (id(product) in active_ids) == active)
+                       and (promotion is None
+                            or (promotion is True and product.promotion is not None)
+                            or (promotion is False and product.promotion is None)
+                            or (not isinstance(promotion, bool) and product.promotion is promotion)))
+        stop = None if limit is None else offset + limit
+        for number, product in islice(matches, offset, stop):
+            yield f"{number}. {self.render_row(product)}"
+
+    def page(self, number: int, size: int = 20, active: Optional[bool] = None, promotion=None) -> List[str]:
+        """
+        Returns one page of listing lines.
+
+        Args:
+            number (int): The page number, starting at 1.
+            size (int): Lines per page.
+            active, promotion: Filters, as for iter_lines().
+
+        Returns:
+            List[str]: The page's lines; empty past the last page.
+        """
+        if number < 1 or size < 1:
+            raise ValueError("Page number and size must be at least 1")
+        return list(self.iter_lines(active, promotion, offset=(number - 1) * size, limit=size))
+
+    def quote_cache_stats(self) -> dict:
+        """Returns the quote cache's hit, miss, eviction and invalidation counts."""
+        return self._quote_cache.stats()
+
+    def reserve(self, shopping_list: List[Tuple[Product, int]],
+                timeout: Optional[float] = None) -> Reservation:
+        """
+        Validates a shopping list and holds its stock for a later checkout.
+
+        Args:
+            shopping_list (List[Tuple[Product, int]]): The products and quantities to hold.
+            timeout (Optional[float]): Seconds until the hold lapses, or None to hold until
+                committed or released.
+
+        Returns:
+            Reservation: The open reservation.
+
+        Raises:
+            ValueError: If any line cannot be fulfilled. Nothing is held in that case.
+        """
+        self.expire_reservations()
+        lines = self._merge_lines(shopping_list)
+        self._validate(lines)
+        expires_at = None if timeout is None else time.monotonic() + timeout
+        reservation = Reservation(self, lines, expires_at)
+        with self._reservation_lock:
+            self._hold(lines)
+            self._reservations[reservation.reservation_id] = reservation
+            if expires_at is not None:
+                heapq.heappush(self._expiry_heap, (expires_at, reservation.reservation_id))
+        return reservation
+
+    def has_reservation(self, reservation: Reservation) -> bool:
+        """Returns whether the reservation is still open in this store."""
+        self.expire_reservations()
+        return reservation.reservation_id in self._reservations
+
+    def commit_reservation(self, reservation: Reservation,
+                           totals: Optional[Tuple[float, float]] = None) -> Tuple[float, float]:
+        """
+        Buys every line of an open reservation at once.
+
+        Args:
+            reservation (Reservation): The open reservation.
+            totals (Optional[Tuple[float, float]]): The total price and savings already worked
+                out for the reservation's lines, e.g. by quote() when it was made. The lines
+                are then not priced again, so committing cannot fail in a promotion.
+
+        Returns:
+            Tuple[float, float]: The total price and total savings, as for order().
+
+        Raises:
+            ValueError: If the reservation is no longer open, or a line can no longer be
+                fulfilled (for example, the product was deactivated). The reservation
+                stays open in the latter case.
+        """
+        self.expire_reservations()
+        with self._reservation_lock:
+            if self._reservations.pop(reservation.reservation_id, None) is None:
+                raise ValueError("Reservation has expired or was already completed.")
+            self._release_hold(reservation.lines)
+        try:
+            self._validate(reservation.lines)
+        except ValueError:
+            with self._reservation_lock:
+                self._hold(reservation.lines)
+                self._reservations[reservation.reservation_id] = reservation
+            raise
+        return self._commit(reservation.lines, totals)
 
-        return total_price, total_savings
+    def release_reservation(self, reservation: Reservation) -> None:
+        """Returns a reservation's stock to the store. Releasing twice has no effect."""
+        with self._reservation_lock:
+            if self._reservations.pop(reservation.reservation_id, None) is not None:
+                self._release_hold(reservation.lines)
+
+    def expire_reservations(self, now: Optional[float] = None) -> None:
+        """Releases every reservation whose timeout has passed."""
+        heap = self._expiry_heap
+        if not heap:
+            return
+        now = time.monotonic() if now is None else now
+        with self._reservation_lock:
+            while heap and heap[0][0] <= now:
+                _, reservation_id = heapq.heappop(heap)
+                reservation = self._reservations.get(reservation_id)
+                if reservation is not None:
+                    self.release_reservation(reservation)
+
+    def get_reserved_quantity(self, product: Product) -> int:
+        """Returns how many units of a product are held by open reservations."""
+        return self._reserved.get(id(product), 0)
+
+    def _hold(self, lines: List[Tuple[Product, int]]) -> None:
+        """Adds the lines' quantities to the reserved totals."""
+        reserved = self._reserved
+        for product, quantity in lines:
+            reserved[id(product)] = reserved.get(id(product), 0) + quantity
+
+    def _release_hold(self, lines: List[Tuple[Product, int]]) -> None:
+        """Removes the lines' quantities from the reserved totals."""
+        reserved = self._reserved
+        for product, quantity in lines:
+            remaining = reserved.get(id(product), 0) - quantity
+            if remaining > 0:
+                reserved[id(product)] = remaining
+            else:
+                reserved.pop(id(product), None)
 
     def __contains__(self, product: Product) -> bool:
         """Checks if a product exists in the store."""
-        return product in self.product_list
+        return id(product) in self._products
 
     def __add__(self, other: "Store") -> "Store":
-        """Merges two stores and returns a new Store instance."""
+        """
+        Merges two stores and returns a new Store instance sharing their products.
+
+        A product held by both stores is added once. For a merged view that
+        copies nothing, use store_view.StoreView.
+        """
         if isinstance(other, Store):
-            return Store(self.product_list + other.product_list)
+            return Store(chain(self._products.values(), other._products.values()))
         return NotImplemented
 
     def __len__(self) -> int:
         """Returns the total number of unique products in the store."""
-        return len(self.product_list)
+        return len(self._products)
 
     def __str__(self) -> str:
         """Returns a string representation of the store with numbered products."""
-        product_details = "\n".join(f"{index}. {product}" for index, product in enumerate(self.product_list, start=1))
+        product_details = "\n".join(self.iter_lines())
         return f"Store Inventory:\n{product_details}"
 
     # Add __getitem__ to Store class
@@ -0,0 +1,140 @@
+import copy
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from products import NonStockedProduct, Product
+from store import Store
+
+
+class StoreView:
+    """
+    A read-only, chain-wide view over several stores, without copying them.
+
+    The view keeps references to the stores, not to copies of their catalogs.
+    Products are deduplicated by identity and then by name (SKU): the same
+    product object held by two stores counts once, and distinct products that
+    share a SKU appear as one entry whose quantity is the sum of theirs.
+    Quantities and active status are always read live from the products.
+
+    The SKU index is rebuilt lazily, only after one of the stores adds or
+    removes a product. Use materialize() for an independent merged Store.
+    """
+
+    def __init__(self, *stores: Store):
+        """
+        Initializes the view.
+
+        Args:
+            *stores (Store): The stores to federate, in priority order: the first
+                product seen for a SKU represents it.
+        """
+        if not all(isinstance(store, Store) for store in stores):
+            raise ValueError("A StoreView can only federate Store instances")
+        self.stores: Tuple[Store, ...] = stores
+        self._versions: Optional[Tuple[int, ...]] = None
+        self._skus: List[str] = []
+        self._groups: Dict[str, List[Product]] = {}
+        self._ids: Dict[int, str] = {}
+
+    def _index(self) -> Dict[str, List[Product]]:
+        """Returns the SKU groups, rebuilding them if any store's catalog has changed."""
+        versions = tuple(store.catalog_version for store in self.stores)
+        if versions != self._versions:
+            skus, groups, ids = [], {}, {}
+            for store in self.stores:
+                for product in store.product_list:
+                    if id(product) in ids:
+                        continue
+                    group = groups.get(product.name)
+                    if group is None:
+                        groups[product.name] = group = []
+                        skus.append(product.name)
+                    group.append(product)
+                    ids[id(product)] = product.name
+            self._skus, self._groups, self._ids, self._versions = skus, groups, ids, versions
+        return self._groups
+
+    def products_for(self, name: str) -> List[Product]:
+        """Returns every distinct product with the given SKU, in store order."""
+        return list(self._index().get(name, ()))
+
+    def get_product(self, name: str) -> Optional[Product]:
+        """Returns the product that represents a SKU, or None."""
+        group = self._index().get(name)
+        return group[0] if group else None
+
+    @staticmethod
+    def _group_quantity(group: List[Product]) -> int:
+        return sum(product.quantity for product in group if not isinstance(product, NonStockedProduct))
+
+    def get_quantity(self, name: str) -> int:
+        """Returns the combined stock of a SKU across the stores."""
+        return self._group_quantity(self._index().get(name, ()))
+
+    def get_quantities(self) -> Dict[str, int]:
+        """Returns the combined stock of every SKU."""
+        groups = self._index()
+        return {name: self._group_quantity(groups[name]) for name in self._skus}
+
+    def get_total_quantity(self) -> int:
+        """Returns the total stock across the stores, counting shared products once."""
+        return sum(self._group_quantity(group) for group in self._index().values())
+
+    def is_available(self, name: str) -> bool:
+        """Returns whether any store has an active product with the given SKU."""
+        return any(product.is_active() for product in self._index().get(name, ()))
+
+    def get_all_products(self) -> List[Product]:
+        """Returns the representative product of every SKU that is active in some store."""
+        groups = self._index()
+        return [groups[name][0] for name in self._skus
+                if any(product.is_active() for product in groups[name])]
+
+    def materialize(self) -> Store:
+        """
+        Builds an independent Store with one product per SKU.
+
+        Each product is a copy of the SKU's representative carrying the combined
+        quantity; it is active if any of the originals is. Orders against the
+        result do not affect the federated stores.
+        """
+        groups = self._index()
+        merged = []
+        for name in self._skus:
+            group = groups[name]
+            product = copy.copy(group[0])
+            if not isinstance(product, NonStockedProduct):
+                product.quantity = self._group_quantity(group)
+            product.active = any(original.is_active() for original in group)
+            merged.append(product)
+        return Store(merged)
+
+    def __len__(self) -> int:
+        """Returns the number of distinct SKUs."""
+        return len(self._index())
+
+    def __iter__(self) -> Iterator[Product]:
+        """Iterates over the representative product of every SKU."""
+        groups = self._index()
+        return (groups[name][0] for name in self._skus)
+
+    def __getitem__(self, index: Union[int, slice]):
+        """Returns the representative product(s) at a position in SKU order."""
+        groups = self._index()
+        if isinstance(index, slice):
+            return [groups[name][0] for name in self._skus[index]]
+        return groups[self._skus[index]][0]
+
+    def __contains__(self, item: Union[Product, str]) -> bool:
+        """Checks for a product (by identity) or a SKU (by name) in any of the stores."""
+        self._index()
+        if isinstance(item, str):
+            return item in self._groups
+        return id(item) in self._ids
+
+    def __add__(self, other: Union["StoreView", Store]) -> "StoreView":
+        """Returns a view over this view's stores and the other's, without copying."""
+        if isinstance(other, StoreView):
+            return StoreView(*self.stores, *other.stores)
+        if isinstance(other, Store):
+            return StoreView(*self.stores, other)
+        return NotImplemented
@@ -0,0 +1,44 @@
+import asyncio
+import pytest
+from products import Product, LimitedProduct
+from promotions import SecondHalfPrice
+from store import Store
+from async_store import AsyncStore
+
+# Setup fixture for inventory
+@pytest.fixture
+def inventory():
+    mac = Product("MacBook Air M2", price=1450, quantity=100)
+    mac.set_promotion(SecondHalfPrice("Second Half price!"))
+    pixel = LimitedProduct("Google Pixel 7", price=500, quantity=250, maximum=1)
+    return mac, pixel, Store([mac, pixel])
+
+# Test orders keep promotions and savings and are applied in batches
+def test_async_orders_are_batched(inventory):
+    mac, pixel, best_buy = inventory
+
+    async def scenario():
+        async with AsyncStore(best_buy, max_queue=8, max_batch=16) as async_store:
+            results = await asyncio.gather(*(async_store.order([(mac, 2)]) for _ in range(20)))
+            return results, await async_store.get_total_quantity(), async_store.stats()
+
+    results, total_quantity, stats = asyncio.run(scenario())
+    assert results == [(2175.0, 725.0)] * 20
+    assert total_quantity == 60 + 250
+    assert stats["completed"] == 21
+    assert stats["batches"] < 21
+
+# Test order errors reach the caller and do not stop the writer
+def test_async_order_errors(inventory):
+    mac, pixel, best_buy = inventory
+
+    async def scenario():
+        async with AsyncStore(best_buy) as async_store:
+            with pytest.raises(ValueError, match="Cannot buy more than 1"):
+                await async_store.order([(mac, 1), (pixel, 2)])
+            await async_store.order([(pixel, 1)])
+            return async_store.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["failed"] == 1 and stats["completed"] == 1
+    assert mac.quantity == 100 and pixel.quantity == 249
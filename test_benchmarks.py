@@ -0,0 +1,36 @@
+from collections import Counter
+from products import LimitedProduct, NonStockedProduct
+from benchmarks.generators import generate_catalog, generate_orders
+from benchmarks.run import compare, run_suite
+
+# Test the same seed gives the same catalog and trace
+def test_generators_are_reproducible():
+    first, second = generate_catalog(500, seed=3), generate_catalog(500, seed=3)
+    assert [str(product) for product in first] == [str(product) for product in second]
+    trace = [[(product.name, quantity) for product, quantity in cart]
+             for cart in generate_orders(first, 200, seed=9)]
+    assert trace == [[(product.name, quantity) for product, quantity in cart]
+                     for cart in generate_orders(second, 200, seed=9)]
+
+# Test the catalog mix and the order skew
+def test_catalog_mix_and_skew():
+    catalog = generate_catalog(2000, seed=1, mix=(0.5, 0.25, 0.25))
+    kinds = Counter(type(product) for product in catalog)
+    assert 400 < kinds[NonStockedProduct] < 600 and 400 < kinds[LimitedProduct] < 600
+    orders = generate_orders(catalog, 2000, seed=1, skew=1.2, mean_cart_size=4)
+    assert 3 < sum(len(cart) for cart in orders) / len(orders) < 5
+    popularity = Counter(product.name for cart in orders for product, _ in cart)
+    top_ten = sum(count for _, count in popularity.most_common(10))
+    assert top_ten > 0.3 * sum(popularity.values())
+    assert all(quantity == 1 for cart in orders for product, quantity in cart
+               if isinstance(product, LimitedProduct))
+
+# Test a report flags regressions against a baseline
+def test_suite_report_and_compare():
+    config = {"catalog": 50, "orders": 20, "calls": 2, "seed": 1, "skew": 1.1}
+    report = run_suite(["order", "add"], config, repeat=1)
+    assert set(report["results"]) == {"order", "add"}
+    slower = {"results": {name: dict(result, best_seconds=result["best_seconds"] / 2)
+                          for name, result in report["results"].items()}}
+    assert all(regressed for _, _, regressed in compare(report, slower, threshold=0.1))
+    assert not any(regressed for _, _, regressed in compare(report, report, threshold=0.1))
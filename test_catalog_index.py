@@ -0,0 +1,66 @@
+from products import Product, NonStockedProduct, LimitedProduct
+from promotions import PercentDiscount, SecondHalfPrice
+from store import Store
+
+# Setup a store with promotions and a few products sharing name prefixes
+def build_store():
+    thirty_percent = PercentDiscount("30% off!", percent=30)
+    second_half = SecondHalfPrice("Second Half price!")
+    products = [Product("MacBook Air M2", price=1450, quantity=100),
+                Product("MacBook Pro", price=2499, quantity=10),
+                Product("Magic Mouse", price=99, quantity=40),
+                Product("Bose QuietComfort Earbuds", price=250, quantity=500),
+                Product("Google Pixel 7", price=500, quantity=250),
+                NonStockedProduct("Windows License", price=125),
+                LimitedProduct("Shipping", price=10, quantity=250, maximum=1)]
+    products[0].set_promotion(second_half)
+    products[2].set_promotion(thirty_percent)
+    products[5].set_promotion(thirty_percent)
+    products[6].set_promotion(thirty_percent)
+    return Store(products), thirty_percent, second_half
+
+# Test price order matches sorting with Product.__lt__ and tracks price changes
+def test_price_index():
+    store, _, _ = build_store()
+    index = store.index
+    assert index.cheapest(3) == sorted(store.product_list)[:3]
+    assert index.most_expensive(2) == sorted(store.product_list, reverse=True)[:2]
+    store[4].price = 5
+    store[1].deactivate()
+    assert index.cheapest(1) == [store[4]]
+    assert index.most_expensive(1) == [store[0]]
+    assert index.most_expensive(1, active=False) == [store[1]]
+    assert list(index.price_range(99, 250)) == [store[2], store[5], store[3]]
+    assert list(index.price_range(high=store[2])) == [store[4], store[6], store[2]]
+
+# Test name prefix lookups ignore case and follow additions and removals
+def test_prefix_index():
+    store, _, _ = build_store()
+    index = store.index
+    assert [product.name for product in index.with_prefix("ma")] == ["MacBook Air M2", "MacBook Pro", "Magic Mouse"]
+    assert [product.name for product in index.with_prefix("MACB", limit=1)] == ["MacBook Air M2"]
+    store.remove_product(store[1])
+    store.add_product(Product("Mac Mini", price=599, quantity=5))
+    assert [product.name for product in index.with_prefix("mac")] == ["Mac Mini", "MacBook Air M2"]
+    assert index.with_prefix("xbox") == []
+    names = [f"SKU-{number:04d}" for number in range(200)]
+    store.add_product(Product("SKU", price=1, quantity=1))
+    for name in names:
+        store.add_product(Product(name, price=1, quantity=1))
+    assert [product.name for product in index.with_prefix("sku-01")] == names[100:200]
+    assert [product.name for product in index.with_prefix("sku", limit=3)] == ["SKU", "SKU-0000", "SKU-0001"]
+
+# Test promotion lookups and the combined search follow set_promotion()
+def test_promotion_index_and_search():
+    store, thirty_percent, second_half = build_store()
+    index = store.index
+    assert index.with_promotion(thirty_percent) == [store[2], store[5], store[6]]
+    store[4].set_promotion(thirty_percent)
+    store[6].set_promotion(None)
+    assert index.with_promotion(thirty_percent) == [store[2], store[4], store[5]]
+    assert index.search(max_price=499.99, promotion=True) == [store[2], store[5]]
+    assert index.search(promotion=thirty_percent, min_price=100) == [store[5], store[4]]
+    assert index.search(prefix="mac", promotion=False) == [store[1]]
+    assert index.search(max_price=300, limit=2) == [store[6], store[2]]
+    store[2].deactivate()
+    assert index.search(max_price=499.99, promotion=True) == [store[5]]
@@ -0,0 +1,92 @@
+import pytest
+from products import Product, NonStockedProduct, LimitedProduct
+from promotions import PercentDiscount, SecondHalfPrice
+from store import Store
+from catalog_io import import_catalog, export_catalog
+
+PROMOTIONS = {"30% off!": PercentDiscount("30% off!", percent=30),
+              "Second Half price!": SecondHalfPrice("Second Half price!")}
+
+CSV_FEED = """name,price,quantity,kind,maximum,promotion
+MacBook Air M2,1450,100,product,,Second Half price!
+Windows License,125,,non_stocked,,30% off!
+Shipping,10,250,limited,1,
+Broken,-5,1,product,,
+Gadget,9.99,5,gizmo,,
+Pixel,500,10,limited,,
+"""
+
+# Test importing a CSV feed with chunked errors
+def test_import_csv(tmp_path):
+    path = tmp_path / "feed.csv"
+    path.write_text(CSV_FEED)
+    store = Store([])
+    chunks = []
+    summary = import_catalog(store, str(path), PROMOTIONS, chunk_size=2, on_errors=chunks.append)
+
+    assert (summary.added, summary.updated, summary.rejected) == (3, 0, 3)
+    assert [[error.line for error in chunk] for chunk in chunks] == [[5], [6, 7]]
+    assert "negative" in chunks[0][0].message
+    assert isinstance(store.get_product("Windows License"), NonStockedProduct)
+    assert store.get_product("Shipping").maximum == 1
+    assert store.get_product("MacBook Air M2").promotion is PROMOTIONS["Second Half price!"]
+
+# Test upsert updates products in place instead of duplicating them
+def test_upsert_jsonl(tmp_path):
+    mac = Product("MacBook Air M2", price=1450, quantity=0)
+    store = Store([mac])
+    path = tmp_path / "feed.jsonl"
+    path.write_text('{"name": "MacBook Air M2", "price": 1399, "quantity": 40, "promotion": "30% off!"}\n'
+                    '\n'
+                    '{"name": "Bose QuietComfort Earbuds", "price": 250, "quantity": 500}\n'
+                    'not json\n')
+    errors = []
+    summary = import_catalog(store, str(path), PROMOTIONS, upsert=True, on_errors=errors.extend)
+
+    assert (summary.added, summary.updated, summary.rejected) == (1, 1, 1)
+    assert errors[0].line == 4
+    assert store.get_product("MacBook Air M2") is mac
+    assert (mac.price, mac.quantity, mac.is_active()) == (1399, 40, True)
+    assert mac.promotion is PROMOTIONS["30% off!"]
+    assert len(store) == 2
+    assert import_catalog(store, str(path), PROMOTIONS).rejected == 3
+
+# Test exported catalogs import back unchanged
+@pytest.mark.parametrize("extension", ["csv", "jsonl"])
+def test_export_round_trip(tmp_path, extension):
+    mac = Product("MacBook Air M2", price=1450, quantity=100)
+    mac.set_promotion(PROMOTIONS["Second Half price!"])
+    original = Store([mac, NonStockedProduct("Windows License", price=125),
+                      LimitedProduct("Shipping", price=10, quantity=250, maximum=1)])
+    path = str(tmp_path / f"catalog.{extension}")
+    assert export_catalog(original, path) == 3
+    restored = Store([])
+    import_catalog(restored, path, PROMOTIONS)
+    assert str(restored) == str(original)
+
+# Test non-finite prices and fractional quantities are rejected per row
+def test_rejects_non_finite_and_fractional_rows(tmp_path):
+    path = tmp_path / "feed.jsonl"
+    path.write_text('{"name": "Inf", "price": "inf", "quantity": 1}\n'
+                    '{"name": "Huge", "price": 1e400, "quantity": 1}\n'
+                    '{"name": "Fraction", "price": 5, "quantity": 1.7}\n'
+                    '{"name": "Whole", "price": 5, "quantity": 2.0}\n')
+    errors = []
+    store = Store([])
+    summary = import_catalog(store, str(path), on_errors=errors.extend)
+    assert (summary.added, summary.rejected) == (1, 3)
+    assert [error.line for error in errors] == [1, 2, 3]
+    assert store.get_product("Whole").quantity == 2
+
+# Test inactive products stay inactive through an export and import
+@pytest.mark.parametrize("extension", ["csv", "jsonl"])
+def test_round_trip_keeps_inactive(tmp_path, extension):
+    pixel = Product("Google Pixel 7", price=500, quantity=250)
+    pixel.deactivate()
+    path = str(tmp_path / f"catalog.{extension}")
+    export_catalog(Store([pixel, Product("Bose QuietComfort Earbuds", price=250, quantity=500)]), path)
+    restored = Store([])
+    import_catalog(restored, path)
+    assert not restored.get_product("Google Pixel 7").is_active()
+    assert restored.get_product("Bose QuietComfort Earbuds").is_active()
+    assert restored.get_product("Google Pixel 7").quantity == 250
@@ -0,0 +1,75 @@
+import pytest
+import columnar_store
+from products import Product, NonStockedProduct, LimitedProduct
+from promotions import SecondHalfPrice, PercentDiscount
+from store import Store
+from columnar_store import ColumnarStore
+
+# Run every test with and without NumPy
+@pytest.fixture(params=["numpy", "python"])
+def backend(request, monkeypatch):
+    if request.param == "numpy" and columnar_store.np is None:
+        pytest.skip("NumPy is not installed")
+    if request.param == "python":
+        monkeypatch.setattr(columnar_store, "np", None)
+
+# Setup the same catalog in both stores
+@pytest.fixture
+def catalogs(backend):
+    def build():
+        mac = Product("MacBook Air M2", price=1450, quantity=100)
+        mac.set_promotion(SecondHalfPrice("Second Half price!"))
+        windows = NonStockedProduct("Windows License", price=125)
+        windows.set_promotion(PercentDiscount("30% off!", percent=30))
+        return [mac,
+                Product("Bose QuietComfort Earbuds", price=250, quantity=500),
+                windows,
+                LimitedProduct("Shipping", price=10, quantity=250, maximum=1)]
+    return Store(build()), ColumnarStore(build())
+
+# Test the columnar store behaves like Store
+def test_matches_object_store(catalogs):
+    store, columns = catalogs
+    assert str(columns) == str(store)
+    assert len(columns) == len(store) == 4
+    assert columns.get_total_quantity() == store.get_total_quantity()
+
+    cart = [(0, 3), (1, 2), (2, 4), (3, 1), (0, 1)]
+    assert columns.order([(columns[i], q) for i, q in cart]) == store.order([(store[i], q) for i, q in cart])
+    assert str(columns) == str(store)
+
+# Test views support the product API and write through to the columns
+def test_product_views(catalogs):
+    _, columns = catalogs
+    mac = columns.get_product("MacBook Air M2")
+    assert isinstance(mac, Product) and mac == columns[0] and mac in columns
+    shipping = columns[3]
+    assert isinstance(shipping, LimitedProduct) and shipping.maximum == 1
+    with pytest.raises(ValueError, match="Cannot buy more than 1"):
+        columns.order([(shipping, 1), (mac, 1), (shipping, 1)])
+    assert mac.quantity == 100
+
+    mac.price = 1300
+    assert columns[0].price == 1300
+    mac.quantity = 0
+    assert not columns[0].is_active()
+    assert [product.name for product in columns.get_all_products()] == [
+        "Bose QuietComfort Earbuds", "Windows License", "Shipping"]
+
+# Test bulk restock and removal
+def test_restock_and_remove(catalogs):
+    _, columns = catalogs
+    mac, bose = columns[0], columns[1]
+    mac.quantity = 0
+    columns.restock([mac, "Shipping", "MacBook Air M2"], [5, 10, 5])
+    assert mac.quantity == 10 and mac.is_active()
+    assert columns[3].quantity == 260
+    with pytest.raises(ValueError, match="not stocked"):
+        columns.restock(["Windows License"], [1])
+
+    columns.remove_product(bose)
+    assert len(columns) == 3 and bose not in columns
+    assert columns[1].name == "Windows License"
+    assert columns.get_total_quantity() == 270
+    with pytest.raises(ValueError, match="not available"):
+        columns.order([(bose, 1)])
@@ -0,0 +1,71 @@
+import json
+import time
+import pytest
+import instrumentation
+from products import Product, LimitedProduct
+from promotions import SecondHalfPrice
+from store import Store
+
+# Always leave the hot paths uninstrumented
+@pytest.fixture
+def metrics():
+    yield instrumentation.enable()
+    instrumentation.disable()
+
+# Test enabling and disabling swaps the original methods back in
+def test_disable_restores_methods():
+    order, buy_cents = Store.order, Product.buy_cents
+    instrumentation.enable()
+    assert Store.order is not order and instrumentation.current() is not None
+    instrumentation.disable()
+    assert Store.order is order and Product.buy_cents is buy_cents
+    assert instrumentation.current() is None
+
+# Test latencies and failure reasons are recorded
+def test_order_metrics(metrics):
+    mac = Product("MacBook Air M2", price=1450, quantity=10)
+    mac.set_promotion(SecondHalfPrice("Second Half price!"))
+    pixel = LimitedProduct("Google Pixel 7", price=500, quantity=250, maximum=1)
+    best_buy = Store([mac, pixel])
+    best_buy.order([(mac, 2), (pixel, 1)])
+    for cart in ([(mac, 50)], [(pixel, 2)], [(mac, 0)]):
+        with pytest.raises(ValueError):
+            best_buy.order(cart)
+    mac.deactivate()
+    with pytest.raises(ValueError):
+        best_buy.order([(mac, 1)])
+
+    assert metrics.latency["order"].count == 5
+    assert metrics.latency["buy"].count == 2
+    assert metrics.latency["promotion"].count >= 1
+    assert metrics.failures == {"insufficient_stock": 1, "limit_exceeded": 1,
+                                "invalid_quantity": 1, "inactive_product": 1}
+
+# Test the Prometheus and JSON exporters
+def test_export(metrics, tmp_path):
+    best_buy = Store([Product("Bose QuietComfort Earbuds", price=250, quantity=5)])
+    with pytest.raises(ValueError):
+        best_buy.order([(best_buy.get_product("Bose QuietComfort Earbuds"), 6)])
+    metrics.export(str(tmp_path / "store.prom"))
+    text = (tmp_path / "store.prom").read_text()
+    assert "# TYPE store_order_seconds histogram" in text
+    assert 'store_order_seconds_bucket{le="+Inf"} 1' in text
+    assert 'store_order_failures_total{reason="insufficient_stock"} 1' in text
+    metrics.export(str(tmp_path / "store.json"), format="json")
+    assert json.loads((tmp_path / "store.json").read_text())["latency_seconds"]["order"]["count"] == 1
+
+# Test the sampling profiler sees the busy function
+def test_sampling_profiler(tmp_path):
+    def busy_loop():
+        deadline = time.perf_counter() + 0.3
+        while time.perf_counter() < deadline:
+            pass
+
+    profiler = instrumentation.SamplingProfiler(interval=0.001)
+    profiler.start()
+    busy_loop()
+    profiler.stop()
+    assert profiler.samples > 0
+    assert any("busy_loop" in function for function, _, _ in profiler.top())
+    profiler.write_collapsed(str(tmp_path / "stacks.txt"))
+    assert "busy_loop" in (tmp_path / "stacks.txt").read_text()
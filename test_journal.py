@@ -0,0 +1,90 @@
+import time
+import pytest
+from products import Product, LimitedProduct
+from promotions import SecondHalfPrice
+from store import Store
+from persistence import save_image
+from journal import JournalRecorder, read_journal, replay
+import replay as replay_cli
+
+def build_store():
+    mac = Product("MacBook Air M2", price=1450, quantity=10)
+    mac.set_promotion(SecondHalfPrice("Second Half price!"))
+    bose = Product("Bose QuietComfort Earbuds", price=250, quantity=500)
+    shipping = LimitedProduct("Shipping", price=10, quantity=250, maximum=1)
+    return Store([mac, bose, shipping])
+
+def record(path):
+    best_buy = build_store()
+    mac, bose, shipping = best_buy.product_list
+    with JournalRecorder(best_buy, str(path)) as recorder:
+        for cart in ([(mac, 2), (shipping, 1)], [(shipping, 2)], [(bose, 3)], [(mac, 9)]):
+            try:
+                best_buy.order(cart)
+            except ValueError:
+                pass
+    assert recorder.recorded == 4
+    assert "order" not in vars(best_buy)
+
+# Test a journal round-trips orders and outcomes
+def test_record_and_read(tmp_path):
+    record(tmp_path / "orders.journal")
+    _, entries = read_journal(str(tmp_path / "orders.journal"))
+    entries = list(entries)
+    assert [entry.lines for entry in entries][:2] == [[("MacBook Air M2", 2), ("Shipping", 1)], [("Shipping", 2)]]
+    assert (entries[0].ok, entries[0].total_cents) == (True, 217500 + 1000)
+    assert [(entry.ok, entry.reason) for entry in entries[1:]] == [
+        (False, "limit_exceeded"), (True, ""), (False, "insufficient_stock")]
+    assert all(entry.offset_ns >= previous.offset_ns for previous, entry in zip(entries, entries[1:]))
+
+# Test a replay against the same catalog matches, and a changed catalog diverges
+def test_replay_reports_divergence(tmp_path):
+    path = tmp_path / "orders.journal"
+    record(path)
+    report = replay(build_store(), read_journal(str(path))[1])
+    assert (report.orders, report.failed, report.divergences) == (4, 2, [])
+    assert report.percentile(0.5) <= report.percentile(0.99)
+
+    repriced = build_store()
+    repriced.get_product("Bose QuietComfort Earbuds").price = 240
+    report = replay(repriced, read_journal(str(path))[1], speed=100.0)
+    assert [divergence.index for divergence in report.divergences] == [2]
+
+# Test a torn tail is ignored and a non-journal is rejected
+def test_torn_journal(tmp_path):
+    path = tmp_path / "orders.journal"
+    record(path)
+    with open(path, "r+b") as journal_file:
+        journal_file.truncate(path.stat().st_size - 3)
+    assert len(list(read_journal(str(path))[1])) == 3
+    (tmp_path / "other").write_bytes(b"not a journal")
+    with pytest.raises(ValueError):
+        read_journal(str(tmp_path / "other"))
+
+# Test a second session appended after a long pause continues right after the first
+def test_append_session_keeps_order(tmp_path, monkeypatch):
+    path = tmp_path / "orders.journal"
+    record(path)
+    first_start, entries = read_journal(str(path))
+    first_offsets = [entry.offset_ns for entry in entries]
+    hour = 3600 * 10**9
+    clock = time.time_ns
+    monkeypatch.setattr(time, "time_ns", lambda: clock() + hour)
+    record(path)
+    started, entries = read_journal(str(path))
+    offsets = [entry.offset_ns for entry in entries]
+    assert started == first_start and offsets[:4] == first_offsets
+    assert offsets == sorted(offsets) and offsets[3] < offsets[4] < offsets[3] + hour
+    report = replay(build_store(), read_journal(str(path))[1], speed=1.0)
+    assert report.orders == 8 and report.elapsed < 5
+    (tmp_path / "other").write_bytes(b"not a journal")
+    with pytest.raises(ValueError):
+        JournalRecorder(build_store(), str(tmp_path / "other"))
+
+# Test replay.py loads a catalog image
+def test_replay_cli_catalog_image(tmp_path, capsys):
+    path = tmp_path / "orders.journal"
+    record(path)
+    save_image(build_store(), str(tmp_path / "catalog.image"))
+    assert replay_cli.main([str(path), "--catalog", str(tmp_path / "catalog.image"), "--json"]) == 0
+    assert '"divergences": 0' in capsys.readouterr().out
@@ -0,0 +1,62 @@
+import math
+import pytest
+from money import divide_round, to_cents
+from products import Product
+from promotion_engine import CartThreshold, PromotionEngine
+from promotions import PercentDiscount, SecondHalfPrice
+from store import Store
+
+# Test dollar amounts round to the nearest cent, halves away from zero
+@pytest.mark.parametrize("amount, cents", [(1450, 145000), (0.29, 29), (1.005, 101), (2.675, 268),
+                                           (19.994, 1999), ("0.125", 13), (-1.005, -101)])
+def test_to_cents(amount, cents):
+    assert to_cents(amount) == cents
+
+# Test integer division rounds halves away from zero
+def test_divide_round():
+    assert [divide_round(n, 2) for n in (1, 2, 3, -1, -3)] == [1, 1, 2, -1, -2]
+    assert divide_round(14995, 10000) == 1
+    with pytest.raises(ValueError):
+        divide_round(1, 0)
+
+# Test prices are stored to the cent
+def test_price_is_held_in_cents():
+    widget = Product("Widget", price=0.1, quantity=10)
+    assert widget.price_cents == 10
+    widget.price = 19.999
+    assert widget.price_cents == 2000 and widget.price == 20.0
+
+# Test fractional-cent promotions round once per line
+def test_promotions_round_each_line_once():
+    pen = Product("Pen", price=0.99, quantity=100)
+    pen.set_promotion(SecondHalfPrice("Second Half price!"))
+    assert pen.price_for_cents(2) == 149  # 99 + 49.5 rounds up once
+    assert pen.price_for_cents(4) == 297  # 198 + 99, no per-unit rounding
+    pen.set_promotion(PercentDiscount("12.5% off!", percent=12.5))
+    assert pen.price_for_cents(3) == 260  # 297 * 0.875 = 259.875
+
+# Test order totals and savings are exact sums of the line totals
+def test_order_totals_are_exact():
+    dimes = [Product(f"Dime {i}", price=0.1, quantity=10) for i in range(3)]
+    best_buy = Store(dimes)
+    assert best_buy.order([(dime, 1) for dime in dimes]) == (0.3, 0.0)
+    assert best_buy.get_inventory_value() == 2.7
+    best_buy.verify_aggregates()
+
+# Test cart promotions work in cents
+def test_cart_threshold_in_cents():
+    pen = Product("Pen", price=33.33, quantity=10)
+    engine = PromotionEngine()
+    engine.add_cart_rule(CartThreshold("10% over $99", threshold=99.99, percent=10))
+    plan = engine.compile([pen])
+    assert plan.price_cents([(pen, 2)]) == (6666, 0)
+    assert plan.price_cents([(pen, 3)]) == (8999, 1000)  # 999.9 cents off rounds to 1000
+
+# Test non-finite amounts are rejected with ValueError
+@pytest.mark.parametrize("amount", [math.inf, -math.inf, math.nan, "inf", "NaN", "twelve"])
+def test_to_cents_rejects_non_finite(amount):
+    with pytest.raises(ValueError):
+        to_cents(amount)
+    if not isinstance(amount, str):
+        with pytest.raises(ValueError):
+            Product("Heat Death", price=amount, quantity=1)
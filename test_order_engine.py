@@ -0,0 +1,43 @@
+import sys
+import pytest
+from products import Product, LimitedProduct
+from store import Store
+from order_engine import ConcurrentOrderEngine
+
+# Switch threads often so races surface quickly
+@pytest.fixture(autouse=True)
+def fast_thread_switching():
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+# Test contended orders never oversell
+def test_concurrent_orders_do_not_oversell():
+    mac = Product("MacBook Air M2", price=1450, quantity=500)
+    bose = Product("Bose QuietComfort Earbuds", price=250, quantity=300)
+    best_buy = Store([mac, bose])
+    carts = [[(mac, 3), (bose, 2)] if i % 2 else [(bose, 1), (mac, 1)] for i in range(1000)]
+
+    with ConcurrentOrderEngine(best_buy, max_workers=8, stripes=4) as engine:
+        futures = [engine.submit_order(cart) for cart in carts]
+        accepted = []
+        for future, cart in zip(futures, carts):
+            try:
+                future.result()
+                accepted.append(cart)
+            except ValueError:
+                pass
+
+    assert 500 - mac.quantity == sum(q for cart in accepted for p, q in cart if p is mac)
+    assert 300 - bose.quantity == sum(q for cart in accepted for p, q in cart if p is bose)
+    assert mac.quantity >= 0 and bose.quantity >= 0
+
+# Test failures are reported through the future
+def test_submit_order_propagates_errors():
+    pixel = LimitedProduct("Google Pixel 7", price=500, quantity=250, maximum=1)
+    with ConcurrentOrderEngine(Store([pixel])) as engine:
+        assert engine.submit_order([(pixel, 1)]).result() == (500, 0)
+        with pytest.raises(ValueError, match="Cannot buy more than 1"):
+            engine.submit_order([(pixel, 2)]).result()
+    assert pixel.quantity == 249
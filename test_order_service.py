@@ -0,0 +1,107 @@
+import asyncio
+import threading
+import pytest
+from products import Product, LimitedProduct
+from promotions import SecondHalfPrice
+from store import Store
+from order_service import OrderService
+from order_client import ConnectionPool, OrderClient, OrderServiceError
+
+# Setup fixture for a store served on a free localhost port
+@pytest.fixture
+def served():
+    mac = Product("MacBook Air M2", price=1450, quantity=100)
+    mac.set_promotion(SecondHalfPrice("Second Half price!"))
+    pixel = LimitedProduct("Google Pixel 7", price=500, quantity=250, maximum=1)
+    store = Store([mac, pixel])
+    service = OrderService(store, port=0)
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+
+    def run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(service.start())
+        started.set()
+        loop.run_forever()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    started.wait(5)
+    yield store, service
+    asyncio.run_coroutine_threadsafe(service.close(), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+    loop.close()
+
+# Test orders, quotes and listings over one connection, with failure reasons
+def test_order_quote_and_list(served):
+    store, service = served
+    with OrderClient(service.address) as client:
+        assert client.quote([("MacBook Air M2", 2)]) == (2175.0, 725.0)
+        assert client.order([("MacBook Air M2", 2), ("Google Pixel 7", 1)]) == (2675.0, 725.0)
+        assert store.get_product("MacBook Air M2").quantity == 98
+        rows = client.list_products(limit=1)
+        assert rows[0]["name"] == "MacBook Air M2" and rows[0]["quantity"] == 98
+        assert client.list_products(offset=1)[0]["maximum"] == 1
+        with pytest.raises(OrderServiceError) as error:
+            client.order([("Google Pixel 7", 2)])
+        assert error.value.reason == "limit_exceeded"
+        with pytest.raises(OrderServiceError) as error:
+            client.order([("Nokia 3310", 1)])
+        assert error.value.reason == "unknown_product"
+        with pytest.raises(OrderServiceError) as error:
+            client.request({"op": "refund"})
+        assert error.value.reason == "invalid_request"
+        # The connection survives failed requests.
+        assert client.stats()["errors"] == 3
+    assert service.stats()["connections"] == 1
+
+# Test pipelined and batched requests are answered in order
+def test_pipeline_and_batch(served):
+    store, service = served
+    with OrderClient(service.address) as client:
+        responses = client.pipeline([{"op": "order", "lines": [["MacBook Air M2", 1]]}] * 50
+                                    + [{"op": "order", "lines": [["MacBook Air M2", 60]]}])
+        assert all(response["ok"] for response in responses[:50])
+        assert responses[50]["reason"] == "insufficient_stock"
+        assert [response["id"] for response in responses] == sorted(response["id"] for response in responses)
+        results = client.batch([{"op": "quote", "lines": [["Google Pixel 7", 1]]}, {"op": "ping"}])
+        assert results[0]["result"] == {"total": 500.0, "savings": 0.0}
+        assert results[1]["result"] == "pong"
+    assert store.get_product("MacBook Air M2").quantity == 50
+
+# Test a connection pool shared by threads reuses its connections
+def test_connection_pool(served):
+    store, service = served
+    with ConnectionPool(service.address, size=3) as pool:
+        threads = [threading.Thread(target=lambda: [pool.order([("MacBook Air M2", 1)]) for _ in range(10)])
+                   for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert store.get_product("MacBook Air M2").quantity == 40
+    assert service.stats()["connections"] <= 3
+
+# Test a malformed request between valid ones fails alone and keeps the connection
+def test_malformed_request_in_pipeline(served):
+    store, service = served
+    with OrderClient(service.address) as client:
+        responses = client.pipeline([{"op": "order", "lines": [["MacBook Air M2", 1]]},
+                                     {"op": ["x"]},
+                                     {"op": "list", "offset": 0, "limit": 1, "active": "yes"},
+                                     {"op": "ping"}])
+        assert responses[0]["ok"] and responses[3]["result"] == "pong"
+        assert [response["reason"] for response in responses[1:3]] == ["invalid_request", "invalid_request"]
+        assert client.quote([("MacBook Air M2", 1)]) == (1450.0, 0.0)
+    assert store.get_product("MacBook Air M2").quantity == 99
+
+# Test an unexpected failure inside the service is reported as an internal error
+def test_internal_error_is_answered(served, monkeypatch):
+    store, service = served
+    monkeypatch.setattr(store, "quote", lambda shopping_list: 1 / 0)
+    with OrderClient(service.address) as client:
+        with pytest.raises(OrderServiceError) as error:
+            client.quote([("MacBook Air M2", 1)])
+        assert error.value.reason == "internal_error"
+        assert client.request({"op": "ping"}) == "pong"
@@ -0,0 +1,135 @@
+import os
+import signal
+import subprocess
+import sys
+import textwrap
+import pytest
+from products import Product, NonStockedProduct, LimitedProduct
+from promotions import PercentDiscount, SecondHalfPrice
+from columnar_store import ColumnarStore
+from persistence import PersistentStore, save_snapshot, load_snapshot, save_image, load_image
+
+# Setup a catalog with every product kind and shared promotions
+def build_products():
+    thirty_percent = PercentDiscount("30% off!", percent=30)
+    mac = Product("MacBook Air M2", price=1450, quantity=100)
+    mac.set_promotion(SecondHalfPrice("Second Half price!"))
+    windows = NonStockedProduct("Windows License", price=125)
+    windows.set_promotion(thirty_percent)
+    shipping = LimitedProduct("Shipping", price=10, quantity=250, maximum=1)
+    shipping.set_promotion(thirty_percent)
+    pixel = Product("Google Pixel 7", price=500, quantity=0)
+    return [mac, Product("Bose QuietComfort Earbuds", price=250, quantity=500), windows, shipping, pixel]
+
+# Test snapshots round-trip into both store types
+@pytest.mark.parametrize("columnar", [False, True])
+def test_snapshot_round_trip(tmp_path, columnar):
+    from store import Store
+    original = Store(build_products())
+    path = str(tmp_path / "catalog.snapshot")
+    save_snapshot(original, path)
+    restored = load_snapshot(path, columnar=columnar)
+    assert isinstance(restored, ColumnarStore if columnar else Store)
+    assert str(restored) == str(original)
+    assert [p.is_active() for p in restored] == [p.is_active() for p in original]
+    assert restored[3].maximum == 1
+    assert restored[2].promotion is restored[3].promotion
+
+    save_snapshot(restored, path)
+    assert str(load_snapshot(path)) == str(original)
+
+# Test a catalog image restores the store, its promotion links and its running totals
+def test_image_round_trip(tmp_path):
+    from store import Store
+    original = Store(build_products())
+    original[1].deactivate()
+    path = str(tmp_path / "catalog.img")
+    save_image(original, path)
+    restored = load_image(path)
+    assert str(restored) == str(original)
+    assert [p.is_active() for p in restored] == [p.is_active() for p in original]
+    assert restored[2].promotion is restored[3].promotion
+    assert restored.get_promotional_value() == original.get_promotional_value()
+    restored.verify_aggregates()
+    restored.order([(restored[0], 2), (restored[3], 1)])
+    restored.verify_aggregates()
+    with pytest.raises(ValueError):
+        load_snapshot(path)
+
+# Test importing the store and loading an image leave NumPy and the pricing engine unloaded
+def test_startup_imports_stay_lean():
+    code = ("import sys, persistence; "
+            "print(sorted({'numpy', 'decimal', 'promotion_engine'} & set(sys.modules)))")
+    root = os.path.dirname(os.path.abspath(__file__))
+    result = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
+
+# Test the log is replayed on restart and folded in by checkpoints
+def test_log_replay_and_checkpoint(tmp_path):
+    directory = str(tmp_path / "data")
+    with PersistentStore.open(directory, build_products(), group_size=4) as persistent:
+        store = persistent.store
+        mac, bose = store[0], store[1]
+        persistent.order([(mac, 3), (bose, 2)])
+        persistent.restock(store[4], 7)
+        persistent.set_price(bose, 199.99)
+        expected = str(store)
+
+    with PersistentStore.open(directory) as persistent:
+        assert str(persistent.store) == expected
+        assert persistent.store.get_product("Google Pixel 7").is_active()
+        persistent.checkpoint()
+        persistent.order([(persistent.store[0], 1)])
+
+    with PersistentStore.open(directory) as persistent:
+        assert persistent.store[0].quantity == 96
+
+# Test a torn record at the end of the log is ignored and cut off
+def test_torn_log_tail(tmp_path):
+    directory = str(tmp_path / "data")
+    with PersistentStore.open(directory, build_products(), group_size=1) as persistent:
+        persistent.order([(persistent.store[0], 2)])
+    with open(os.path.join(directory, PersistentStore.LOG_FILE), "ab") as log_file:
+        log_file.write(b"\x20\x00\x00\x00garbage")
+
+    with PersistentStore.open(directory, group_size=1) as persistent:
+        assert persistent.store[0].quantity == 98
+        persistent.order([(persistent.store[0], 1)])
+    with PersistentStore.open(directory) as persistent:
+        assert persistent.store[0].quantity == 97
+
+CRASHING_WRITER = textwrap.dedent("""
+    import sys
+    from products import Product
+    from persistence import PersistentStore
+
+    persistent = PersistentStore.open(sys.argv[1], [Product("Widget", price=1, quantity=10**9)],
+                                      group_size=10)
+    widget = persistent.store[0]
+    orders = 0
+    while True:
+        persistent.order([(widget, 1)])
+        orders += 1
+        if orders % 10 == 0:
+            print(orders, flush=True)
+""")
+
+# Test recovery after the process is killed in the middle of a batch
+def test_recovers_after_kill(tmp_path):
+    directory = str(tmp_path / "data")
+    root = os.path.dirname(os.path.abspath(__file__))
+    writer = subprocess.Popen([sys.executable, "-c", CRASHING_WRITER, directory],
+                              cwd=root, stdout=subprocess.PIPE, text=True)
+    reported = 0
+    for line in writer.stdout:
+        reported = int(line)
+        if reported >= 2000:
+            break
+    writer.send_signal(signal.SIGKILL)
+    writer.wait()
+    writer.stdout.close()
+
+    with PersistentStore.open(directory) as persistent:
+        recovered = 10**9 - persistent.store[0].quantity
+        assert recovered >= reported
+        persistent.store.verify_aggregates()
@@ -0,0 +1,105 @@
+import pytest
+from products import Product, NonStockedProduct, LimitedProduct
+from promotions import PercentDiscount, SecondHalfPrice, ThirdOneFree
+from promotion_engine import (PromotionEngine, PromotionRule, StackedPromotion,
+                              CartThreshold, Bundle)
+from store import Store
+
+# Setup the catalog from main.py
+@pytest.fixture
+def catalog():
+    products = [Product("MacBook Air M2", price=1450, quantity=100),
+                Product("Bose QuietComfort Earbuds", price=250, quantity=500),
+                Product("Google Pixel 7", price=500, quantity=250),
+                NonStockedProduct("Windows License", price=125),
+                LimitedProduct("Shipping", price=10, quantity=250, maximum=1)]
+    thirty_percent = PercentDiscount("30% off!", percent=30)
+    products[0].set_promotion(SecondHalfPrice("Second Half price!"))
+    products[1].set_promotion(ThirdOneFree("Third One Free!"))
+    products[3].set_promotion(thirty_percent)
+    products[4].set_promotion(thirty_percent)
+    return products
+
+# Test a plan without extra rules reproduces the original Store.order() totals exactly
+@pytest.mark.parametrize("quantities, expected", [((2, 3, 1, 1, 1), (3269.5, 1015.5)),
+                                                  ((1, 1, 1, 1, 1), (2294.5, 40.5)),
+                                                  ((7, 10, 3, 9, 1), (12019.5, 3265.5))])
+def test_plan_matches_current_promotions(catalog, quantities, expected):
+    cart = list(zip(catalog, quantities))
+    plan = PromotionEngine().compile(catalog)
+    assert plan.price(cart) == expected
+    assert Store(catalog).quote(cart) == expected
+    assert Store(catalog).order(cart) == expected
+
+# Test stacking, priorities and exclusivity
+def test_stacking_and_exclusivity(catalog):
+    bose = catalog[1]
+    thirty_percent = PercentDiscount("30% off!", percent=30)
+    stacked = StackedPromotion("30% off plus third one free", [
+        PromotionRule(ThirdOneFree("Third One Free!")), PromotionRule(thirty_percent, priority=1)])
+    assert stacked.apply_promotion(bose, 3) == pytest.approx(2 * 250 * 0.7)
+
+    engine = PromotionEngine()
+    engine.add_rule(thirty_percent, products=[bose], priority=1)
+    assert engine.compile(catalog).line_price(bose, 3) == pytest.approx(2 * 250 * 0.7)
+
+    engine.add_rule(PercentDiscount("Staff price", percent=50), products=[bose], priority=5, exclusive=True)
+    assert engine.compile(catalog).line_price(bose, 3) == 375
+    engine.add_rule(PercentDiscount("Flash sale", percent=10), priority=9)
+    assert engine.compile(catalog).line_price(bose, 3) == pytest.approx(2 * 250 * 0.9 * 0.7)
+
+# Test cart-wide rules
+def test_cart_rules(catalog):
+    mac, bose, pixel = catalog[:3]
+    engine = PromotionEngine()
+    engine.add_cart_rule(Bundle("Pixel + Earbuds", [pixel, bose], bundle_price=600), priority=1)
+    engine.add_cart_rule(CartThreshold("10% off over $1,000", threshold=1000, percent=10))
+    plan = engine.compile(catalog)
+
+    assert plan.price([(bose, 1)]) == (250, 0)
+    total, savings = plan.price([(pixel, 2), (bose, 2)])
+    assert total == pytest.approx((1500 - 300) * 0.9)
+    assert total + savings == pytest.approx(1500)
+
+# Test a store priced by a plan still reduces stock normally
+def test_store_uses_pricing_plan(catalog):
+    mac, bose = catalog[:2]
+    store = Store(catalog)
+    engine = PromotionEngine()
+    engine.add_cart_rule(CartThreshold("10% off over $1,000", threshold=1000, percent=10))
+    store.set_pricing_plan(engine.compile(catalog))
+    quoted = store.quote([(mac, 2), (bose, 3)])
+    assert quoted == pytest.approx(((2175 + 500) * 0.9, 725 + 250 + 2675 * 0.1))
+    assert store.order([(mac, 2), (bose, 3)]) == quoted
+    assert (mac.quantity, bose.quantity) == (98, 497)
+
+# Test a plan keeps the rules it was compiled with, even for entries it recompiles
+def test_plan_is_frozen_at_compile_time(catalog):
+    mac, pixel = catalog[0], catalog[2]
+    engine = PromotionEngine()
+    plan = engine.compile(catalog)
+    engine.add_rule(PercentDiscount("50% off!", percent=50))
+    mac.set_promotion(None)
+    newcomer = Product("Galaxy Buds", price=100, quantity=10)
+    assert plan.line_price(mac, 1) == 1450 and plan.line_price(pixel, 1) == 500
+    assert plan.line_price(newcomer, 1) == 100
+    assert engine.compile(catalog).line_price(mac, 1) == 725
+
+# Test orders priced by a plan apply each line's promotion only once
+def test_plan_orders_price_each_line_once(catalog):
+    calls = []
+
+    class CountingDiscount(PercentDiscount):
+        __slots__ = ()
+
+        def apply_promotion_cents(self, product, quantity):
+            calls.append(quantity)
+            return super().apply_promotion_cents(product, quantity)
+
+    pixel = catalog[2]
+    pixel.set_promotion(CountingDiscount("10% off!", percent=10))
+    store = Store(catalog)
+    store.set_pricing_plan(PromotionEngine().compile(catalog))
+    calls.clear()
+    assert store.order([(pixel, 2)]) == (900, 100)
+    assert calls == [2] and pixel.quantity == 248
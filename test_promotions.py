@@ -0,0 +1,58 @@
+import random
+import pytest
+import promotions
+from products import Product, NonStockedProduct, LimitedProduct
+from promotions import PercentDiscount, SecondHalfPrice, ThirdOneFree
+from store import Store
+
+PROMOTIONS = [PercentDiscount("30% off!", percent=30),
+              PercentDiscount("12.5% off!", percent=12.5),
+              SecondHalfPrice("Second Half price!"),
+              ThirdOneFree("Third One Free!")]
+
+# Run every test with and without NumPy
+@pytest.fixture(params=["numpy", "python"])
+def batch_backend(request, monkeypatch):
+    if request.param == "numpy" and promotions.np is None:
+        pytest.skip("NumPy is not installed")
+    if request.param == "python":
+        monkeypatch.setattr(promotions, "np", None)
+    return request.param
+
+# Test batch pricing matches scalar pricing exactly
+@pytest.mark.parametrize("promotion", PROMOTIONS, ids=lambda promotion: promotion.name)
+def test_apply_batch_matches_scalar(batch_backend, promotion):
+    rng = random.Random(7)
+    prices = [round(rng.uniform(0.01, 3000), 2) for _ in range(500)]
+    quantities = [rng.randint(1, 50) for _ in range(500)]
+    expected = [promotion.apply_promotion(Product("Item", price, quantity), quantity)
+                for price, quantity in zip(prices, quantities)]
+    assert list(promotion.apply_batch(prices, quantities)) == expected
+
+# Test quote matches order without changing stock
+def test_quote_matches_order(batch_backend):
+    rng = random.Random(11)
+    products = [Product(f"SKU-{i}", price=round(rng.uniform(1, 2000), 2), quantity=1000) for i in range(40)]
+    products.append(NonStockedProduct("Windows License", price=125))
+    products.append(LimitedProduct("Shipping", price=10, quantity=250, maximum=1))
+    for index, product in enumerate(products):
+        if index % 5:
+            product.set_promotion(PROMOTIONS[index % len(PROMOTIONS)])
+    best_buy = Store(products)
+    cart = [(rng.choice(products[:41]), rng.randint(1, 9)) for _ in range(120)] + [(products[-1], 1)]
+
+    quoted = best_buy.quote(cart)
+    assert best_buy.get_total_quantity() == 40 * 1000 + 250
+    assert best_buy.order(cart) == quoted
+
+# Test batches too large for int64 are priced exactly instead of overflowing
+@pytest.mark.parametrize("promotion", PROMOTIONS, ids=lambda promotion: promotion.name)
+def test_apply_batch_cents_does_not_overflow(batch_backend, promotion):
+    prices = [10 ** 15, 5, 10 ** 20]
+    quantities = [10 ** 6, 3, 2]
+    expected = [promotion.apply_promotion_cents(promotions.PricePoint(price), quantity)
+                for price, quantity in zip(prices, quantities)]
+    assert [int(total) for total in promotion.apply_batch_cents(prices, quantities)] == expected
+    assert [int(total) for total in promotion.apply_batch_cents(prices[:2], quantities[:2])] == expected[:2]
+    assert list(promotion.apply_batch_cents([5, 7], [3, 4])) == expected[1:2] + [
+        promotion.apply_promotion_cents(promotions.PricePoint(7), 4)]
@@ -0,0 +1,97 @@
+import math
+import pytest
+from products import Product, NonStockedProduct
+from store import Store
+from restock import RestockPlanner
+
+# Setup a store, a planner on a fake clock and the alerts it raises
+@pytest.fixture
+def planned():
+    clock = [0.0]
+    alerts = []
+    products = [Product("MacBook Air M2", price=1450, quantity=100),
+                Product("Bose QuietComfort Earbuds", price=250, quantity=500),
+                Product("Google Pixel 7", price=500, quantity=40),
+                NonStockedProduct("Windows License", price=125)]
+    store = Store(products)
+    planner = RestockPlanner(store, half_life=100.0, alert_horizon=50.0,
+                             on_alert=lambda product, seconds: alerts.append(product.name),
+                             clock=lambda: clock[0])
+    return store, planner, clock, alerts
+
+# Test the demand rate adds up sales and halves every half-life
+def test_demand_rate_decays(planned):
+    store, planner, clock, _ = planned
+    mac, bose, pixel, windows = store.product_list
+    store.order([(mac, 5), (windows, 3)])
+    store.order([(mac, 5)])
+    tau = 100.0 / math.log(2)
+    assert planner.demand_rate(mac) == pytest.approx(10 / tau)
+    assert planner.time_to_stockout(mac) == pytest.approx(90 * tau / 10)
+    clock[0] = 100.0
+    assert planner.demand_rate(mac) == pytest.approx(5 / tau)
+    assert planner.demand_rate(bose) == planner.demand_rate(windows) == 0.0
+    assert planner.time_to_stockout(bose) == math.inf
+
+# Test products are ranked by time to stock-out and the ranking survives the clock moving on
+def test_most_urgent_ranking(planned):
+    store, planner, clock, _ = planned
+    mac, bose, pixel, _ = store.product_list
+    store.order([(mac, 10), (bose, 10), (pixel, 10)])
+    clock[0] = 30.0
+    store.order([(bose, 200)])
+    assert [product for product, _ in planner.most_urgent(3)] == [bose, pixel, mac]
+    clock[0] = 10_000.0
+    ranked = planner.most_urgent(2)
+    assert [product for product, _ in ranked] == [bose, pixel]
+    assert ranked[0][1] < ranked[1][1]
+    assert [product for product, _ in planner.low_stock(horizon=ranked[0][1])] == [bose]
+
+# Test bulk restock reactivates sold-out products and re-ranks them
+def test_restock_and_plan(planned):
+    store, planner, clock, _ = planned
+    mac, bose, pixel, windows = store.product_list
+    store.order([(pixel, 40), (mac, 20)])
+    pixel.deactivate()
+    assert planner.most_urgent(1)[0] == (pixel, 0.0)
+    lines = planner.plan(cover=10_000.0)
+    assert [product for product, _ in lines] == [pixel, mac]
+    planner.restock(lines)
+    assert pixel.is_active()
+    assert all(seconds >= 10_000.0 for _, seconds in planner.most_urgent(2))
+    with pytest.raises(ValueError):
+        planner.restock([(mac, 5), (windows, 5)])
+    assert mac.quantity == 80 + lines[1][1]
+    store.verify_aggregates()
+
+# Test low-stock alerts fire once until the product is restocked
+def test_alerts_and_close(planned):
+    store, planner, clock, alerts = planned
+    mac, bose, pixel, _ = store.product_list
+    store.order([(pixel, 39)])
+    store.order([(pixel, 1)])
+    assert alerts == ["Google Pixel 7"]
+    planner.restock([(pixel, 1)])
+    store.commit_reservation(store.reserve([(pixel, 1)]))
+    assert alerts == ["Google Pixel 7", "Google Pixel 7"]
+    planner.close()
+    store.order([(mac, 99)])
+    assert planner.demand_rate(mac) == 0.0
+
+# Test a failing alert or listener neither fails the order nor stops other listeners
+def test_failing_alert_does_not_fail_order(caplog):
+    pixel = Product("Google Pixel 7", price=500, quantity=10)
+    store = Store([pixel])
+
+    def broken_alert(product, seconds):
+        raise RuntimeError("pager is down")
+
+    planner = RestockPlanner(store, half_life=100.0, alert_horizon=1e9, on_alert=broken_alert,
+                             clock=lambda: 0.0)
+    store.add_order_listener(lambda lines: 1 / 0)
+    seen = []
+    store.add_order_listener(seen.append)
+    assert store.order([(pixel, 3)]) == (1500.0, 0.0)
+    assert pixel.quantity == 7 and len(seen) == 1
+    assert planner.demand_rate(pixel) > 0
+    assert "pager is down" in caplog.text and "ZeroDivisionError" in caplog.text
@@ -0,0 +1,71 @@
+import pytest
+from products import Product, NonStockedProduct, LimitedProduct
+from promotions import Promotion, SecondHalfPrice, ThirdOneFree
+from store import Store
+from sharded_store import ConsistentHashRing, ShardedStore
+
+# Setup a catalog large enough to land on every shard
+def build_products():
+    products = [Product(f"SKU-{index}", price=10 + index, quantity=50) for index in range(40)]
+    products[0].set_promotion(SecondHalfPrice("Second Half price!"))
+    products[1].set_promotion(ThirdOneFree("Third One Free!"))
+    products.append(LimitedProduct("Shipping", price=10, quantity=250, maximum=1))
+    products.append(NonStockedProduct("Windows License", price=125))
+    return products
+
+# Test the ring is stable and spreads names over shards
+def test_consistent_hash_ring():
+    ring = ConsistentHashRing(4)
+    names = [f"SKU-{index}" for index in range(1000)]
+    owners = [ring.shard_for(name) for name in names]
+    assert set(owners) == {0, 1, 2, 3}
+    assert owners == [ConsistentHashRing(4).shard_for(name) for name in names]
+    moved = sum(a != b for a, b in zip(owners, (ConsistentHashRing(5).shard_for(n) for n in names)))
+    assert moved < 400
+
+# Test sharded orders match a single store and stay all-or-nothing
+def test_sharded_orders():
+    reference = Store(build_products())
+    with ShardedStore(build_products(), workers=3) as sharded:
+        cart = [("SKU-0", 3), ("SKU-1", 3), ("Shipping", 1), ("Windows License", 2), ("SKU-7", 1)]
+        expected = reference.order([(reference.get_product(name), q) for name, q in cart])
+        assert sharded.order(cart) == pytest.approx(expected)
+
+        with pytest.raises(ValueError, match="Not enough quantity in stock"):
+            sharded.order([(f"SKU-{index}", 1) for index in range(2, 40)] + [("SKU-9", 50)])
+        with pytest.raises(ValueError, match="Cannot buy more than 1"):
+            sharded.order([("SKU-3", 1), ("Shipping", 2)])
+
+        quantities = sharded.get_quantities()
+        assert quantities == {product.name: product.quantity for product in reference.product_list}
+        assert sharded.get_total_quantity() == reference.get_total_quantity()
+
+        results = sharded.order_many([[("SKU-5", 10)], [("SKU-5", 45)], [("SKU-6", 1), ("SKU-8", 1)]])
+        assert results[0] == (150, 0) and isinstance(results[1], ValueError)
+        assert results[2] == (34, 0)
+
+# Setup a promotion that fails on small purchases with something other than ValueError
+class BrokenPromotion(Promotion):
+    def apply_promotion(self, product, quantity):
+        if quantity < 10:
+            raise RuntimeError("promotion is broken")
+        return product.price * quantity
+
+# Test worker exceptions come back as errors and a failed cross-shard order changes no shard
+def test_worker_errors_are_answered():
+    products = build_products()
+    products[2].set_promotion(BrokenPromotion("Broken"))
+    with ShardedStore(products, workers=3) as sharded:
+        with pytest.raises(ValueError, match="promotion is broken"):
+            sharded.order([("SKU-2", 1)])
+        results = sharded.order_many([[("SKU-2", 1)], [("SKU-4", 1)]])
+        assert isinstance(results[0], ValueError) and results[1] == (14, 0)
+
+        other = next(f"SKU-{index}" for index in range(3, 40)
+                     if sharded.ring.shard_for(f"SKU-{index}") != sharded.ring.shard_for("SKU-2"))
+        before = sharded.get_quantities()
+        with pytest.raises(ValueError, match="promotion is broken"):
+            sharded.order([("SKU-2", 1), (other, 1)])
+        assert sharded.get_quantities() == before
+        # The shard that failed is still serving.
+        assert sharded.order([("SKU-2", 10)]) == (120, 0)
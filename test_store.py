@@ -0,0 +1,254 @@
+import pytest
+from products import Product, NonStockedProduct, LimitedProduct
+from promotions import Promotion
+from store import Store
+
+# Setup fixture for inventory
+@pytest.fixture
+def inventory():
+    mac = Product("MacBook Air M2", price=1450, quantity=100)
+    bose = Product("Bose QuietComfort Earbuds", price=250, quantity=500)
+    pixel = LimitedProduct("Google Pixel 7", price=500, quantity=250, maximum=1)
+    best_buy = Store([mac, bose, pixel])
+    return mac, bose, pixel, best_buy
+
+# Test lookup by name
+def test_get_product_by_name(inventory):
+    mac, _, _, best_buy = inventory
+    assert best_buy.get_product("MacBook Air M2") is mac
+    assert best_buy.get_product("Unknown") is None
+
+# Test active set follows product activation
+def test_active_set_tracks_activation(inventory):
+    mac, bose, pixel, best_buy = inventory
+    mac.deactivate()
+    assert best_buy.get_all_products() == [bose, pixel]
+    bose.quantity = 0
+    assert best_buy.get_all_products() == [pixel]
+    mac.activate()
+    assert best_buy.get_all_products() == [mac, pixel]
+    with pytest.raises(ValueError, match="not available"):
+        best_buy.order([(bose, 1)])
+
+# Test removal keeps order and indexes consistent
+def test_remove_product(inventory):
+    mac, bose, pixel, best_buy = inventory
+    best_buy.remove_product(bose)
+    assert len(best_buy) == 2
+    assert bose not in best_buy
+    assert best_buy[1] is pixel
+    assert best_buy.get_product(bose.name) is None
+    bose.deactivate()
+    assert best_buy.get_all_products() == [mac, pixel]
+    with pytest.raises(ValueError):
+        best_buy.remove_product(bose)
+
+# Test string representation keeps insertion order
+def test_store_str_order(inventory):
+    _, _, _, best_buy = inventory
+    windows = NonStockedProduct("Windows License", price=125)
+    best_buy.add_product(windows)
+    lines = str(best_buy).splitlines()
+    assert lines[0] == "Store Inventory:"
+    assert lines[1].startswith("1. MacBook Air M2")
+    assert lines[4].startswith("4. Windows License")
+
+# Test a failing line leaves every other line untouched
+def test_order_is_all_or_nothing(inventory):
+    mac, bose, pixel, best_buy = inventory
+    with pytest.raises(ValueError, match="Not enough quantity in stock"):
+        best_buy.order([(mac, 2), (bose, 3), (pixel, 1), (bose, 498)])
+    assert (mac.quantity, bose.quantity, pixel.quantity) == (100, 500, 250)
+
+# Test a promotion that raises mid-order leaves every line's stock untouched
+def test_order_with_raising_promotion_changes_no_stock(inventory):
+    mac, bose, _, best_buy = inventory
+
+    class BrokenPromotion(Promotion):
+        def apply_promotion(self, product, quantity):
+            if quantity == 1:
+                raise RuntimeError("promotion is broken")
+            return product.price * quantity
+
+    bose.set_promotion(BrokenPromotion("Broken"))
+    with pytest.raises(RuntimeError):
+        best_buy.order([(mac, 1), (bose, 1)])
+    with pytest.raises(RuntimeError):
+        bose.buy(1)
+    assert (mac.quantity, bose.quantity) == (100, 500)
+    best_buy.verify_aggregates()
+
+# Test duplicate lines are merged before the purchase limit is checked
+def test_order_merges_duplicate_lines(inventory):
+    mac, _, pixel, best_buy = inventory
+    with pytest.raises(ValueError, match="Cannot buy more than 1"):
+        best_buy.order([(pixel, 1), (mac, 1), (pixel, 1)])
+    assert pixel.quantity == 250
+    total_price, _ = best_buy.order([(mac, 1), (mac, 2)])
+    assert total_price == 4350
+    assert mac.quantity == 97
+
+# Test reservations hold stock until committed or released
+def test_reservation_commit_and_release(inventory):
+    mac, bose, _, best_buy = inventory
+    reservation = best_buy.reserve([(mac, 60), (bose, 1)])
+    assert best_buy.get_reserved_quantity(mac) == 60
+    with pytest.raises(ValueError, match="Not enough quantity in stock"):
+        best_buy.order([(mac, 41)])
+    assert reservation.commit() == (60 * 1450 + 250, 0)
+    assert mac.quantity == 40
+    assert best_buy.get_reserved_quantity(mac) == 0
+    with pytest.raises(ValueError, match="already completed"):
+        reservation.commit()
+
+    second = best_buy.reserve([(mac, 40)])
+    second.release()
+    assert not second.is_open()
+    best_buy.order([(mac, 40)])
+    assert mac.quantity == 0
+
+# Test reservations lapse after their timeout
+def test_reservation_expires(inventory):
+    mac, _, _, best_buy = inventory
+    reservation = best_buy.reserve([(mac, 100)], timeout=30)
+    best_buy.expire_reservations(now=reservation.expires_at)
+    assert not reservation.is_open()
+    assert best_buy.get_reserved_quantity(mac) == 0
+    best_buy.order([(mac, 100)])
+
+# Test a reservation survives a failed commit
+def test_reservation_commit_fails_when_product_deactivated(inventory):
+    mac, _, _, best_buy = inventory
+    reservation = best_buy.reserve([(mac, 10)])
+    mac.deactivate()
+    with pytest.raises(ValueError, match="not available"):
+        reservation.commit()
+    assert reservation.is_open()
+    mac.activate()
+    reservation.commit()
+    assert mac.quantity == 90
+
+# Test running aggregates follow every kind of change
+def test_aggregates_stay_consistent(inventory):
+    from promotions import SecondHalfPrice, ThirdOneFree
+    mac, bose, pixel, best_buy = inventory
+    assert best_buy.get_total_quantity() == 850
+    assert best_buy.get_active_count() == 3
+    assert best_buy.get_inventory_value() == 100 * 1450 + 500 * 250 + 250 * 500
+
+    mac.set_promotion(SecondHalfPrice("Second Half price!"))
+    assert best_buy.get_promotional_value() == 100 * 1450 * 0.75 + 500 * 250 + 250 * 500
+    best_buy.order([(mac, 3), (bose, 10)])
+    bose.price = 200
+    pixel.quantity = 0
+    windows = NonStockedProduct("Windows License", price=125)
+    windows.set_promotion(ThirdOneFree("Third One Free!"))
+    best_buy.add_product(windows)
+    best_buy.remove_product(mac)
+    mac.quantity = 1
+
+    assert best_buy.get_total_quantity() == 490
+    assert best_buy.get_active_count() == 2
+    assert best_buy.get_inventory_value() == 490 * 200
+    best_buy.verify_aggregates()
+
+# Test editing a promotion in place updates the promotional stock value
+def test_aggregates_follow_promotion_edits(inventory):
+    from promotions import PercentDiscount
+    mac, bose, _, best_buy = inventory
+    discount = PercentDiscount("10% off!", percent=10)
+    bose.set_promotion(discount)
+    assert best_buy.get_promotional_value() == 145000 + 112500 + 125000
+    discount.percent = 50
+    best_buy.verify_aggregates()
+    assert best_buy.get_promotional_value() == 145000 + 62500 + 125000
+
+# Test orders leave the promotional stock value to be repriced when it is read
+def test_orders_do_not_reprice_remaining_stock(inventory):
+    from promotions import SecondHalfPrice
+    mac, _, _, best_buy = inventory
+    calls = []
+
+    class CountingHalfPrice(SecondHalfPrice):
+        __slots__ = ()
+
+        def apply_promotion_cents(self, product, quantity):
+            calls.append(quantity)
+            return super().apply_promotion_cents(product, quantity)
+
+    mac.set_promotion(CountingHalfPrice("Second Half price!"))
+    calls.clear()
+    best_buy.order([(mac, 3)])
+    best_buy.order([(mac, 2)])
+    assert calls == [3, 2]
+    assert best_buy.get_promotional_value() == 48 * 1450 + 47 * 725 + 500 * 250 + 250 * 500
+    assert calls == [3, 2, 95]
+
+# Test quotes are cached and invalidated by price and promotion changes
+def test_quote_cache(inventory):
+    from promotions import PercentDiscount
+    mac, bose, _, best_buy = inventory
+    cart = [(mac, 2), (bose, 3)]
+    assert best_buy.quote(cart) == (3650, 0)
+    assert best_buy.quote(cart) == (3650, 0)
+    stats = best_buy.quote_cache_stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (2, 2, 2)
+
+    mac.price = 1000
+    assert best_buy.quote(cart) == (2750, 0)
+    bose.set_promotion(PercentDiscount("50% off!", percent=50))
+    assert best_buy.quote(cart) == (2375, 375)
+    best_buy.order([(bose, 1)])
+    assert best_buy.quote(cart) == (2375, 375)
+    stats = best_buy.quote_cache_stats()
+    assert stats["invalidations"] == 2 and stats["hits"] == 6
+
+# Test editing a promotion in place reprices cached quotes, including stacked ones
+def test_quote_cache_follows_promotion_edits(inventory):
+    from promotions import PercentDiscount, ThirdOneFree
+    from promotion_engine import PromotionRule, StackedPromotion
+    mac, bose, _, best_buy = inventory
+    discount = PercentDiscount("10% off!", percent=10)
+    mac.set_promotion(discount)
+    stacked = StackedPromotion("10% off and third free",
+                               [PromotionRule(discount), PromotionRule(ThirdOneFree("Third One Free!"))])
+    bose.set_promotion(stacked)
+    assert best_buy.quote([(mac, 1), (bose, 3)]) == (1755.0, 445.0)
+    discount.percent = 50
+    assert best_buy.quote([(mac, 1), (bose, 3)]) == best_buy.order([(mac, 1), (bose, 3)]) == (975.0, 1225.0)
+
+# Test the cache is bounded
+def test_quote_cache_eviction():
+    mac = Product("MacBook Air M2", price=1450, quantity=100)
+    best_buy = Store([mac], quote_cache_size=2)
+    for quantity in (1, 2, 3, 1):
+        best_buy.quote([(mac, quantity)])
+    stats = best_buy.quote_cache_stats()
+    assert (stats["size"], stats["evictions"], stats["hits"]) == (2, 2, 0)
+
+# Test listing lines keep catalog numbers when filtered and paged
+def test_listing_filters_and_pages(inventory):
+    from promotions import ThirdOneFree
+    mac, bose, pixel, best_buy = inventory
+    third_one_free = ThirdOneFree("Third One Free!")
+    bose.set_promotion(third_one_free)
+    mac.deactivate()
+    assert list(best_buy.iter_lines()) == str(best_buy).splitlines()[1:]
+    assert [line[:2] for line in best_buy.iter_lines(active=True)] == ["2.", "3."]
+    assert [line[:2] for line in best_buy.iter_lines(active=False)] == ["1."]
+    assert [line[:2] for line in best_buy.iter_lines(promotion=third_one_free)] == ["2."]
+    assert [line[:2] for line in best_buy.iter_lines(promotion=False)] == ["1.", "3."]
+    assert [line[:2] for line in best_buy.page(2, size=2)] == ["3."]
+    assert best_buy.page(3, size=2) == []
+
+# Test rendered rows are reused until their product changes
+def test_listing_row_cache(inventory):
+    mac, bose, pixel, best_buy = inventory
+    first = best_buy.render_row(mac)
+    assert best_buy.render_row(mac) is first
+    bose_row = best_buy.render_row(bose)
+    best_buy.order([(mac, 1)])
+    assert best_buy.render_row(mac) == "MacBook Air M2, Price: $1,450.00, Quantity: 99"
+    assert best_buy.render_row(bose) is bose_row
+    pixel.maximum = 2
+    assert best_buy.page(1, size=3)[2] == "3. Google Pixel 7, Price: $500.00, Limited Item (Max 2 per order)"
@@ -0,0 +1,52 @@
+import pytest
+from products import Product, NonStockedProduct
+from store import Store
+from store_view import StoreView
+
+# Setup two regional stores sharing one product and one SKU
+@pytest.fixture
+def regions():
+    shared = NonStockedProduct("Windows License", price=125)
+    east_mac = Product("MacBook Air M2", price=1450, quantity=100)
+    west_mac = Product("MacBook Air M2", price=1450, quantity=40)
+    bose = Product("Bose QuietComfort Earbuds", price=250, quantity=500)
+    east = Store([east_mac, shared])
+    west = Store([west_mac, bose, shared])
+    return east, west, east_mac, west_mac, bose, shared
+
+# Test products are deduplicated by identity and by SKU
+def test_view_deduplicates(regions):
+    east, west, east_mac, west_mac, bose, shared = regions
+    chain = StoreView(east, west)
+    assert len(chain) == 3
+    assert [product.name for product in chain] == ["MacBook Air M2", "Windows License",
+                                                   "Bose QuietComfort Earbuds"]
+    assert chain[0] is east_mac and chain[-1] is bose
+    assert west_mac in chain and "Windows License" in chain and "Google Pixel 7" not in chain
+    assert chain.get_quantity("MacBook Air M2") == 140
+    assert chain.get_total_quantity() == 640
+
+# Test the view follows later changes to the stores
+def test_view_stays_current(regions):
+    east, west, east_mac, west_mac, bose, shared = regions
+    chain = StoreView(east) + west
+    west.order([(west_mac, 10)])
+    assert chain.get_quantity("MacBook Air M2") == 130
+    pixel = Product("Google Pixel 7", price=500, quantity=250)
+    east.add_product(pixel)
+    west.remove_product(bose)
+    assert len(chain) == 3 and chain.get_product("Google Pixel 7") is pixel
+    bose.deactivate()
+    east_mac.deactivate()
+    assert [product.name for product in chain.get_all_products()] == [
+        "MacBook Air M2", "Windows License", "Google Pixel 7"]
+
+# Test materialize builds an independent merged store
+def test_materialize(regions):
+    east, west, east_mac, west_mac, bose, shared = regions
+    merged = StoreView(east, west).materialize()
+    assert len(merged) == 3 and merged.get_total_quantity() == 640
+    mac = merged.get_product("MacBook Air M2")
+    assert mac is not east_mac and mac.quantity == 140
+    merged.order([(mac, 120)])
+    assert east_mac.quantity == 100 and west_mac.quantity == 40